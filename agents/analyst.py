@@ -1,17 +1,27 @@
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 import time
 
 from core.types import AnomalyReport, Hypothesis, AnalysisReport
 from core.config import AnalystConfig
+from core.decision_cache import DecisionCache, config_key
 from core.memory import MemoryStore
 
 
+# hypothesis -> the metric whose z-score is its first piece of evidence
+EVIDENCE_METRIC = {
+    "cpu_saturation": "cpu",
+    "memory_pressure_or_leak": "mem",
+    "network_latency_or_downstream_slow": "lat_ms",
+    "error_burst_or_bad_deploy": "err",
+}
+
 class AnalystAgent:
-    def __init__(self, cfg: AnalystConfig, memory: MemoryStore):
+    def __init__(self, cfg: AnalystConfig, memory: MemoryStore, cache: Optional[DecisionCache] = None):
         self.cfg = cfg
         self.memory = memory
+        self.cache = cache
 
     @staticmethod
     def signature(anomaly: AnomalyReport) -> str:
@@ -22,7 +32,53 @@ class AnalystAgent:
         return "|".join(parts) if parts else "none"
 
     def analyze(self, anomaly: AnomalyReport, latest: Dict[str, float]) -> AnalysisReport:
+        """
+        Rank hypotheses for the anomaly. The ranking depends only on the
+        signature, its remembered outcomes and the config, so with a cache
+        the finished report (ranking, summary, memory stats) is kept per
+        (signature, memory versions, config): a hit is a versions() read
+        and one lookup, and only the z-score evidence is rebuilt from this
+        anomaly.
+        """
         ts = time.time()
+        sig = self.signature(anomaly)
+        versions = None
+        if self.cache is None:
+            stats = self.memory.success_rates(sig)
+            hyps = self._rank(anomaly, stats)
+            summary = self._summary(hyps)
+        else:
+            versions = self.memory.versions(sig)
+            key = ("analyze", sig, tuple(versions.items()), config_key(self.cfg))
+            cached = self.cache.get(key)
+            if cached is None:
+                stats, versions = self.memory.outcomes(sig)
+                hyps = self._rank(anomaly, stats)
+                summary = self._summary(hyps)
+                ranked = [(h.name, h.likelihood, h.evidence[1:]) for h in hyps]
+                key = ("analyze", sig, tuple(versions.items()), key[3])
+                self.cache.put(key, (ranked, summary, stats, versions))
+            else:
+                ranked, summary, stats, versions = cached
+                evidence = self._evidence
+                hyps = [Hypothesis(name, lik, [evidence(name, anomaly)] + tags) for name, lik, tags in ranked]
+
+        return AnalysisReport(ts=ts, anomaly=anomaly, hypotheses=hyps, summary=summary,
+                              signature=sig, memory_stats=stats, memory_versions=versions)
+
+    @staticmethod
+    def _summary(hyps: List[Hypothesis]) -> str:
+        return f"Top: {hyps[0].name} ({hyps[0].likelihood:.2f})"
+
+    @staticmethod
+    def _evidence(name: str, anomaly: AnomalyReport) -> str:
+        ab = anomaly.abnormal_metrics
+        metric = EVIDENCE_METRIC.get(name)
+        if metric is None:
+            return f"abnormal={list(ab.keys())}"
+        return f"{metric} z={ab[metric]:.2f}"
+
+    def _rank(self, anomaly: AnomalyReport, stats: Dict[str, Tuple[float, float, float]]) -> List[Hypothesis]:
         ab = anomaly.abnormal_metrics
         hyps: List[Hypothesis] = []
 
@@ -67,10 +123,10 @@ class AnalystAgent:
                     h.likelihood = min(1.0, h.likelihood + 0.10)
                     h.evidence.append("coupled(ERR+LAT)")
 
-        sig = self.signature(anomaly)
-        rollback_boost = self.memory.bias(sig, "rollback", base=0.0, max_boost=0.10)
-        restart_boost = self.memory.bias(sig, "restart", base=0.0, max_boost=0.10)
-        scale_boost = self.memory.bias(sig, "scale", base=0.0, max_boost=0.10)
+        none = (0, 0, 0.0)
+        rollback_boost = MemoryStore.bias_from(stats.get("rollback", none), base=0.0, max_boost=0.10)
+        restart_boost = MemoryStore.bias_from(stats.get("restart", none), base=0.0, max_boost=0.10)
+        scale_boost = MemoryStore.bias_from(stats.get("scale", none), base=0.0, max_boost=0.10)
 
         for h in hyps:
             if h.name == "error_burst_or_bad_deploy":
@@ -79,6 +135,4 @@ class AnalystAgent:
                 h.likelihood = min(1.0, h.likelihood + scale_boost)
 
         hyps.sort(key=lambda x: x.likelihood, reverse=True)
-        summary = f"Top: {hyps[0].name} ({hyps[0].likelihood:.2f})"
-
-        return AnalysisReport(ts=ts, anomaly=anomaly, hypotheses=hyps, summary=summary)
\ No newline at end of file
+        return hyps
\ No newline at end of file
@@ -1,36 +1,33 @@
 from __future__ import annotations
 
+import random
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
 from core.types import PlanDecision, ActionResult
 from core.config import ExecutorConfig
 from core.logger import ActionLogger
+from core.ratelimit import ActionLimiter
 
 
-class ExecutorAgent:
+# (success, outcome, changed, delta): changed holds new absolute values,
+# delta numeric increments (applied to whatever the state is by then, so
+# concurrent actions on the same field add up instead of overwriting)
+BackendResult = Tuple[bool, str, Dict[str, Any], Dict[str, float]]
 
-    def __init__(self, cfg: ExecutorConfig, logger: ActionLogger):
-        self.cfg = cfg
-        self.logger = logger
-        self.last_action_time = 0
 
-    def execute(self, decision: PlanDecision, cluster_state: dict) -> ActionResult:
-        now = time.time()
-
-        # cooldown protection
-        if now - self.last_action_time < self.cfg.cooldown_seconds:
-            return ActionResult(
-                ts=now,
-                action="noop",
-                success=False,
-                outcome="cooldown_active"
-            )
+class LocalBackend:
+    """Applies actions to the simulated cluster_state immediately."""
 
-        action = decision.action
-        changed = {}
+    def run(self, action: str, cluster_state: dict, cancel: threading.Event) -> BackendResult:
+        changed: Dict[str, Any] = {}
+        delta: Dict[str, float] = {}
 
         if action == "scale":
             cluster_state["replicas"] += 1
-            changed["replicas"] = cluster_state["replicas"]
+            delta["replicas"] = 1
             outcome = "scaled_up"
 
         elif action == "restart":
@@ -47,19 +44,182 @@ class ExecutorAgent:
         else:
             outcome = "noop"
 
-        self.last_action_time = now
+        return True, outcome, changed, delta
+
+
+class SimulatedBackend(LocalBackend):
+    """
+    Stand-in for a real orchestrator: each action takes an exponentially
+    distributed time around latency_s (waiting on `cancel`, so timeouts
+    and cancellation interrupt it) and fails with probability failure_rate.
+    State only changes when the action succeeds.
+    """
+
+    def __init__(self, latency_s: float = 2.0, failure_rate: float = 0.1, seed: Optional[int] = None):
+        self.latency_s = float(latency_s)
+        self.failure_rate = float(failure_rate)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def run(self, action: str, cluster_state: dict, cancel: threading.Event) -> BackendResult:
+        with self._lock:
+            duration = self._rng.expovariate(1.0 / self.latency_s) if self.latency_s > 0 else 0.0
+            failed = self._rng.random() < self.failure_rate
+        if cancel.wait(duration):
+            return False, "cancelled", {}, {}
+        if failed:
+            return False, f"{action}_failed", {}, {}
+        return super().run(action, cluster_state, cancel)
+
+
+def build_backend(cfg: ExecutorConfig) -> LocalBackend:
+    if cfg.backend == "simulated":
+        return SimulatedBackend(cfg.sim_latency_s, cfg.sim_failure_rate)
+    return LocalBackend()
+
+
+class ExecutorAgent:
+    """
+    Runs remediation actions on a worker pool. submit() returns a Future
+    right away; the action gets a cancel event that is set on timeout
+    (cfg.action_timeout_s) or by cancel(), and latency_ms records how
+    long it actually ran. The timeout counts from submit(), so time spent
+    waiting for a worker is included. Futures always resolve to an ActionResult
+    (cancelled / timed out / failed actions have success=False).
+    execute() is the blocking form.
+
+    Actions are admitted per (service, action) by an ActionLimiter;
+    blocked ones resolve at once as noop with outcome cooldown_active,
+    rate_limited or global_rate_limited.
+    """
+
+    def __init__(self, cfg: ExecutorConfig, logger: ActionLogger, backend: Optional[LocalBackend] = None):
+        self.cfg = cfg
+        self.logger = logger
+        self.backend = backend if backend is not None else build_backend(cfg)
+        self.limiter = ActionLimiter(
+            cooldown_s=cfg.cooldown_seconds,
+            rate_per_minute=cfg.rate_limit_per_minute,
+            burst=cfg.rate_limit_burst,
+            global_rate_per_minute=cfg.global_rate_limit_per_minute,
+            max_targets=cfg.max_rate_limit_targets,
+        )
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._running: Dict[Future, threading.Event] = {}
+
+    def execute(self, decision: PlanDecision, cluster_state: dict) -> ActionResult:
+        return self.submit(decision, cluster_state).result()
+
+    def submit(
+        self,
+        decision: PlanDecision,
+        cluster_state: dict,
+        callback: Optional[Callable[[ActionResult], None]] = None,
+    ) -> "Future[ActionResult]":
+        now = time.time()
+
+        service = decision.metadata.get("service") or cluster_state.get("service", "default")
+
+        with self._lock:
+            # cooldown / rate limit protection, per (service, action)
+            blocked = self.limiter.check((service, decision.action), now)
+            if blocked is not None:
+                fut: Future = Future()
+                fut.set_result(ActionResult(
+                    ts=now,
+                    action="noop",
+                    success=False,
+                    outcome=blocked
+                ))
+            else:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=max(1, self.cfg.workers), thread_name_prefix="executor")
+                cancel = threading.Event()
+                # the timeout runs from submission, so time spent queued counts
+                deadline = time.monotonic() + self.cfg.action_timeout_s
+                fut = self._pool.submit(self._run, decision.action, cluster_state, cancel, deadline)
+                self._running[fut] = cancel
+
+        if blocked is not None:
+            # outside the lock: the callback may call back into the executor
+            if callback is not None:
+                callback(fut.result())
+            return fut
+
+        fut.add_done_callback(self._forget)
+        if callback is not None:
+            fut.add_done_callback(lambda f: callback(f.result()))
+        return fut
+
+    def cancel(self, fut: Future) -> bool:
+        """Cancel a submitted action; False if it had already finished."""
+        with self._lock:
+            cancel = self._running.get(fut)
+        if cancel is None:
+            return False
+        cancel.set()
+        return True
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._running)
+
+    def shutdown(self, wait: bool = True, cancel_running: bool = False) -> None:
+        if cancel_running:
+            with self._lock:
+                for cancel in self._running.values():
+                    cancel.set()
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+
+    def _forget(self, fut: Future) -> None:
+        with self._lock:
+            self._running.pop(fut, None)
+
+    def _run(self, action: str, cluster_state: dict, cancel: threading.Event, deadline: float) -> ActionResult:
+        start = time.time()
+        t0 = time.perf_counter()
+        expired = threading.Event()
+
+        def expire() -> None:
+            expired.set()
+            cancel.set()
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            expire()
+        timer = threading.Timer(max(0.0, remaining), expire)
+        timer.daemon = True
+        timer.start()
+        try:
+            if cancel.is_set():  # cancelled or timed out while still queued
+                success, outcome, changed, delta = False, "cancelled", {}, {}
+            else:
+                success, outcome, changed, delta = self.backend.run(action, cluster_state, cancel)
+        except Exception as e:
+            success, outcome, changed, delta = False, f"error: {e}", {}, {}
+        finally:
+            timer.cancel()
+        latency_ms = (time.perf_counter() - t0) * 1000.0
+        if not success and expired.is_set():
+            outcome = "timed_out"
 
         # log action
         self.logger.log("execute", {
             "action": action,
             "outcome": outcome,
-            "cluster_state": cluster_state
+            "success": success,
+            "latency_ms": latency_ms,
+            "cluster_state": dict(cluster_state)
         })
 
         return ActionResult(
-            ts=now,
+            ts=start,
             action=action,
-            success=True,
+            success=success,
             outcome=outcome,
-            changed=changed
-        )
\ No newline at end of file
+            changed=changed,
+            delta=delta,
+            latency_ms=latency_ms
+        )
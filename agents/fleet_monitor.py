@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Sequence
+
+import numpy as np
+
+from agents.monitor import AnomalyReport
+from core.rolling_window import FleetWindow
+
+
+DEFAULT_METRICS = ("cpu", "mem", "lat_ms", "err")
+
+
+class FleetMonitorAgent:
+    """
+    Observe + Detect for a whole fleet of services per tick.
+    Same z-score rules as MonitorAgent, evaluated for every entity in a
+    batch with array operations instead of one MonitorAgent per service.
+    """
+
+    def __init__(self, cfg: Any, metrics: Sequence[str] = DEFAULT_METRICS, capacity: int = 64):
+        self.cfg = cfg
+        self.metrics = tuple(metrics)
+        self.window = FleetWindow(
+            window_size=max(3, int(getattr(cfg, "window_size", 30))),
+            metrics=self.metrics,
+            ddof=1,
+            capacity=capacity,
+        )
+
+    def observe_batch(self, entity_ids: Sequence[str], values: np.ndarray) -> np.ndarray:
+        """values: (len(entity_ids), len(metrics)) in self.metrics order. Returns the entity rows."""
+        rows = self.window.rows(entity_ids)
+        self.window.push(rows, np.asarray(values, dtype=np.float64))
+        return rows
+
+    def detect_batch(self, entity_ids: Sequence[str], values: np.ndarray) -> Dict[str, AnomalyReport]:
+        """Reports for the entities in the batch that fired; everything else is ok or warming up."""
+        return self._detect(self.window.rows(entity_ids), entity_ids, np.asarray(values, dtype=np.float64))
+
+    def step(self, entity_ids: Sequence[str], values: np.ndarray) -> Dict[str, AnomalyReport]:
+        """observe_batch + detect_batch with a single entity lookup."""
+        x = np.asarray(values, dtype=np.float64)
+        rows = self.window.rows(entity_ids)
+        self.window.push(rows, x)
+        return self._detect(rows, entity_ids, x)
+
+    def _detect(self, rows: np.ndarray, entity_ids: Sequence[str], x: np.ndarray) -> Dict[str, AnomalyReport]:
+        z_threshold = float(getattr(self.cfg, "z_threshold", 3.0))
+        score_threshold = float(getattr(self.cfg, "score_threshold", 3.5))
+        min_abnormal = int(getattr(self.cfg, "min_abnormal_metrics", 1))
+        warm = int(getattr(self.cfg, "window_size", 30))
+
+        n, mean, sd = self.window.moments(rows)
+        tiny = sd < 1e-9
+        z = np.where(tiny, 0.0, (x - mean) / np.where(tiny, 1.0, sd))
+        abs_z = np.abs(z)
+        max_abs_z = abs_z.max(axis=1) if abs_z.shape[1] else np.zeros(len(rows))
+        abnormal = abs_z >= z_threshold
+
+        fired = (n >= warm) & (abnormal.sum(axis=1) >= min_abnormal) & (max_abs_z >= score_threshold)
+
+        reports: Dict[str, AnomalyReport] = {}
+        for i in np.flatnonzero(fired):
+            reports[entity_ids[i]] = AnomalyReport(
+                is_anomaly=True,
+                anomaly_score=float(max_abs_z[i]),
+                abnormal_metrics={self.metrics[j]: float(z[i, j]) for j in np.flatnonzero(abnormal[i])},
+                reason="threshold",
+            )
+        return reports
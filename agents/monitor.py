@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Any
-import math
+from typing import Dict, Any
+
+from core.ewma import EwmaState
+from core.rolling_window import MedianWindow, ScalarWindow
 
 
 @dataclass
@@ -13,48 +15,44 @@ class AnomalyReport:
     reason: str  # warming_up | ok | threshold
 
 
-class RollingWindow:
+class RollingWindow(ScalarWindow):
     """
     Minimal rolling window stats (mean/std) per metric.
-    Keeps last N values for each metric key.
+    Keeps last N values for each metric key (sample std).
     """
 
     def __init__(self, size: int):
-        self.size = max(3, int(size))
-        self._values: Dict[str, List[float]] = {}
+        super().__init__(max(3, int(size)), ddof=1)
+        self.size = self.window_size
 
     def add(self, metrics: Dict[str, float]) -> None:
-        for k, v in metrics.items():
-            arr = self._values.setdefault(k, [])
-            arr.append(float(v))
-            if len(arr) > self.size:
-                arr.pop(0)
-
-    def count(self) -> int:
-        # Count is min length across keys present; good enough for warmup gating
-        if not self._values:
-            return 0
-        return min(len(v) for v in self._values.values())
-
-    def mean_std(self, key: str) -> tuple[float, float]:
-        arr = self._values.get(key, [])
-        if not arr:
-            return 0.0, 0.0
-        m = sum(arr) / len(arr)
-        var = sum((x - m) ** 2 for x in arr) / max(1, (len(arr) - 1))
-        sd = math.sqrt(var)
-        return m, sd
+        self.push(metrics)
+
+
+def build_window(cfg: Any) -> Any:
+    """Window backing cfg.detector; each exposes add / count / align(current) -> (keys, x, center, scale) lists."""
+    size = getattr(cfg, "window_size", 30)
+    detector = getattr(cfg, "detector", "zscore")
+    if detector == "zscore":
+        return RollingWindow(size=size)
+    if detector == "mad":
+        return MedianWindow(size=size, scale=getattr(cfg, "mad_scale", 1.4826))
+    if detector == "ewma":
+        return EwmaState(half_life=getattr(cfg, "ewma_half_life", 30.0), trend=getattr(cfg, "ewma_trend", False))
+    raise ValueError(f"unknown detector: {detector}")
 
 
 class MonitorAgent:
     """
     Observe + Detect.
-    Uses rolling window stats and z-score anomaly detection.
+    Uses rolling window stats and z-score anomaly detection
+    (mean/std, median/MAD with detector="mad", or EWMA forecasts with
+    detector="ewma"; window_size is then only the warmup length).
     """
 
     def __init__(self, cfg: Any):
         self.cfg = cfg
-        self.window = RollingWindow(size=getattr(cfg, "window_size", 30))
+        self.window = build_window(cfg)
 
     def observe(self, point: Any) -> None:
         # supports both point.metrics dict OR point.cpu fields via adapter property
@@ -96,23 +94,18 @@ class MonitorAgent:
         score_threshold = float(getattr(self.cfg, "score_threshold", 3.5))
         min_abnormal = int(getattr(self.cfg, "min_abnormal_metrics", 1))
 
+        keys, x, center, sd = self.window.align(metrics)
+
         abnormal: Dict[str, float] = {}
         max_abs_z = 0.0
-
-        for k, v in metrics.items():
-            mean, sd = self.window.mean_std(k)
-
+        for k, v, c, s in zip(keys, x, center, sd):
             # If sd is too small, z-score becomes unstable; treat as non-abnormal unless far off
-            if sd < 1e-9:
-                z = 0.0
-            else:
-                z = (float(v) - mean) / sd
-
+            z = 0.0 if s < 1e-9 else (v - c) / s
             abs_z = abs(z)
-            max_abs_z = max(max_abs_z, abs_z)
-
+            if abs_z > max_abs_z:
+                max_abs_z = abs_z
             if abs_z >= z_threshold:
-                abnormal[k] = float(z)
+                abnormal[k] = z
 
         is_anomaly = (len(abnormal) >= min_abnormal) and (max_abs_z >= score_threshold)
 
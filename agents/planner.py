@@ -1,45 +1,78 @@
 from __future__ import annotations
 import time
+from typing import Optional, Tuple
 from core.types import AnalysisReport, PlanDecision
 from core.config import PlannerConfig
+from core.decision_cache import DecisionCache, config_key
 from core.memory import MemoryStore
 from agents.analyst import AnalystAgent
 
 
 class PlannerAgent:
-    def __init__(self, cfg: PlannerConfig, memory: MemoryStore):
+    def __init__(self, cfg: PlannerConfig, memory: MemoryStore, cache: Optional[DecisionCache] = None):
         self.cfg = cfg
         self.memory = memory
+        self.cache = cache
 
     def plan(self, analysis: AnalysisReport) -> PlanDecision:
+        """
+        With a cache, decisions are reused per (signature, top hypothesis,
+        memory version of the proposed action, config). Windowed / decayed
+        memory views change with the clock, so those configs always plan
+        from scratch, as do analyses without memory_versions.
+        """
+        sig = analysis.signature or AnalystAgent.signature(analysis.anomaly)
+        # the decision reads analysis.memory_stats, so it is keyed on the versions
+        # those stats were read at; without them (uncached analyst) plan from scratch
+        versions = analysis.memory_versions
+        if (
+            self.cache is None
+            or self.cfg.memory_window_s is not None
+            or self.cfg.memory_decay
+            or versions is None
+            or not analysis.signature
+        ):
+            return self._plan(analysis, sig)
+
+        top = analysis.hypotheses[0]
+        action = self.proposal(top.name, top.likelihood)[0]
+        key = ("plan", sig, top.name, top.likelihood, len(analysis.anomaly.abnormal_metrics),
+               versions.get(action, 0), config_key(self.cfg))
+        cached = self.cache.get(key)
+        if cached is None:
+            decision = self._plan(analysis, sig)
+            self.cache.put(key, (decision.action, decision.confidence, decision.risk,
+                                 decision.rationale, dict(decision.metadata)))
+            return decision
+        action, conf, risk, rationale, metadata = cached
+        return PlanDecision(ts=time.time(), action=action, confidence=conf, risk=risk,
+                            rationale=rationale, metadata=dict(metadata))
+
+    @staticmethod
+    def proposal(hypothesis: str, likelihood: float) -> Tuple[str, float, float]:
+        """map hypothesis -> (default action, base confidence, base risk)"""
+        if hypothesis == "cpu_saturation":
+            return "scale", min(0.95, likelihood + 0.10), 0.25
+        if hypothesis == "memory_pressure_or_leak":
+            return "restart", min(0.90, likelihood + 0.05), 0.30
+        if hypothesis == "error_burst_or_bad_deploy":
+            return "rollback", min(0.92, likelihood + 0.08), 0.32
+        if hypothesis == "network_latency_or_downstream_slow":
+            return "escalate", likelihood, 0.15
+        return "escalate", likelihood, 0.20
+
+    def _plan(self, analysis: AnalysisReport, sig: str) -> PlanDecision:
         ts = time.time()
         top = analysis.hypotheses[0]
-        sig = AnalystAgent.signature(analysis.anomaly)
-
-        # map hypothesis -> default action
-        if top.name == "cpu_saturation":
-            action = "scale"
-            base_conf = min(0.95, top.likelihood + 0.10)
-            base_risk = 0.25
-        elif top.name == "memory_pressure_or_leak":
-            action = "restart"
-            base_conf = min(0.90, top.likelihood + 0.05)
-            base_risk = 0.30
-        elif top.name == "error_burst_or_bad_deploy":
-            action = "rollback"
-            base_conf = min(0.92, top.likelihood + 0.08)
-            base_risk = 0.32
-        elif top.name == "network_latency_or_downstream_slow":
-            action = "escalate"
-            base_conf = top.likelihood
-            base_risk = 0.15
-        else:
-            action = "escalate"
-            base_conf = top.likelihood
-            base_risk = 0.20
+        action, base_conf, base_risk = self.proposal(top.name, top.likelihood)
 
-        # memory bias directly for action confidence
-        conf = self.memory.bias(sig, action, base=base_conf, max_boost=0.20)
+        # memory bias directly for action confidence;
+        # reuse the analyst's all-time stats unless we want a recency-weighted view
+        if analysis.signature and self.cfg.memory_window_s is None and not self.cfg.memory_decay:
+            conf = MemoryStore.bias_from(analysis.memory_stats.get(action, (0, 0, 0.0)), base=base_conf, max_boost=0.20)
+        else:
+            conf = self.memory.bias(sig, action, base=base_conf, max_boost=0.20,
+                                    window_s=self.cfg.memory_window_s, decayed=self.cfg.memory_decay)
 
         # risk rises if many abnormal metrics
         risk = min(1.0, base_risk + 0.05 * max(0, len(analysis.anomaly.abnormal_metrics) - 1))
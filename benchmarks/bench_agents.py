@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+from agents.analyst import AnalystAgent
+from agents.monitor import AnomalyReport, MonitorAgent
+from agents.planner import PlannerAgent
+from core.config import AnalystConfig, MonitorConfig, PlannerConfig
+from core.decision_cache import DecisionCache
+from core.memory import MemoryStore
+from core.rolling_window import MedianWindow, RollingWindow
+from simulation.batch_simulator import METRICS, BatchSimulator
+
+from benchmarks.harness import Case
+
+
+def corpus(ticks: int, scenario: str = "cpu_spike", seed: int = 7) -> List[Dict[str, float]]:
+    """Seeded single-service metrics, one dict per tick."""
+    batch = BatchSimulator(1, scenario, offsets=[100], seed=seed).generate(ticks)
+    cols = [getattr(batch, m)[:, 0].tolist() for m in METRICS]
+    return [dict(zip(METRICS, row)) for row in zip(*cols)]
+
+
+class _Point:
+    __slots__ = ("metrics",)
+
+    def __init__(self, metrics: Dict[str, float]):
+        self.metrics = metrics
+
+
+def _cycle(items: List[Any]):
+    n = len(items)
+    state = {"i": 0}
+
+    def nxt() -> Any:
+        i = state["i"]
+        state["i"] = i + 1 if i + 1 < n else 0
+        return items[i]
+
+    return nxt
+
+
+def monitor_cases(windows: List[int]) -> List[Case]:
+    points = [_Point(m) for m in corpus(4096)]
+    out = []
+    for w in windows:
+        for detector in ("zscore", "mad", "ewma"):
+            monitor = MonitorAgent(MonitorConfig(window_size=w, detector=detector))
+            for p in points[:w]:
+                monitor.observe(p)
+            nxt = _cycle(points)
+
+            def step(monitor=monitor, nxt=nxt) -> None:
+                p = nxt()
+                monitor.observe(p)
+                monitor.detect(p)
+
+            out.append(Case(f"monitor.observe_detect[{detector},w={w}]", step, params={"window": w, "detector": detector}))
+    return out
+
+
+def rolling_window_cases(windows: List[int]) -> List[Case]:
+    rows = corpus(4096)
+    out = []
+    for w in windows:
+        rw = RollingWindow(w)
+        for m in rows[:w]:
+            rw.push(m)
+        nxt = _cycle(rows)
+        out.append(Case(f"rolling_window.zscores[w={w}]", lambda rw=rw, nxt=nxt: rw.zscores(nxt()),
+                        inner=10, params={"window": w}))
+    return out
+
+
+def median_window_cases(windows: List[int]) -> List[Case]:
+    """One add() plus median_mad() per metric: the mad detector's per-tick window work."""
+    rows = corpus(4096)
+    out = []
+    for w in windows:
+        mw = MedianWindow(w)
+        for i in range(w):
+            mw.add(rows[i % len(rows)])
+        nxt = _cycle(rows)
+
+        def step(mw=mw, nxt=nxt) -> None:
+            mw.add(nxt())
+            for k in METRICS:
+                mw.median_mad(k)
+
+        out.append(Case(f"median_window.add_median_mad[w={w}]", step, params={"window": w}))
+    return out
+
+
+def reasoning_cases(memory: MemoryStore) -> List[Case]:
+    analyst = AnalystAgent(AnalystConfig(), memory)
+    planner = PlannerAgent(PlannerConfig(), memory)
+    anomalies = [
+        AnomalyReport(True, 6.2, {"cpu": 6.2}, "threshold"),
+        AnomalyReport(True, 5.1, {"err": 5.1, "lat_ms": 3.4}, "threshold"),
+        AnomalyReport(True, 4.0, {"mem": 4.0}, "threshold"),
+        AnomalyReport(True, 3.8, {"lat_ms": 3.8}, "threshold"),
+    ]
+    latest = {"cpu": 80.0, "mem": 50.0, "lat_ms": 300.0, "err": 6.0}
+    reports = [analyst.analyze(a, latest=latest) for a in anomalies]
+    next_anomaly, next_report = _cycle(anomalies), _cycle(reports)
+    cache = DecisionCache()
+    cached_analyst = AnalystAgent(AnalystConfig(), memory, cache)
+    cached_planner = PlannerAgent(PlannerConfig(), memory, cache)
+    next_cached_report = _cycle([cached_analyst.analyze(a, latest=latest) for a in anomalies])
+    return [
+        Case("analyst.analyze", lambda: analyst.analyze(next_anomaly(), latest=latest), inner=10),
+        Case("planner.plan", lambda: planner.plan(next_report()), inner=10),
+        Case("analyst.analyze[cached]", lambda: cached_analyst.analyze(next_anomaly(), latest=latest), inner=10),
+        Case("planner.plan[cached]", lambda: cached_planner.plan(next_cached_report()), inner=10),
+    ]
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import os
+import random
+from typing import List
+
+from core.config import LoggingConfig
+from core.log_writer import AsyncLogWriter
+from core.telemetry import TelemetryLogger
+from run_agent import build_pipeline, parse_args
+
+from benchmarks.bench_agents import corpus
+from benchmarks.harness import Case
+
+
+def _record_source():
+    rows = corpus(1024)
+    state = {"i": 0}
+
+    def nxt():
+        i = state["i"]
+        state["i"] = (i + 1) % len(rows)
+        return {**rows[i], "replicas": 2, "version": "v1", "scenario": "cpu_spike", "fault_active": False}
+
+    return nxt
+
+
+def telemetry_cases(folder: str) -> List[Case]:
+    out = []
+
+    sync = TelemetryLogger(metrics_path=os.path.join(folder, "sync", "metrics.jsonl"),
+                           incidents_path=os.path.join(folder, "sync", "incidents.jsonl"))
+    nxt = _record_source()
+    out.append(Case("telemetry.log_metric[jsonl,sync]", lambda: sync.log_metric(nxt())))
+
+    writer = AsyncLogWriter(LoggingConfig(policy="block"))
+    async_ = TelemetryLogger(metrics_path=os.path.join(folder, "async", "metrics.jsonl"),
+                             incidents_path=os.path.join(folder, "async", "incidents.jsonl"),
+                             writer=writer)
+    nxt_a = _record_source()
+    out.append(Case("telemetry.log_metric[jsonl,async]", lambda: async_.log_metric(nxt_a()),
+                    inner=10, teardown=writer.close))
+
+    col = TelemetryLogger(metrics_path=os.path.join(folder, "col", "metrics_col"),
+                          incidents_path=os.path.join(folder, "col", "incidents.jsonl"),
+                          metrics_format="columnar")
+    nxt_c = _record_source()
+    out.append(Case("telemetry.log_metric[columnar]", lambda: col.log_metric(nxt_c()),
+                    inner=10, teardown=col.close))
+    return out
+
+
+# (instrumented case, same case without it): checked against --max-overhead by the runner
+OVERHEAD_PAIRS = [("run_agent.tick[cpu_spike]", "run_agent.tick[cpu_spike,no-timings]")]
+
+
+def tick_cases(scenario: str = "cpu_spike") -> List[Case]:
+    """
+    A full headless run_agent tick (simulate, log, detect, and on anomalies
+    analyze/plan/act/learn), with and without per-stage timings. Both
+    cases drive the same pipeline, toggling pipeline.timings, so the pair
+    differs only in the timing calls. run_agent writes logs/ and memory/
+    under the cwd, which the runner points at its scratch folder.
+    """
+    random.seed(3)
+    pipeline, writer = build_pipeline(parse_args(["--scenario", scenario]))
+    timings = pipeline.timings
+    seq = {"n": 0}
+    closed = []
+
+    def tick(with_timings: bool) -> None:
+        pipeline.timings = timings if with_timings else None
+        seq["n"] += 1
+        pipeline.run_tick(seq["n"])
+
+    def close() -> None:
+        if closed:
+            return
+        closed.append(True)
+        pipeline.executor.shutdown()
+        pipeline.telemetry.close()
+        writer.close()
+
+    return [
+        Case(f"run_agent.tick[{scenario}]", lambda: tick(True), teardown=close,
+             params={"scenario": scenario, "timings": True}),
+        Case(f"run_agent.tick[{scenario},no-timings]", lambda: tick(False), teardown=close,
+             params={"scenario": scenario, "timings": False}),
+    ]
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import json
+import os
+import random
+import shutil
+import time
+from typing import List
+
+from core.memory import MemoryStore
+from core.memory_sqlite import SQLiteMemoryStore
+from tools.import_memory import iter_rows
+
+from benchmarks.harness import Case
+
+
+SIGNATURES = ["cpu:pos", "mem:pos", "err:pos", "lat_ms:pos", "err:pos|lat_ms:pos", "cpu:pos|mem:pos"]
+ACTIONS = ["scale", "restart", "rollback", "escalate", "noop"]
+
+
+def _fixture_dir(folder: str, rows: int) -> str:
+    return os.path.join(folder, f"mem_{rows}")
+
+
+def fixture_now(folder: str, rows: int) -> float:
+    """The time the build_memory() fixture was generated at; its rows are stamped relative to it."""
+    with open(os.path.join(_fixture_dir(folder, rows), "fixture.json"), "r", encoding="utf-8") as f:
+        return float(json.load(f)["now"])
+
+
+def build_memory(folder: str, rows: int, seed: int = 11) -> MemoryStore:
+    """
+    A MemoryStore holding `rows` seeded outcomes spread over the three days
+    before fixture_now(). The file is generated once per size and reused
+    (the snapshot makes reopening cheap), so time-dependent queries must
+    pass now=fixture_now() to measure the same window on every run.
+    """
+    fixture = _fixture_dir(folder, rows)
+    path = os.path.join(fixture, "aiops_memory.jsonl")
+    meta = os.path.join(fixture, "fixture.json")
+    if not os.path.exists(meta):
+        shutil.rmtree(fixture, ignore_errors=True)  # older fixture without a recorded time
+        os.makedirs(fixture, exist_ok=True)
+        rng = random.Random(seed)
+        now = time.time()
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for i in range(rows):
+                f.write(json.dumps({
+                    "ts": now - 3 * 86400 * (1 - i / rows),
+                    "signature": rng.choice(SIGNATURES),
+                    "action": rng.choice(ACTIONS),
+                    "success": rng.random() < 0.7,
+                    "outcome": "",
+                    "metadata": {},
+                }) + "\n")
+        os.replace(tmp, path)
+        with open(meta, "w", encoding="utf-8") as f:
+            json.dump({"now": now, "rows": rows, "seed": seed}, f)
+    return MemoryStore(path=path, segment_max_bytes=1 << 40)
+
+
+def build_sqlite_memory(folder: str, rows: int) -> SQLiteMemoryStore:
+    """The build_memory() fixture imported into an SQLite store (also cached)."""
+    jsonl = build_memory(folder, rows).path
+    path = os.path.join(_fixture_dir(folder, rows), "aiops_memory.db")
+    if not os.path.exists(path):
+        tmp = path + ".tmp"
+        store = SQLiteMemoryStore(path=tmp)
+        store.import_rows(iter_rows([jsonl]))
+        store.compact()
+        store.close()
+        os.replace(tmp, path)
+    return SQLiteMemoryStore(path=path)
+
+
+def _store_cases(prefix: str, memory: MemoryStore, rows: int, now: float) -> List[Case]:
+    k = f"rows={rows}"
+    return [
+        Case(f"{prefix}.bias[{k}]", lambda m=memory: m.bias("cpu:pos", "scale", base=0.6),
+             inner=10, params={"rows": rows}),
+        Case(f"{prefix}.bias[{k},window=1h]",
+             lambda m=memory: m.bias("cpu:pos", "scale", base=0.6, window_s=3600.0, now=now),
+             inner=10, params={"rows": rows, "window_s": 3600.0}),
+        Case(f"{prefix}.bias[{k},decayed]", lambda m=memory: m.bias("cpu:pos", "scale", base=0.6, decayed=True, now=now),
+             inner=10, params={"rows": rows, "decayed": True}),
+        Case(f"{prefix}.success_rates[{k}]", lambda m=memory: m.success_rates("err:pos|lat_ms:pos"),
+             inner=10, params={"rows": rows}),
+    ]
+
+
+def memory_cases(folder: str, sizes: List[int]) -> List[Case]:
+    out = []
+    for rows in sizes:
+        memory = build_memory(folder, rows)
+        now = fixture_now(folder, rows)
+        out += _store_cases("memory", memory, rows, now)
+        out += _store_cases("memory_sqlite", build_sqlite_memory(folder, rows), rows, now)
+    return out
+
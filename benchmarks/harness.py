@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+@dataclass
+class Case:
+    """
+    One benchmark: `fn` performs one operation. `inner` operations are
+    timed together per sample for ops too fast to time one by one.
+    `teardown` runs after measuring (not timed).
+    """
+    name: str
+    fn: Callable[[], Any]
+    inner: int = 1
+    teardown: Optional[Callable[[], Any]] = None
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class Result:
+    name: str
+    ops: int
+    seconds: float
+    ops_per_sec: float
+    p50_us: float
+    p99_us: float
+    params: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "ops": self.ops,
+            "seconds": self.seconds,
+            "ops_per_sec": self.ops_per_sec,
+            "p50_us": self.p50_us,
+            "p99_us": self.p99_us,
+            "params": self.params,
+        }
+
+
+def _samples(fn: Callable[[], Any], inner: int, budget_s: float, max_samples: int, sink: io.StringIO) -> List[int]:
+    samples: List[int] = []
+    clock = time.perf_counter_ns
+    budget = int(budget_s * 1e9)
+    start = clock()
+    while len(samples) < max_samples:
+        t0 = clock()
+        for _ in range(inner):
+            fn()
+        t1 = clock()
+        samples.append(t1 - t0)
+        if t1 - start >= budget:
+            break
+        if sink.tell() > 1 << 20:  # chatty cases: don't grow the buffer forever
+            sink.seek(0)
+            sink.truncate()
+    return samples
+
+
+def measure(case: Case, min_time: float = 0.5, rounds: int = 3, max_samples: int = 200_000, warmup: int = 3) -> Result:
+    """
+    Time samples of case.inner ops for `rounds` rounds of min_time / rounds
+    each and keep the fastest round (the one least disturbed by other load);
+    stdout is swallowed.
+    """
+    fn, inner = case.fn, max(1, case.inner)
+    best: List[int] = []
+    with contextlib.redirect_stdout(io.StringIO()) as sink:
+        for _ in range(warmup):
+            fn()
+        for _ in range(max(1, rounds)):
+            gc.collect()
+            samples = _samples(fn, inner, min_time / max(1, rounds), max_samples, sink)
+            if not best or sum(samples) / len(samples) < sum(best) / len(best):
+                best = samples
+        if case.teardown is not None:
+            case.teardown()
+    return _result(case, best)
+
+
+def measure_pair(
+    a: Case, b: Case, min_time: float = 0.5, rounds: int = 20, max_samples: int = 200_000, warmup: int = 3
+) -> Tuple[Result, Result, float]:
+    """
+    measure() for a case `a` and its uninstrumented twin `b`, plus how much
+    slower a is than b as a fraction (0.01 = 1%). Short rounds of each
+    alternate so drift in machine load hits both alike; the overhead is
+    the median over rounds of the ratio of their mean op times, so
+    periodic work in a (a stats export every N ticks) counts while a
+    single disturbed round does not. Each Result keeps its fastest
+    round; min_time is per case.
+    """
+    best: Dict[str, List[int]] = {a.name: [], b.name: []}
+    ratios: List[float] = []
+    with contextlib.redirect_stdout(io.StringIO()) as sink:
+        for case in (a, b):
+            for _ in range(warmup):
+                case.fn()
+        for _ in range(max(1, rounds)):
+            means = []
+            for case in (a, b):
+                gc.collect()
+                samples = _samples(case.fn, max(1, case.inner), min_time / max(1, rounds), max_samples, sink)
+                means.append(sum(samples) / len(samples))
+                kept = best[case.name]
+                if not kept or sum(samples) / len(samples) < sum(kept) / len(kept):
+                    best[case.name] = samples
+            ratios.append(means[0] / means[1])
+        for case in (a, b):
+            if case.teardown is not None:
+                case.teardown()
+    return _result(a, best[a.name]), _result(b, best[b.name]), float(np.median(ratios)) - 1.0
+
+
+def _result(case: Case, best: List[int]) -> Result:
+    inner = max(1, case.inner)
+    per_op = np.asarray(best, dtype=np.float64) / inner / 1e3  # us
+    total_s = float(np.sum(best)) / 1e9
+    ops = len(best) * inner
+    return Result(
+        name=case.name,
+        ops=ops,
+        seconds=total_s,
+        ops_per_sec=ops / total_s if total_s > 0 else float("inf"),
+        p50_us=float(np.percentile(per_op, 50)),
+        p99_us=float(np.percentile(per_op, 99)),
+        params=case.params,
+    )
+
+
+def _calibration_op() -> int:
+    acc = 0
+    for i in range(1000):
+        acc += i * i % 7
+    return acc
+
+
+def calibrate(min_time: float = 0.5) -> float:
+    """ops/sec of a fixed pure-Python loop: how fast this machine is right now."""
+    return measure(Case("calibration", _calibration_op), min_time=min_time).ops_per_sec
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "ts": time.time(),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def save(path: str, results: List[Result], meta: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    doc = {"meta": meta, "results": {r.name: r.to_dict() for r in results}}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@dataclass
+class Change:
+    name: str
+    ratio: float        # current / baseline ops_per_sec, scaled by machine speed
+    p99_ratio: float    # current / baseline p99, scaled by machine speed
+    regressed: bool
+    missing: bool = False  # no baseline entry for this case (ratios are NaN)
+
+
+def compare(
+    results: List[Result],
+    baseline: Dict[str, Any],
+    tolerance: float = 0.4,
+    calibration: Optional[float] = None,
+) -> List[Change]:
+    """
+    One Change per result; cases the baseline lacks come back with
+    missing=True instead of being skipped. A case regresses when its
+    throughput drops by more than `tolerance`. When both runs recorded a calibration score,
+    ratios are divided by the machine speed ratio, so a uniformly slower
+    (or busier) machine does not read as a regression.
+    """
+    base = baseline.get("results", {})
+    base_cal = baseline.get("meta", {}).get("calibration_ops_per_sec")
+    speed = (calibration / base_cal) if calibration and base_cal else 1.0
+    out = []
+    for r in results:
+        b = base.get(r.name)
+        if not b or not b.get("ops_per_sec"):
+            out.append(Change(r.name, float("nan"), float("nan"), False, missing=True))
+            continue
+        ratio = r.ops_per_sec / b["ops_per_sec"] / speed
+        p99_ratio = r.p99_us / b["p99_us"] * speed if b.get("p99_us") else float("nan")
+        out.append(Change(r.name, ratio, p99_ratio, ratio < 1.0 - tolerance))
+    return out
+
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+from typing import Callable, Dict, List
+
+from benchmarks import bench_agents, bench_io, bench_memory
+from benchmarks.harness import Case, Result, calibrate, compare, environment, load, measure, measure_pair, save
+
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark the agent hot paths")
+    p.add_argument("--quick", action="store_true", help="Fewer sizes and shorter runs (smoke test)")
+    p.add_argument("--group", type=str, nargs="+", default=None, help="Only these groups (see --list)")
+    p.add_argument("--filter", type=str, default=None, help="Only cases whose name contains this")
+    p.add_argument("--list", action="store_true", help="List groups and exit")
+    p.add_argument("--min-time", type=float, default=None, help="Seconds to measure each case")
+    p.add_argument("--scratch", type=str, default=os.path.join(tempfile.gettempdir(), "aiops-bench"),
+                   help="Working folder; cached memory fixtures are kept here between runs")
+    p.add_argument("--out", type=str, default=None, help="Write results JSON here")
+    p.add_argument("--baseline", type=str, default=BASELINE, help="Baseline results to compare against")
+    p.add_argument("--save-baseline", action="store_true", help="Overwrite the baseline with this run")
+    p.add_argument("--tolerance", type=float, default=0.4,
+                   help="Fail when a case's ops/sec drops more than this fraction below the baseline. On shared "
+                        "or throttled machines single cases swing by 20%% or more between runs")
+    p.add_argument("--max-overhead", type=float, default=0.2,
+                   help="Fail when an instrumented case (e.g. the tick with stage timings) runs more than this "
+                        "fraction slower than its uninstrumented twin. The bench tick is ~50us of pure CPU, so "
+                        "the few us timings add per tick read as 5-10%%, give or take several percent of noise")
+    p.add_argument("--no-normalize", action="store_true",
+                   help="Compare raw numbers instead of scaling by the calibration loop's speed")
+    return p.parse_args()
+
+
+def groups(quick: bool, scratch: str) -> Dict[str, Callable[[], List[Case]]]:
+    windows = [30] if quick else [30, 120, 600]
+    sizes = [1_000, 100_000] if quick else [1_000, 100_000, 1_000_000]
+    fixtures = os.path.join(scratch, "fixtures")
+    return {
+        "monitor": lambda: bench_agents.monitor_cases(windows),
+        "rolling_window": lambda: bench_agents.rolling_window_cases(windows),
+        "median_window": lambda: bench_agents.median_window_cases(windows + [100_000]),
+        "reasoning": lambda: bench_agents.reasoning_cases(bench_memory.build_memory(fixtures, 1_000)),
+        "memory": lambda: bench_memory.memory_cases(fixtures, sizes),
+        "telemetry": lambda: bench_io.telemetry_cases(os.path.join(scratch, "telemetry")),
+        "tick": lambda: bench_io.tick_cases(),
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    scratch = os.path.abspath(args.scratch)
+    out = os.path.abspath(args.out) if args.out else None
+    baseline = os.path.abspath(args.baseline)
+    min_time = args.min_time if args.min_time is not None else (0.2 if args.quick else 1.0)
+
+    registry = groups(args.quick, scratch)
+    if args.list:
+        print("\n".join(registry))
+        return
+    selected = args.group or list(registry)
+    unknown = [g for g in selected if g not in registry]
+    if unknown:
+        raise SystemExit(f"unknown group(s): {unknown}; choose from {list(registry)}")
+
+    # fresh output folders; run_agent-style relative paths land in scratch
+    os.makedirs(scratch, exist_ok=True)
+    for name in ("telemetry", "logs", "memory"):
+        shutil.rmtree(os.path.join(scratch, name), ignore_errors=True)
+    os.chdir(scratch)
+
+    # machine speed drifts over a run; calibrate before every group and use the median
+    calibrations: List[float] = []
+    results: List[Result] = []
+    twins = {case: reference for case, reference in bench_io.OVERHEAD_PAIRS}
+    too_slow = []
+    for group in selected:
+        cases = [c for c in registry[group]() if not args.filter or args.filter in c.name]
+        if cases:
+            calibrations.append(calibrate(min_time=0.25))
+        by_name = {c.name: c for c in cases}
+        paired = {name for pair in twins.items() if all(n in by_name for n in pair) for name in pair}
+        for case in cases:
+            if case.name in paired:
+                if case.name not in twins:
+                    continue  # measured together with its instrumented twin
+                reference = twins[case.name]
+                *measured, frac = measure_pair(case, by_name[reference], min_time=min_time)
+                flag = "ok" if frac <= args.max_overhead else "TOO SLOW"
+                print(f"[OVERHEAD] {case.name} vs {reference}: {frac:+.1%} (max {args.max_overhead:.0%})  {flag}")
+                if frac > args.max_overhead:
+                    too_slow.append(case.name)
+            else:
+                measured = [measure(case, min_time=min_time)]
+            for r in measured:
+                results.append(r)
+                print(f"{r.name:48s} {r.ops_per_sec:14,.0f} ops/s  p50={r.p50_us:10.2f}us  p99={r.p99_us:10.2f}us")
+            sys.stdout.flush()
+
+    calibration = statistics.median(calibrations) if calibrations else calibrate()
+    print(f"{'calibration':48s} {calibration:14,.0f} ops/s  (median of {len(calibrations)})")
+    meta = {**environment(), "quick": args.quick, "min_time": min_time, "calibration_ops_per_sec": calibration}
+    if out:
+        save(out, results, meta)
+        print(f"[BENCH] results -> {out}")
+
+    if args.save_baseline:
+        save(baseline, results, meta)
+        print(f"[BENCH] baseline -> {baseline}")
+        return
+
+    if not os.path.exists(baseline):
+        print(f"[BENCH] no baseline at {baseline}; run with --save-baseline to create one")
+        if too_slow:
+            raise SystemExit(1)
+        return
+    changes = compare(results, load(baseline), tolerance=args.tolerance,
+                      calibration=None if args.no_normalize else calibration)
+    regressed = [c for c in changes if c.regressed]
+    missing = [c for c in changes if c.missing]
+    for c in changes:
+        if c.missing:
+            print(f"[BASELINE] {c.name:48s} not in baseline  MISSING")
+            continue
+        flag = "REGRESSED" if c.regressed else "ok"
+        print(f"[BASELINE] {c.name:48s} x{c.ratio:5.2f} ops/s  x{c.p99_ratio:5.2f} p99  {flag}")
+    print(f"[BASELINE] compared={len(changes) - len(missing)} regressed={len(regressed)} "
+          f"missing={len(missing)} tolerance={args.tolerance:.0%}")
+    if regressed or too_slow:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
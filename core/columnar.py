@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import glob
+import json
+import os
+import struct
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+MAGIC = b"AIOPSCOL"
+FORMAT_VERSION = 2
+# magic, format version, column count, row count, string table bytes
+HEADER = struct.Struct("<8sHHII")
+
+# fixed-width columns, in file order; version/scenario are ids into the segment's string table
+COLUMNS_V1: List[Tuple[str, str]] = [
+    ("ts", "<f8"),
+    ("cpu", "<f8"),
+    ("mem", "<f8"),
+    ("lat_ms", "<f8"),
+    ("err", "<f8"),
+    ("replicas", "<i4"),
+    ("version", "<u2"),
+    ("scenario", "<u2"),
+]
+# v2 adds fault_active: 0 / 1, FAULT_UNKNOWN when the record did not say
+COLUMNS: List[Tuple[str, str]] = COLUMNS_V1 + [("fault_active", "<u1")]
+COLUMNS_BY_VERSION = {1: COLUMNS_V1, 2: COLUMNS}
+STRING_COLUMNS = ("version", "scenario")
+FAULT_UNKNOWN = 255
+
+
+def _pad8(n: int) -> int:
+    return (n + 7) & ~7
+
+
+class ColumnarMetricsWriter:
+    """
+    Metrics sink writing fixed-width columnar segments instead of JSONL:
+      <folder>/metrics-000001.col, ...
+    Each segment is a header, a JSON string table (ids for version and
+    scenario; id 0 is None) and one contiguous little-endian array per
+    column, 8-byte aligned so readers can map them without copying.
+
+    Rows are buffered until segment_rows are collected or the oldest
+    buffered row is flush_interval_s old (checked as rows arrive);
+    flush()/close() seal a partial segment. At most flush_interval_s of
+    rows is lost on a crash.
+    """
+
+    def __init__(
+        self,
+        folder: str = "logs/metrics_col",
+        segment_rows: int = 65536,
+        flush_interval_s: Optional[float] = 60.0,
+    ):
+        self.folder = folder
+        self.segment_rows = max(1, int(segment_rows))
+        self.flush_interval_s = flush_interval_s  # None = seal on size / flush() only
+        os.makedirs(folder, exist_ok=True)
+        existing = sorted(glob.glob(os.path.join(folder, "metrics-*.col")))
+        self._seq = int(os.path.basename(existing[-1])[8:14]) if existing else 0
+        self._reset()
+
+    def _reset(self) -> None:
+        self._cols = {name: np.zeros(self.segment_rows, dtype=dt) for name, dt in COLUMNS}
+        self._strings: List[Optional[str]] = [None]
+        self._string_ids: Dict[Optional[str], int] = {None: 0}
+        self._rows = 0
+        self._first = 0.0  # monotonic time of the oldest buffered row
+
+    def _intern(self, value: Any) -> int:
+        key = None if value is None else str(value)
+        sid = self._string_ids.get(key)
+        if sid is None:
+            sid = self._string_ids[key] = len(self._strings)
+            self._strings.append(key)
+        return sid
+
+    def log_metric(self, record: Dict[str, Any]) -> None:
+        i = self._rows
+        if i == 0:
+            self._first = time.monotonic()
+        cols = self._cols
+        cols["ts"][i] = float(record.get("ts", time.time()))
+        cols["cpu"][i] = float(record["cpu"])
+        cols["mem"][i] = float(record["mem"])
+        cols["lat_ms"][i] = float(record["lat_ms"])
+        cols["err"][i] = float(record["err"])
+        cols["replicas"][i] = int(record.get("replicas", 0))
+        cols["version"][i] = self._intern(record.get("version"))
+        cols["scenario"][i] = self._intern(record.get("scenario"))
+        fault = record.get("fault_active")
+        cols["fault_active"][i] = FAULT_UNKNOWN if fault is None else int(bool(fault))
+        self._rows = i + 1
+        if self._rows >= self.segment_rows or (
+            self.flush_interval_s is not None and time.monotonic() - self._first >= self.flush_interval_s
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        if self._rows == 0:
+            return
+        self._seq += 1
+        path = os.path.join(self.folder, f"metrics-{self._seq:06d}.col")
+        strings = json.dumps(self._strings).encode("utf-8")
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(COLUMNS), self._rows, len(strings)))
+            f.write(strings)
+            f.write(b"\0" * (_pad8(HEADER.size + len(strings)) - HEADER.size - len(strings)))
+            for name, _ in COLUMNS:
+                data = self._cols[name][: self._rows].tobytes()
+                f.write(data)
+                f.write(b"\0" * (_pad8(len(data)) - len(data)))
+        os.replace(tmp, path)
+        self._reset()
+
+    def close(self) -> None:
+        self.flush()
+
+
+def read_segment(path: str, copy: bool = False) -> Tuple[Dict[str, np.ndarray], List[Optional[str]]]:
+    """
+    Map one segment. Columns are read-only views into the file (no copy);
+    columns an older format lacks are filled in. With copy=True the file
+    is read into memory instead, so no mapping (or descriptor) outlives
+    the call.
+    """
+    raw = np.fromfile(path, dtype=np.uint8) if copy else np.memmap(path, dtype=np.uint8, mode="r")
+    magic, version, ncols, rows, strings_len = HEADER.unpack(bytes(raw[: HEADER.size]))
+    layout = COLUMNS_BY_VERSION.get(version)
+    if magic != MAGIC or layout is None or ncols != len(layout):
+        raise ValueError(f"{path}: not a metrics segment (format {version})")
+    strings = json.loads(bytes(raw[HEADER.size: HEADER.size + strings_len]).decode("utf-8"))
+    offset = _pad8(HEADER.size + strings_len)
+    cols: Dict[str, np.ndarray] = {}
+    for name, dt in layout:
+        size = rows * np.dtype(dt).itemsize
+        cols[name] = raw[offset: offset + size].view(dt)
+        offset += _pad8(size)
+    if "fault_active" not in cols:
+        cols["fault_active"] = np.full(rows, FAULT_UNKNOWN, dtype=np.uint8)
+    return cols, strings
+
+
+def segment_paths(path: str) -> List[str]:
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "metrics-*.col")))
+    return [path]
+
+
+def is_columnar(path: str) -> bool:
+    return os.path.isdir(path) or path.endswith(".col")
+
+
+def iter_segments(path: str) -> Iterator[Tuple[Dict[str, np.ndarray], List[Optional[str]]]]:
+    """Segments one at a time; drop each before the next to keep one mapping open."""
+    for p in segment_paths(path):
+        yield read_segment(p)
+
+
+def load_columnar(path: str) -> Tuple[Dict[str, np.ndarray], List[Optional[str]]]:
+    """
+    All segments of a file or folder as one set of columns, with version /
+    scenario ids remapped into a shared string table. A single segment is
+    returned as-is (zero-copy); several are read into memory one at a time
+    and concatenated, so a folder of thousands of segments never holds
+    more than one file open.
+    """
+    paths = segment_paths(path)
+    if not paths:
+        return {name: np.zeros(0, dtype=dt) for name, dt in COLUMNS}, [None]
+    if len(paths) == 1:
+        return read_segment(paths[0])
+
+    strings: List[Optional[str]] = [None]
+    ids: Dict[Optional[str], int] = {None: 0}
+    out: Dict[str, List[np.ndarray]] = {name: [] for name, _ in COLUMNS}
+    for p in paths:
+        cols, seg_strings = read_segment(p, copy=True)
+        remap = np.zeros(len(seg_strings), dtype=np.uint16)
+        for i, s in enumerate(seg_strings):
+            if s not in ids:
+                ids[s] = len(strings)
+                strings.append(s)
+            remap[i] = ids[s]
+        for name, _ in COLUMNS:
+            col = cols[name]
+            out[name].append(remap[col] if name in STRING_COLUMNS else col)
+    return {name: np.concatenate(chunks) for name, chunks in out.items()}, strings
@@ -1,5 +1,6 @@
 from __future__ import annotations
 from dataclasses import dataclass
+from typing import Optional
 
 
 @dataclass
@@ -8,6 +9,10 @@ class MonitorConfig:
     z_threshold: float = 3.0
     score_threshold: float = 3.5
     min_abnormal_metrics: int = 1
+    detector: str = "zscore"     # zscore (mean/std) | mad (median/MAD, robust to spikes) | ewma (O(1) state)
+    mad_scale: float = 1.4826    # MAD -> std for the mad detector
+    ewma_half_life: float = 30.0 # ticks, for the ewma detector
+    ewma_trend: bool = False     # ewma detector also tracks a Holt-style trend
 
 
 @dataclass
@@ -23,12 +28,44 @@ class AnalystConfig:
 class PlannerConfig:
     auto_confidence_threshold: float = 0.75
     auto_risk_threshold: float = 0.35
+    memory_window_s: Optional[float] = None  # only learn from the last N seconds of outcomes
+    memory_decay: bool = False               # weight outcomes by MemoryStore.half_life_s instead
 
 
 @dataclass
 class ExecutorConfig:
-    cooldown_seconds: float = 10.0
-    rate_limit_per_minute: int = 6
+    cooldown_seconds: float = 10.0               # per (service, action)
+    rate_limit_per_minute: int = 6               # token bucket per (service, action); 0 = unlimited
+    rate_limit_burst: Optional[int] = None       # bucket size (default: one minute's worth)
+    global_rate_limit_per_minute: Optional[int] = 60  # budget across all targets; None = unlimited
+    max_rate_limit_targets: int = 100_000        # (service, action) entries kept before LRU eviction
+    workers: int = 4                 # actions running at once
+    action_timeout_s: float = 300.0  # cancel an action still running after this long
+    backend: str = "local"           # local (apply immediately) | simulated (slow / flaky stand-in)
+    sim_latency_s: float = 2.0       # simulated backend: mean action duration
+    sim_failure_rate: float = 0.1    # simulated backend: fraction of actions that fail
+
+
+@dataclass
+class IncidentConfig:
+    quiet_ticks: int = 5       # consecutive normal ticks before an incident is resolved
+    reanalyze_ticks: int = 30  # re-run analyze/plan if still anomalous this long after a decision; 0 = never
+
+
+@dataclass
+class MemoryConfig:
+    backend: str = "jsonl"         # jsonl (append-only log + snapshot) | sqlite (WAL; shareable across processes)
+    path: Optional[str] = None     # default: memory/aiops_memory.jsonl or memory/aiops_memory.db
+    batch_size: int = 64           # sqlite: rows per group commit
+    flush_interval_s: float = 1.0  # sqlite: ...or within this long of the first pending row (at once when idle)
+
+
+@dataclass
+class LoggingConfig:
+    max_queue: int = 10000          # queued lines before backpressure kicks in
+    batch_size: int = 256           # write as soon as this many lines are queued
+    flush_interval_s: float = 1.0   # ...or after this long
+    policy: str = "block"           # block | drop_oldest
 
 
 @dataclass
@@ -0,0 +1,53 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+def config_key(cfg: Any) -> Tuple[Any, ...]:
+    """Hashable snapshot of a config dataclass's fields (configs are mutable)."""
+    return tuple(vars(cfg).values())
+
+
+class DecisionCache:
+    """
+    Bounded LRU for analysis rankings and planned actions. Keys carry the
+    signature, the per-action MemoryStore.versions(signature) they depend
+    on and the config, so a new outcome for a (signature, action) (or a
+    config change) makes the entries built on it unreachable; they age out
+    of the LRU instead of being deleted.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        value = self._entries.get(key)
+        if value is None:
+            self.counters["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.counters["hits"] += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "entries": len(self._entries),
+            "hit_rate": self.counters["hits"] / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,65 @@
+from __future__ import annotations
+from typing import Dict, List, Tuple
+import math
+
+
+class _Level:
+    __slots__ = ("n", "level", "trend", "var", "center", "scale")
+
+    def __init__(self) -> None:
+        self.n = 0
+        self.level = 0.0
+        self.trend = 0.0
+        self.var = 0.0
+        self.center = 0.0  # forecast / spread the latest value was scored against
+        self.scale = 0.0
+
+
+class EwmaState:
+    """
+    Constant-memory alternative to a rolling window: per metric only an
+    exponentially weighted level, residual variance and (optionally, Holt
+    style) trend are kept. `half_life` is in updates.
+
+    Each update first forecasts the new value from the previous state and
+    remembers that forecast and spread; align() scores against them, so
+    the point being scored does not pull its own baseline.
+    """
+
+    def __init__(self, half_life: float = 30.0, trend: bool = False):
+        self.alpha = 1.0 - 0.5 ** (1.0 / max(1e-9, float(half_life)))
+        self.use_trend = bool(trend)
+        self._state: Dict[str, _Level] = {}
+
+    def add(self, metrics: Dict[str, float]) -> None:
+        a = self.alpha
+        for k, v in metrics.items():
+            st = self._state.get(k)
+            if st is None:
+                st = self._state[k] = _Level()
+            x = float(v)
+            if st.n == 0:
+                st.level = x
+                st.center, st.scale = x, 0.0
+            else:
+                forecast = st.level + st.trend
+                resid = x - forecast
+                st.center, st.scale = forecast, math.sqrt(st.var)
+                level = forecast + a * resid
+                if self.use_trend:
+                    st.trend += a * (level - st.level - st.trend)
+                st.var = (1.0 - a) * (st.var + a * resid * resid)
+                st.level = level
+            st.n += 1
+
+    def count(self) -> int:
+        if not self._state:
+            return 0
+        return min(st.n for st in self._state.values())
+
+    def align(self, current: Dict[str, float]) -> Tuple[List[str], List[float], List[float], List[float]]:
+        """(keys, x, forecast, residual std) for the keys of `current` that have been seen."""
+        keys = [k for k in current if k in self._state]
+        states = [self._state[k] for k in keys]
+        x = [float(current[k]) for k in keys]
+        return keys, x, [st.center for st in states], [st.scale for st in states]
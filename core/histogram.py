@@ -0,0 +1,261 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import json
+import math
+import time
+
+import numpy as np
+
+
+class Histogram:
+    """
+    Fixed-precision log-linear histogram of non-negative integers
+    (HDR-style). Values below 2**(bits+1) get a bucket each; above that,
+    every power-of-two range is split into 2**bits buckets. With the
+    default bits=7 a bucket is never wider than ~0.8% of its values, and
+    a full range of ns durations (up to hours) needs a few thousand
+    counters. Histograms with the same `bits` merge by adding counts, so
+    per-process or per-interval histograms combine exactly.
+
+    Counts are kept sparse ({bucket: count}): a stats interval touches a
+    few dozen buckets, and summarising or exporting those in plain Python
+    is much cheaper than scanning a dense array. record() only appends to
+    a pending list (tens of ns); pending values are bucketed every
+    FOLD_EVERY records and before any read, with numpy for large batches.
+    """
+
+    FOLD_EVERY = 4096
+    SMALL_FOLD = 256
+
+    def __init__(self, bits: int = 7):
+        self.bits = int(bits)
+        self._p1 = self.bits + 1
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.sum = 0
+        self.min: Optional[int] = None
+        self.max = 0
+        self._pending: List[int] = []
+
+    def bucket_range(self, idx: int) -> Tuple[int, int]:
+        """(lowest, highest) value that lands in bucket `idx`."""
+        if idx < (1 << self._p1):
+            return idx, idx
+        shift = (idx >> self.bits) - 1
+        mantissa = idx - (shift << self.bits)
+        return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+    def record(self, v: int) -> None:
+        pending = self._pending
+        pending.append(v)
+        if len(pending) >= self.FOLD_EVERY:
+            self._fold()
+
+    def record_many(self, values: Any) -> None:
+        v = np.maximum(np.asarray(values, dtype=np.int64).ravel(), 0)
+        if not v.size:
+            return
+        # bit_length via the float exponent (exact below 2**53)
+        shift = np.frexp(v.astype(np.float64))[1].astype(np.int64) - self._p1
+        idx = np.where(shift <= 0, v, (np.maximum(shift, 0) << self.bits) + (v >> np.maximum(shift, 0)))
+        buckets, n = np.unique(idx, return_counts=True)
+        self._add(zip(buckets.tolist(), n.tolist()))
+        self.total += int(v.size)
+        self.sum += int(v.sum())
+        self.max = max(self.max, int(v.max()))
+        lo = int(v.min())
+        self.min = lo if self.min is None else min(self.min, lo)
+
+    def _add(self, pairs: Iterable[Tuple[int, int]]) -> None:
+        counts = self.counts
+        for idx, n in pairs:
+            counts[idx] = counts.get(idx, 0) + n
+
+    def _fold(self) -> None:
+        # emptied in place: StageTimings holds on to the bound append
+        if not self._pending:
+            return
+        pending = [v if v > 0 else 0 for v in self._pending]
+        self._pending.clear()
+        if len(pending) >= self.SMALL_FOLD:
+            self.record_many(pending)
+            return
+        p1, bits = self._p1, self.bits
+        counts = self.counts
+        for v in pending:
+            shift = v.bit_length() - p1
+            idx = v if shift <= 0 else (shift << bits) + (v >> shift)
+            counts[idx] = counts.get(idx, 0) + 1
+        self.total += len(pending)
+        self.sum += sum(pending)
+        self.max = max(self.max, max(pending))
+        lo = min(pending)
+        self.min = lo if self.min is None else min(self.min, lo)
+
+    def merge(self, other: "Histogram") -> "Histogram":
+        if other.bits != self.bits:
+            raise ValueError("cannot merge histograms with different precision")
+        self._fold()
+        other._fold()
+        self._add(other.counts.items())
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        return self
+
+    @property
+    def count(self) -> int:
+        return self.total + len(self._pending)
+
+    def percentile(self, q: float) -> int:
+        """Highest value equivalent to the q-th percentile (0..100), clamped to max."""
+        return self.percentiles((q,))[0]
+
+    def percentiles(self, qs: Iterable[float]) -> List[int]:
+        self._fold()
+        qs = list(qs)
+        if self.total == 0:
+            return [0] * len(qs)
+        want = sorted((max(1, math.ceil(q / 100.0 * self.total)), i) for i, q in enumerate(qs))
+        out = [0] * len(qs)
+        k, cum = 0, 0
+        for idx in sorted(self.counts):
+            cum += self.counts[idx]
+            while k < len(want) and want[k][0] <= cum:
+                out[want[k][1]] = min(self.bucket_range(idx)[1], self.max)
+                k += 1
+            if k == len(want):
+                break
+        return out
+
+    def mean(self) -> float:
+        self._fold()
+        return self.sum / self.total if self.total else 0.0
+
+    def reset(self) -> None:
+        self.counts = {}
+        self.total = 0
+        self.sum = 0
+        self.min = None
+        self.max = 0
+        self._pending.clear()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Sparse, JSON-friendly form; from_dict() inverts it."""
+        self._fold()
+        return {
+            "bits": self.bits,
+            "total": self.total,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            "counts": [[idx, self.counts[idx]] for idx in sorted(self.counts) if self.counts[idx]],
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Histogram":
+        h = cls(bits=int(d.get("bits", 7)))
+        pairs = [(int(idx), int(n)) for idx, n in d.get("counts", [])]
+        h._add(pairs)
+        h.total = int(d.get("total", sum(n for _, n in pairs)))
+        h.sum = int(d.get("sum", 0))
+        h.min = d.get("min")
+        h.max = int(d.get("max", 0))
+        return h
+
+
+class StageTimings:
+    """
+    Named ns histograms for the stages of a loop. Callers take
+    time.perf_counter_ns() stamps themselves and call record(stage, ns);
+    chaining stamps (the end of one stage is the start of the next) keeps
+    the cost to one clock read and one list append per stage. record()
+    appends straight to the stage histogram's pending list through a
+    cached bound method and folds every stage once FOLD_EVERY values have
+    piled up in total.
+    """
+
+    FOLD_EVERY = Histogram.FOLD_EVERY
+
+    def __init__(self, bits: int = 7):
+        self.bits = bits
+        self.stages: Dict[str, Histogram] = {}
+        self.since = time.time()
+        self._appends: Dict[str, Callable[[int], None]] = {}
+        self._unfolded = 0
+
+    def record(self, stage: str, ns: int) -> None:
+        try:
+            self._appends[stage](ns)
+        except KeyError:
+            self._histogram(stage).record(ns)
+        self._unfolded += 1
+        if self._unfolded >= self.FOLD_EVERY:
+            self._fold()
+
+    def _histogram(self, stage: str) -> Histogram:
+        h = self.stages.get(stage)
+        if h is None:
+            h = self.stages[stage] = Histogram(self.bits)
+            self._appends[stage] = h._pending.append
+        return h
+
+    def _fold(self) -> None:
+        self._unfolded = 0
+        for h in self.stages.values():
+            h._fold()
+
+    def merge(self, other: "StageTimings") -> "StageTimings":
+        for stage, h in other.stages.items():
+            mine = self.stages.get(stage)
+            if mine is None:
+                mine = self.stages[stage] = Histogram(h.bits)
+                self._appends[stage] = mine._pending.append
+            mine.merge(h)
+        self.since = min(self.since, other.since)
+        return self
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """count, p50/p90/p99/max/mean in microseconds per stage."""
+        out = {}
+        for stage, h in self.stages.items():
+            p50, p90, p99 = h.percentiles((50, 90, 99))
+            out[stage] = {
+                "count": h.count,
+                "p50_us": p50 / 1e3,
+                "p90_us": p90 / 1e3,
+                "p99_us": p99 / 1e3,
+                "max_us": h.max / 1e3,
+                "mean_us": h.mean() / 1e3,
+            }
+        return out
+
+    def export(self, reset: bool = True) -> Dict[str, Any]:
+        """A telemetry stats record: summaries plus the mergeable histograms."""
+        record = {
+            "kind": "stage_latency",
+            "since": self.since,
+            "stages": self.summary(),
+            "histograms": {stage: h.to_dict() for stage, h in self.stages.items()},
+        }
+        if reset:
+            for h in self.stages.values():
+                h.reset()
+            self.since = time.time()
+        return record
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "StageTimings":
+        hists = record.get("histograms", {})
+        t = cls(bits=next((int(d.get("bits", 7)) for d in hists.values()), 7))
+        for stage, d in hists.items():
+            h = t.stages[stage] = Histogram.from_dict(d)
+            t._appends[stage] = h._pending.append
+        t.since = float(record.get("since", t.since))
+        return t
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.export(reset=False), f)
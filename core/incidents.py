@@ -0,0 +1,150 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, List, Optional, Tuple
+import uuid
+
+
+OPEN = "open"
+ONGOING = "ongoing"
+MITIGATING = "mitigating"
+RESOLVED = "resolved"
+
+# update() transitions; the first three mean "run analyze/plan/act"
+OPENED = "opened"
+NEW_SIGNATURE = "new_signature"
+REANALYZE = "reanalyze"
+COALESCED = "coalesced"
+QUIET = "quiet"
+CLOSED = "resolved"
+NEEDS_DECISION = (OPENED, NEW_SIGNATURE, REANALYZE)
+
+
+@dataclass
+class TrackedIncident:
+    incident_id: str
+    signature: str             # latest signature
+    state: str
+    opened_tick: int
+    last_tick: int             # last anomalous tick
+    anomalous_ticks: int = 1
+    quiet_ticks: int = 0       # consecutive normal ticks since last_tick
+    decided_tick: int = 0      # tick of the last analyze/plan run (0 = none yet)
+    requested_tick: int = 0    # tick of the last decision update() asked for
+    decisions: int = 0
+    signatures: List[str] = field(default_factory=list)  # every signature sent for analysis, in order
+    actions: List[str] = field(default_factory=list)     # actions executed (not blocked / noop)
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "incident_id": self.incident_id,
+            "state": self.state,
+            "opened_tick": self.opened_tick,
+            "last_tick": self.last_tick,
+            "anomalous_ticks": self.anomalous_ticks,
+            "decisions": self.decisions,
+            "signatures": list(self.signatures),
+            "actions": list(self.actions),
+        }
+
+
+class IncidentTracker:
+    """
+    Coalesces anomalous ticks into incidents, one active incident per key
+    (e.g. service):
+
+        open -> ongoing -> mitigating -> resolved
+
+    The first anomalous tick opens an incident; further anomalous ticks
+    join it as ongoing. An executed action moves it to mitigating. It is
+    resolved after `quiet_ticks` consecutive normal ticks. update() says
+    when a decision is due: on open, when a signature not yet analysed
+    for this incident shows up, and (if reanalyze_ticks > 0) when the
+    incident is still anomalous that many ticks after the last decision.
+    Whoever runs the decision calls mark_decided(); if the request is
+    dropped instead (e.g. a full queue), dropped() forgets its signature
+    so the next anomalous tick asks again.
+    """
+
+    def __init__(self, quiet_ticks: int = 5, reanalyze_ticks: int = 0):
+        self.quiet_ticks = max(1, int(quiet_ticks))
+        self.reanalyze_ticks = max(0, int(reanalyze_ticks))
+        self.active: Dict[Hashable, TrackedIncident] = {}
+        self.counters = {OPENED: 0, NEW_SIGNATURE: 0, REANALYZE: 0, COALESCED: 0, CLOSED: 0}
+
+    def get(self, key: Hashable = "default") -> Optional[TrackedIncident]:
+        return self.active.get(key)
+
+    def update(
+        self,
+        tick: int,
+        signature: Optional[str],
+        key: Hashable = "default",
+    ) -> Tuple[Optional[TrackedIncident], str]:
+        """
+        Feed one tick: `signature` is the anomaly signature, or None for a
+        normal tick. Returns (incident, transition); incident is None only
+        for normal ticks with no active incident (transition "").
+        """
+        inc = self.active.get(key)
+
+        if signature is None:
+            if inc is None:
+                return None, ""
+            inc.quiet_ticks += 1
+            if inc.quiet_ticks < self.quiet_ticks:
+                return inc, QUIET
+            inc.state = RESOLVED
+            del self.active[key]
+            self.counters[CLOSED] += 1
+            return inc, CLOSED
+
+        if inc is None:
+            inc = TrackedIncident(
+                incident_id=str(uuid.uuid4())[:8],
+                signature=signature,
+                state=OPEN,
+                opened_tick=tick,
+                last_tick=tick,
+                requested_tick=tick,
+                signatures=[signature],
+            )
+            self.active[key] = inc
+            self.counters[OPENED] += 1
+            return inc, OPENED
+
+        inc.signature = signature
+        inc.last_tick = tick
+        inc.anomalous_ticks += 1
+        inc.quiet_ticks = 0
+        if inc.state == OPEN:
+            inc.state = ONGOING
+
+        if signature not in inc.signatures:
+            inc.signatures.append(signature)
+            transition = NEW_SIGNATURE
+        elif self.reanalyze_ticks and tick - inc.requested_tick >= self.reanalyze_ticks:
+            transition = REANALYZE
+        else:
+            self.counters[COALESCED] += 1
+            return inc, COALESCED
+
+        inc.requested_tick = tick
+        self.counters[transition] += 1
+        return inc, transition
+
+    def mark_decided(self, inc: TrackedIncident, tick: int) -> None:
+        """Record that analyze/plan ran for `inc` on behalf of tick `tick`."""
+        inc.decided_tick = max(inc.decided_tick, tick)
+        inc.decisions += 1
+
+    def dropped(self, inc: TrackedIncident, signature: str) -> None:
+        """A decision update() asked for was never run; ask again on the next anomalous tick."""
+        if signature in inc.signatures:
+            inc.signatures.remove(signature)
+        inc.requested_tick = inc.decided_tick
+
+    def mitigating(self, inc: TrackedIncident, action: str) -> None:
+        """Record an executed action; the incident waits for the metrics to recover."""
+        inc.actions.append(action)
+        if inc.state != RESOLVED:
+            inc.state = MITIGATING
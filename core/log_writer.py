@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import atexit
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, IO, Tuple
+
+from core.config import LoggingConfig
+
+
+class AsyncLogWriter:
+    """
+    Shared buffered JSONL writer for TelemetryLogger / ActionLogger.
+    write() only queues the line; a background thread keeps one open handle
+    per path and writes queued lines in batches, flushing when batch_size
+    lines are pending, every flush_interval_s, on flush() and on close().
+
+    When the queue is full, policy "block" makes write() wait for room and
+    "drop_oldest" discards the oldest queued line; both are counted.
+
+    A failed write (ENOSPC, EACCES, a path that is a directory, ...) drops
+    the lines for that path, is counted under "failed"/"errors" and leaves
+    the writer running. If the thread has died anyway, write() drops the
+    line instead of waiting on a queue nobody drains.
+
+    Before each batch the writer stats every path it writes to and reopens
+    it when the inode changed or the file is gone, so rename-based log
+    rotation gets new lines in the new file instead of the renamed one.
+    """
+
+    def __init__(self, cfg: LoggingConfig):
+        if cfg.policy not in ("block", "drop_oldest"):
+            raise ValueError(f"unknown backpressure policy: {cfg.policy}")
+        self.cfg = cfg
+        self._queue: Deque[Tuple[str, str]] = deque()
+        self._cond = threading.Condition()
+        self._handles: Dict[str, IO[str]] = {}
+        self._inodes: Dict[str, int] = {}
+        self._closing = False
+        self._flush_requested = 0
+        self._flush_done = 0
+        self.counters: Dict[str, int] = {
+            "written": 0,
+            "dropped": 0,
+            "blocked": 0,
+            "batches": 0,
+            "max_depth": 0,
+            "failed": 0,
+            "errors": 0,
+        }
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, path: str, line: str) -> None:
+        with self._cond:
+            if self._closing:
+                raise RuntimeError("log writer is closed")
+            if not self._thread.is_alive():
+                self.counters["failed"] += 1
+                return
+            if len(self._queue) >= self.cfg.max_queue:
+                if self.cfg.policy == "drop_oldest":
+                    self._queue.popleft()
+                    self.counters["dropped"] += 1
+                else:
+                    self.counters["blocked"] += 1
+                    self._cond.notify_all()
+                    while (
+                        len(self._queue) >= self.cfg.max_queue
+                        and not self._closing
+                        and self._thread.is_alive()
+                    ):
+                        self._cond.wait(timeout=0.5)
+                    if not self._thread.is_alive():
+                        self.counters["failed"] += 1
+                        return
+            self._queue.append((path, line))
+            depth = len(self._queue)
+            if depth > self.counters["max_depth"]:
+                self.counters["max_depth"] = depth
+            if depth >= self.cfg.batch_size:
+                self._cond.notify_all()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything queued so far is on disk (or timeout). Returns True if it is."""
+        with self._cond:
+            self._flush_requested += 1
+            target = self._flush_requested
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._flush_done >= target, timeout=timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        with self._cond:
+            if self._closing:
+                return
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join(timeout=timeout)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {**self.counters, "depth": len(self._queue)}
+
+    def _run(self) -> None:
+        interval = max(0.001, float(self.cfg.flush_interval_s))
+        deadline = time.monotonic() + interval
+        while True:
+            with self._cond:
+                while (
+                    len(self._queue) < self.cfg.batch_size
+                    and not self._closing
+                    and self._flush_requested == self._flush_done
+                ):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(timeout=remaining)
+                batch = list(self._queue)
+                self._queue.clear()
+                flush_target = self._flush_requested
+                closing = self._closing
+                self._cond.notify_all()  # room for blocked writers
+
+            failed = self._write_batch(batch) if batch else 0
+            errors = self._flush_handles()
+            deadline = time.monotonic() + interval
+
+            with self._cond:
+                self.counters["written"] += len(batch) - failed
+                self.counters["failed"] += failed
+                self.counters["errors"] += errors + (1 if failed else 0)
+                self.counters["batches"] += 1 if batch else 0
+                self._flush_done = flush_target
+                self._cond.notify_all()
+                if closing and not self._queue:
+                    break
+
+        for f in self._handles.values():
+            try:
+                f.close()
+            except OSError:
+                pass
+        self._handles.clear()
+        self._inodes.clear()
+
+    def _flush_handles(self) -> int:
+        errors = 0
+        for path, f in list(self._handles.items()):
+            try:
+                f.flush()
+            except OSError:
+                errors += 1
+                self._discard_handle(path)
+        return errors
+
+    def _rotated(self, path: str) -> bool:
+        try:
+            return os.stat(path).st_ino != self._inodes.get(path)
+        except OSError:
+            return True
+
+    def _discard_handle(self, path: str) -> None:
+        self._inodes.pop(path, None)
+        f = self._handles.pop(path, None)
+        if f is not None:
+            try:
+                f.close()
+            except OSError:
+                pass
+
+    def _write_batch(self, batch) -> int:
+        """Write one batch; returns the number of lines lost to write errors."""
+        failed = 0
+        by_path: Dict[str, list] = {}
+        for path, line in batch:
+            by_path.setdefault(path, []).append(line)
+        for path, lines in by_path.items():
+            try:
+                f = self._handles.get(path)
+                if f is not None and self._rotated(path):
+                    self._discard_handle(path)
+                    f = None
+                if f is None:
+                    folder = os.path.dirname(path)
+                    if folder:
+                        os.makedirs(folder, exist_ok=True)
+                    f = self._handles[path] = open(path, "a", encoding="utf-8")
+                    self._inodes[path] = os.fstat(f.fileno()).st_ino
+                f.write("\n".join(lines) + "\n")
+            except OSError:
+                # drop this path's lines; a fresh handle is opened next time
+                failed += len(lines)
+                self._discard_handle(path)
+        return failed
@@ -5,6 +5,8 @@ import os
 import time
 from typing import Any, Dict, Optional
 
+from core.log_writer import AsyncLogWriter
+
 
 class ActionLogger:
     """
@@ -13,8 +15,9 @@ class ActionLogger:
       {"ts": ..., "event": "execute", "payload": {...}}
     """
 
-    def __init__(self, path: str = "logs/actions.jsonl"):
+    def __init__(self, path: str = "logs/actions.jsonl", writer: Optional[AsyncLogWriter] = None):
         self.path = path
+        self.writer = writer  # None = open/append/close per record
         os.makedirs(os.path.dirname(path), exist_ok=True)
 
     def log(self, event: str, payload: Optional[Dict[str, Any]] = None) -> None:
@@ -23,5 +26,9 @@ class ActionLogger:
             "event": event,
             "payload": payload or {},
         }
+        line = json.dumps(row)
+        if self.writer is not None:
+            self.writer.write(self.path, line)
+            return
         with open(self.path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(row) + "\n")
\ No newline at end of file
+            f.write(line + "\n")
\ No newline at end of file
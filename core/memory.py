@@ -1,19 +1,184 @@
 from __future__ import annotations
-import json, os, time
+import base64, json, os, re, struct, time, zlib
+from bisect import bisect_left, bisect_right
 from typing import Any, Dict, List, Tuple, Optional
 
+from core.config import MemoryConfig
+
+
+SNAPSHOT_FORMAT = 3
+LATE_MERGE = 256  # out-of-order events held aside before they are merged into the main index
+
+
+def _pack(data: bytes) -> str:
+    return base64.b64encode(zlib.compress(data)).decode("ascii")
+
+
+def _unpack(text: str) -> bytes:
+    return zlib.decompress(base64.b64decode(text))
+
+
+class _ActionStats:
+    """
+    Outcome counters for one (signature, action):
+    all-time counts, a sorted ts index over the recent horizon
+    (bisect for "last N seconds"), and exponentially decayed counts.
+
+    Out-of-order events (another process, clock skew) go to a small sorted
+    side index instead of shifting the main prefix sums; it is merged in
+    once it reaches LATE_MERGE events and on prune().
+    """
+
+    __slots__ = ("succ", "total", "ts", "cum", "late_ts", "late_s", "d_succ", "d_total", "d_ts", "version")
+
+    def __init__(self) -> None:
+        self.succ = 0
+        self.total = 0
+        self.ts: List[float] = []   # sorted event times
+        self.cum: List[int] = [0]   # cum[i] = successes in ts[:i]
+        self.late_ts: List[float] = []  # out-of-order events, sorted
+        self.late_s: List[int] = []
+        self.d_succ = 0.0           # decayed counts as of d_ts
+        self.d_total = 0.0
+        self.d_ts = 0.0
+        self.version = 0            # MemoryStore clock at the last change
+
+    def add(self, ts: float, success: bool, half_life_s: float) -> None:
+        s = 1 if success else 0
+        self.succ += s
+        self.total += 1
+
+        if not self.ts or ts >= self.ts[-1]:
+            self.ts.append(ts)
+            self.cum.append(self.cum[-1] + s)
+        else:
+            i = bisect_right(self.late_ts, ts)
+            self.late_ts.insert(i, ts)
+            self.late_s.insert(i, s)
+            if len(self.late_ts) >= LATE_MERGE:
+                self._merge_late()
+
+        if ts >= self.d_ts:
+            k = 0.5 ** ((ts - self.d_ts) / half_life_s)
+            self.d_succ = self.d_succ * k + s
+            self.d_total = self.d_total * k + 1.0
+            self.d_ts = ts
+        else:
+            k = 0.5 ** ((self.d_ts - ts) / half_life_s)
+            self.d_succ += s * k
+            self.d_total += k
+
+    def _merge_late(self) -> None:
+        """Fold the side index into ts / cum (one O(n) pass)."""
+        if not self.late_ts:
+            return
+        main = [(t, self.cum[i + 1] - self.cum[i]) for i, t in enumerate(self.ts)]
+        merged = sorted(main + list(zip(self.late_ts, self.late_s)), key=lambda e: e[0])
+        self.ts = [t for t, _ in merged]
+        cum = [0]
+        for _, s in merged:
+            cum.append(cum[-1] + s)
+        self.cum = cum
+        self.late_ts, self.late_s = [], []
+
+    def since(self, t0: float) -> Tuple[int, int]:
+        i = bisect_left(self.ts, t0)
+        succ, total = self.cum[-1] - self.cum[i], len(self.ts) - i
+        if self.late_ts:
+            j = bisect_left(self.late_ts, t0)
+            succ += sum(self.late_s[j:])
+            total += len(self.late_ts) - j
+        return succ, total
+
+    def decayed(self, now: float, half_life_s: float) -> Tuple[float, float]:
+        k = 0.5 ** (max(0.0, now - self.d_ts) / half_life_s)
+        return self.d_succ * k, self.d_total * k
+
+    def prune(self, t0: float) -> None:
+        self._merge_late()
+        i = bisect_left(self.ts, t0)
+        if i:
+            base = self.cum[i]
+            del self.ts[:i]
+            self.cum = [c - base for c in self.cum[i:]]
+
+    def encode(self) -> Tuple[str, str]:
+        """(ts, successes) for the snapshot: packed float64 times and one byte per outcome, compressed."""
+        self._merge_late()
+        n = len(self.ts)
+        cum = self.cum
+        ts = _pack(struct.pack(f"<{n}d", *self.ts))
+        succ = _pack(bytes(cum[i + 1] - cum[i] for i in range(n)))
+        return ts, succ
+
+    def decode(self, ts: str, succ: str) -> None:
+        raw = _unpack(ts)
+        self.ts = list(struct.unpack(f"<{len(raw) // 8}d", raw))
+        cum = [0]
+        for s in _unpack(succ):
+            cum.append(cum[-1] + s)
+        self.cum = cum
+
 
 class MemoryStore:
     """
     JSONL memory:
     each line: {ts, signature, action, success, outcome, metadata}
     used to bias future decisions (reinforcement-ish)
+
+    Success/total counts per (signature, action) are kept in memory.
+    On disk the log is split into sealed segments plus the active file:
+      memory/aiops_memory.000001.jsonl, ...   (sealed, never written again)
+      memory/aiops_memory.jsonl               (active, appended to)
+      memory/aiops_memory.snapshot.json       (counts + how far they cover)
+    Startup loads the snapshot and replays only what was written after it.
+    After that only bytes appended since the last read (by us or by
+    another process) are parsed.
+
+    Besides all-time counts, each pair keeps a ts index over the last
+    recent_horizon_s seconds (windowed queries are clamped to it) and
+    counts decayed with half-life half_life_s.
+
+    versions(signature) gives, per action, a number that changes whenever
+    an outcome for that pair is folded in (ours or another process's), for
+    caches keyed on the memory state.
+
+    Rolling the active file into a segment assumes a single writer process;
+    other processes reading the same memory follow rolls.
     """
 
-    def __init__(self, path: str = "memory/aiops_memory.jsonl"):
+    def __init__(
+        self,
+        path: str = "memory/aiops_memory.jsonl",
+        segment_max_bytes: int = 64 * 1024 * 1024,
+        snapshot_every: int = 1000,
+        recent_horizon_s: float = 7 * 24 * 3600.0,
+        half_life_s: float = 6 * 3600.0,
+    ):
         self.path = path
+        self.segment_max_bytes = int(segment_max_bytes)
+        self.snapshot_every = int(snapshot_every)
+        self.recent_horizon_s = float(recent_horizon_s)
+        self.half_life_s = float(half_life_s)
         os.makedirs(os.path.dirname(path), exist_ok=True)
 
+        base, ext = os.path.splitext(path)
+        self._segment_fmt = base + ".{:06d}" + ext
+        self._segment_re = re.compile(re.escape(os.path.basename(base)) + r"\.(\d{6})" + re.escape(ext) + "$")
+        self.snapshot_path = base + ".snapshot.json"
+
+        self._stats: Dict[str, Dict[str, _ActionStats]] = {}
+        self._sealed = 0         # highest sealed segment folded into _stats
+        self._offset = 0         # bytes of the active file folded into _stats
+        self._ino: Optional[int] = None  # inode of the active file at last read
+        self._since_snapshot = 0
+        self._clock = 0          # bumped per folded row; never reset, so versions never repeat
+
+        loaded = self._load_snapshot()
+        self._catch_up()
+        if not loaded:
+            self._write_snapshot()
+
     def append(
         self,
         signature: str,
@@ -30,41 +195,285 @@ class MemoryStore:
             "outcome": outcome,
             "metadata": metadata or {},
         }
-        with open(self.path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(row) + "\n")
-
-    def _load(self, limit: int = 5000) -> List[Dict[str, Any]]:
-        if not os.path.exists(self.path):
-            return []
-        rows: List[Dict[str, Any]] = []
-        with open(self.path, "r", encoding="utf-8") as f:
-            for i, line in enumerate(f):
-                if i >= limit:
-                    break
-                line = line.strip()
+        data = (json.dumps(row) + "\n").encode("utf-8")
+        with open(self.path, "ab") as f:
+            start = f.tell()
+            f.write(data)
+            ino = os.fstat(f.fileno()).st_ino
+        if start == self._offset and ino == self._ino:
+            self._apply(row)
+            self._offset = start + len(data)
+        else:
+            # someone else appended (or rolled) since our last read; pick up their rows and ours
+            self._refresh()
+
+        self._since_snapshot += 1
+        if self._since_snapshot >= self.snapshot_every or self._offset >= self.segment_max_bytes:
+            self.compact()
+
+    def close(self) -> None:
+        """Nothing is buffered; here so callers can close any memory backend."""
+
+    def compact(self) -> None:
+        """Seal the active file if it is over the size limit, then write a snapshot."""
+        self._refresh()
+        cutoff = time.time() - self.recent_horizon_s
+        for by_action in self._stats.values():
+            for st in by_action.values():
+                st.prune(cutoff)
+        if self._offset >= self.segment_max_bytes:
+            os.replace(self.path, self._segment_fmt.format(self._sealed + 1))
+            self._sealed += 1
+            self._offset = 0
+            self._ino = None
+        self._write_snapshot()
+
+    def _apply(self, row: Dict[str, Any]) -> None:
+        sig = row.get("signature")
+        action = row.get("action")
+        if not isinstance(sig, str) or not isinstance(action, str):
+            return
+        st = self._stats.setdefault(sig, {}).get(action)
+        if st is None:
+            st = self._stats[sig][action] = _ActionStats()
+        self._clock += 1
+        st.version = self._clock
+        ts = row.get("ts")
+        st.add(float(ts) if isinstance(ts, (int, float)) else 0.0, bool(row.get("success")), self.half_life_s)
+
+    def _reset(self) -> None:
+        self._stats = {}
+        self._clock += 1
+        self._sealed = 0
+        self._offset = 0
+        self._ino = None
+
+    def _sealed_segments(self) -> List[int]:
+        folder = os.path.dirname(self.path) or "."
+        seqs = []
+        for name in os.listdir(folder):
+            m = self._segment_re.match(name)
+            if m:
+                seqs.append(int(m.group(1)))
+        return sorted(seqs)
+
+    def _read_tail(self, path: str, offset: int) -> int:
+        """Fold complete lines of `path` after `offset` into _stats; return the new offset."""
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return offset
+        with f:
+            if path == self.path:
+                self._ino = os.fstat(f.fileno()).st_ino
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # partial line from a concurrent writer; read it next time
+                offset += len(raw)
+                line = raw.strip()
                 if not line:
                     continue
                 try:
-                    rows.append(json.loads(line))
-                except json.JSONDecodeError:
+                    row = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
                     continue
-        return rows
-
-    def success_rate(self, signature: str, action: str) -> Tuple[int, int, float]:
-        rows = self._load()
-        total = 0
-        succ = 0
-        for r in rows:
-            if r.get("signature") == signature and r.get("action") == action:
-                total += 1
-                succ += 1 if r.get("success") else 0
+                if isinstance(row, dict):
+                    self._apply(row)
+        return offset
+
+    def _catch_up(self) -> None:
+        """Replay segments sealed since our last read, then the active file's tail."""
+        for seq in self._sealed_segments():
+            if seq <= self._sealed:
+                continue
+            # the first one is the file we were reading when it got sealed
+            self._read_tail(self._segment_fmt.format(seq), self._offset)
+            self._sealed = seq
+            self._offset = 0
+        self._offset = self._read_tail(self.path, self._offset)
+
+    def _refresh(self) -> None:
+        try:
+            st = os.stat(self.path)
+            size, ino = st.st_size, st.st_ino
+        except FileNotFoundError:
+            size, ino = 0, None
+        if ino == self._ino:
+            if size == self._offset:
+                return
+            if size > self._offset:
+                self._offset = self._read_tail(self.path, self._offset)
+                return
+        elif self._ino is None or self._sealed_segments()[-1:] > [self._sealed]:
+            # first file after a roll (ours or another process's)
+            self._catch_up()
+            return
+        # truncated or replaced in place: rebuild from the segments
+        self._reset()
+        self._catch_up()
+
+    def _load_snapshot(self) -> bool:
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snap = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return False
+        if not isinstance(snap, dict) or snap.get("format") not in (2, SNAPSHOT_FORMAT):
+            return False
+        self._reset()
+        for sig, action, succ, total, d_succ, d_total, d_ts, ts, cum in snap.get("stats", []):
+            st = _ActionStats()
+            st.succ, st.total = int(succ), int(total)
+            st.d_succ, st.d_total, st.d_ts = float(d_succ), float(d_total), float(d_ts)
+            if snap["format"] == 2:  # plain JSON lists of times and prefix sums
+                st.ts, st.cum = [float(t) for t in ts], [int(c) for c in cum]
+            else:
+                st.decode(ts, cum)
+            st.version = self._clock
+            self._stats.setdefault(sig, {})[action] = st
+        self._sealed = int(snap.get("sealed", 0))
+        self._offset = int(snap.get("offset", 0))
+        return True
+
+    def _write_snapshot(self) -> None:
+        snap = {
+            "format": SNAPSHOT_FORMAT,
+            "ts": time.time(),
+            "sealed": self._sealed,
+            "offset": self._offset,
+            "stats": [
+                [sig, action, st.succ, st.total, st.d_succ, st.d_total, st.d_ts, *st.encode()]
+                for sig, by_action in self._stats.items()
+                for action, st in by_action.items()
+            ],
+        }
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(snap, f)
+        os.replace(tmp, self.snapshot_path)
+        self._since_snapshot = 0
+
+    def versions(self, signature: str) -> Dict[str, int]:
+        """action -> version for every action tried on this signature, in one lookup."""
+        self._refresh()
+        return {action: st.version for action, st in self._stats.get(signature, {}).items()}
+
+    def outcomes(self, signature: str) -> Tuple[Dict[str, Tuple[float, float, float]], Dict[str, int]]:
+        """success_rates(signature) and versions(signature) from one refresh."""
+        self._refresh()
+        stats: Dict[str, Tuple[float, float, float]] = {}
+        versions: Dict[str, int] = {}
+        for action, st in self._stats.get(signature, {}).items():
+            stats[action] = (st.succ, st.total, (st.succ / st.total) if st.total else 0.0)
+            versions[action] = st.version
+        return stats, versions
+
+    def success_rate(
+        self,
+        signature: str,
+        action: str,
+        window_s: Optional[float] = None,
+        now: Optional[float] = None,
+    ) -> Tuple[int, int, float]:
+        """All-time counts, or only outcomes from the last window_s seconds."""
+        self._refresh()
+        st = self._stats.get(signature, {}).get(action)
+        if st is None:
+            return 0, 0, 0.0
+        if window_s is None:
+            succ, total = st.succ, st.total
+        else:
+            succ, total = st.since((time.time() if now is None else now) - window_s)
+        rate = (succ / total) if total else 0.0
+        return succ, total, rate
+
+    def decayed_success_rate(
+        self,
+        signature: str,
+        action: str,
+        now: Optional[float] = None,
+    ) -> Tuple[float, float, float]:
+        """Success/total weights decayed with half_life_s; total is the effective sample size."""
+        self._refresh()
+        st = self._stats.get(signature, {}).get(action)
+        if st is None:
+            return 0.0, 0.0, 0.0
+        succ, total = st.decayed(time.time() if now is None else now, self.half_life_s)
         rate = (succ / total) if total else 0.0
         return succ, total, rate
 
-    def bias(self, signature: str, action: str, base: float, max_boost: float = 0.25) -> float:
-        succ, total, rate = self.success_rate(signature, action)
+    def success_rates(
+        self,
+        signature: str,
+        window_s: Optional[float] = None,
+        decayed: bool = False,
+        now: Optional[float] = None,
+    ) -> Dict[str, Tuple[float, float, float]]:
+        """(succ, total, rate) for every action tried on this signature, in one lookup."""
+        self._refresh()
+        now = time.time() if now is None else now
+        out: Dict[str, Tuple[float, float, float]] = {}
+        for action, st in self._stats.get(signature, {}).items():
+            if decayed:
+                succ, total = st.decayed(now, self.half_life_s)
+            elif window_s is not None:
+                succ, total = st.since(now - window_s)
+            else:
+                succ, total = st.succ, st.total
+            out[action] = (succ, total, (succ / total) if total else 0.0)
+        return out
+
+    @staticmethod
+    def bias_from(stats: Tuple[float, float, float], base: float, max_boost: float = 0.25) -> float:
+        """bias() for an already fetched (succ, total, rate) triple."""
+        succ, total, rate = stats
         if total < 2:
             return base
         confidence = min(1.0, total / 10.0)
         boosted = base + max_boost * rate * confidence
-        return min(1.0, max(0.0, boosted))
\ No newline at end of file
+        return min(1.0, max(0.0, boosted))
+
+    def bias(
+        self,
+        signature: str,
+        action: str,
+        base: float,
+        max_boost: float = 0.25,
+        window_s: Optional[float] = None,
+        decayed: bool = False,
+        now: Optional[float] = None,
+    ) -> float:
+        if decayed:
+            stats = self.decayed_success_rate(signature, action, now=now)
+        else:
+            stats = self.success_rate(signature, action, window_s=window_s, now=now)
+        return self.bias_from(stats, base, max_boost)
+
+    def bias_many(
+        self,
+        signature: str,
+        actions: List[str],
+        base: float,
+        max_boost: float = 0.25,
+        window_s: Optional[float] = None,
+        decayed: bool = False,
+        now: Optional[float] = None,
+    ) -> Dict[str, float]:
+        stats = self.success_rates(signature, window_s=window_s, decayed=decayed, now=now)
+        return {a: self.bias_from(stats.get(a, (0, 0, 0.0)), base, max_boost) for a in actions}
+
+
+def build_memory(cfg: MemoryConfig) -> MemoryStore:
+    """The memory backend named by cfg.backend (SQLiteMemoryStore has the same interface)."""
+    if cfg.backend == "jsonl":
+        return MemoryStore(path=cfg.path or "memory/aiops_memory.jsonl")
+    if cfg.backend == "sqlite":
+        from core.memory_sqlite import SQLiteMemoryStore
+
+        return SQLiteMemoryStore(
+            path=cfg.path or "memory/aiops_memory.db",
+            batch_size=cfg.batch_size,
+            flush_interval_s=cfg.flush_interval_s,
+        )
+    raise ValueError(f"unknown memory backend: {cfg.backend}")
@@ -0,0 +1,389 @@
+from __future__ import annotations
+import json, os, sqlite3, threading, time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from core.memory import MemoryStore
+
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outcomes (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    signature TEXT NOT NULL,
+    action TEXT NOT NULL,
+    success INTEGER NOT NULL,
+    outcome TEXT,
+    metadata TEXT
+);
+-- covering index for windowed counts: (signature, action) range, then ts
+CREATE INDEX IF NOT EXISTS outcomes_sig_action_ts ON outcomes (signature, action, ts, success);
+CREATE TABLE IF NOT EXISTS totals (
+    signature TEXT NOT NULL,
+    action TEXT NOT NULL,
+    succ INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    d_succ REAL NOT NULL,
+    d_total REAL NOT NULL,
+    d_ts REAL NOT NULL,
+    version INTEGER NOT NULL,
+    PRIMARY KEY (signature, action)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+# (ts, signature, action, success, outcome, metadata json)
+Row = Tuple[float, str, str, int, str, str]
+
+
+def _fold(acc: List[float], ts: float, s: int, half_life_s: float) -> None:
+    """Add one outcome to [succ, total, d_succ, d_total, d_ts]; same decay as MemoryStore."""
+    acc[0] += s
+    acc[1] += 1
+    if ts >= acc[4]:
+        k = 0.5 ** ((ts - acc[4]) / half_life_s)
+        acc[2] = acc[2] * k + s
+        acc[3] = acc[3] * k + 1.0
+        acc[4] = ts
+    else:
+        k = 0.5 ** ((acc[4] - ts) / half_life_s)
+        acc[2] += s * k
+        acc[3] += k
+
+
+class SQLiteMemoryStore:
+    """
+    MemoryStore backed by one SQLite database in WAL mode, so several agent
+    processes on a host can share learned outcomes (readers never block the
+    writer; writers queue on busy_timeout_s).
+
+    Rows go to `outcomes`, indexed on (signature, action, ts). A `totals`
+    table keeps per (signature, action) all-time and decayed counts,
+    updated in the same transaction as the inserts, so all-time and
+    decayed queries are a primary-key lookup and windowed ones an index
+    range count, however many rows there are.
+
+    append() commits right away when nothing was committed in the last
+    flush_interval_s (an idle agent shares each outcome at once); during a
+    burst it buffers rows and commits them as a group once batch_size are
+    pending or a background timer fires flush_interval_s after the first
+    buffered row, and on flush() / close(). Queries include this process's
+    pending rows. The connection is shared with the timer thread under a lock.
+    """
+
+    def __init__(
+        self,
+        path: str = "memory/aiops_memory.db",
+        batch_size: int = 64,
+        flush_interval_s: float = 1.0,
+        half_life_s: float = 6 * 3600.0,
+        busy_timeout_s: float = 5.0,
+    ):
+        self.path = path
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval_s = float(flush_interval_s)
+        self.half_life_s = float(half_life_s)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        self._last_commit = float("-inf")
+        self._conn = sqlite3.connect(path, timeout=busy_timeout_s, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._pending: List[Row] = []
+        self._check_meta()
+
+    def __len__(self) -> int:
+        """Outcomes stored, pending ones included."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outcomes").fetchone()[0] + len(self._pending)
+
+    # --- writes ---
+
+    def append(
+        self,
+        signature: str,
+        action: str,
+        success: bool,
+        outcome: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> None:
+        row = (time.time(), signature, action, 1 if success else 0, outcome, json.dumps(metadata or {}))
+        with self._lock:
+            self._pending.append(row)
+            if (
+                len(self._pending) >= self.batch_size
+                or time.monotonic() - self._last_commit >= self.flush_interval_s
+            ):
+                self.flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.flush_interval_s, self._flush_due)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> None:
+        """Commit pending rows (one transaction)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._pending:
+                rows, self._pending = self._pending, []
+                self._write(rows)
+                self._last_commit = time.monotonic()
+
+    def _flush_due(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self.flush()
+
+    def import_rows(self, rows: Iterable[Dict[str, Any]], batch: int = 10_000) -> int:
+        """Insert MemoryStore JSONL rows as they are (ts and metadata kept); returns rows imported."""
+        with self._lock:
+            return self._import_rows(rows, batch)
+
+    def _import_rows(self, rows: Iterable[Dict[str, Any]], batch: int) -> int:
+        self.flush()
+        n = 0
+        chunk: List[Row] = []
+        for row in rows:
+            sig, action = row.get("signature"), row.get("action")
+            if not isinstance(sig, str) or not isinstance(action, str):
+                continue
+            ts = row.get("ts")
+            chunk.append((
+                float(ts) if isinstance(ts, (int, float)) else 0.0,
+                sig,
+                action,
+                1 if row.get("success") else 0,
+                str(row.get("outcome", "")),
+                json.dumps(row.get("metadata") or {}),
+            ))
+            if len(chunk) >= batch:
+                self._write(chunk)
+                n += len(chunk)
+                chunk = []
+        if chunk:
+            self._write(chunk)
+            n += len(chunk)
+        return n
+
+    def compact(self) -> None:
+        """Commit pending rows and fold the WAL back into the database file."""
+        with self._lock:
+            self.flush()
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is None:
+                return
+            self.flush()
+            self._conn.close()
+            self._conn = None
+
+    def _write(self, rows: List[Row]) -> None:
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")  # take the write lock up front; totals are read-modify-write
+        try:
+            conn.executemany(
+                "INSERT INTO outcomes (ts, signature, action, success, outcome, metadata) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            version = conn.execute("SELECT MAX(id) FROM outcomes").fetchone()[0]
+            touched: Dict[Tuple[str, str], List[float]] = {}
+            for ts, sig, action, s, _, _ in rows:
+                acc = touched.get((sig, action))
+                if acc is None:
+                    cur = conn.execute(
+                        "SELECT succ, total, d_succ, d_total, d_ts FROM totals WHERE signature = ? AND action = ?",
+                        (sig, action),
+                    ).fetchone()
+                    acc = touched[(sig, action)] = list(cur) if cur else [0, 0, 0.0, 0.0, 0.0]
+                _fold(acc, ts, s, self.half_life_s)
+            conn.executemany(
+                "INSERT OR REPLACE INTO totals VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(sig, action, int(a[0]), int(a[1]), a[2], a[3], a[4], version) for (sig, action), a in touched.items()],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _check_meta(self) -> None:
+        """Record schema and half-life; decayed totals are rebuilt if the half-life changed."""
+        meta = dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+        if meta.get("schema", str(SCHEMA_VERSION)) != str(SCHEMA_VERSION):
+            raise RuntimeError(f"{self.path}: unsupported memory schema {meta.get('schema')}")
+        if meta.get("half_life_s") is not None and float(meta["half_life_s"]) != self.half_life_s:
+            self.rebuild_totals()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+            [("schema", str(SCHEMA_VERSION)), ("half_life_s", repr(self.half_life_s))],
+        )
+
+    def rebuild_totals(self) -> None:
+        """Recompute `totals` from `outcomes` (row order)."""
+        with self._lock:
+            self._rebuild_totals()
+
+    def _rebuild_totals(self) -> None:
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            acc: Dict[Tuple[str, str], List[float]] = {}
+            version: Dict[Tuple[str, str], int] = {}
+            for rid, ts, sig, action, s in conn.execute(
+                "SELECT id, ts, signature, action, success FROM outcomes ORDER BY id"
+            ):
+                a = acc.get((sig, action))
+                if a is None:
+                    a = acc[(sig, action)] = [0, 0, 0.0, 0.0, 0.0]
+                _fold(a, ts, s, self.half_life_s)
+                version[(sig, action)] = rid
+            conn.execute("DELETE FROM totals")
+            conn.executemany(
+                "INSERT INTO totals VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(sig, action, int(a[0]), int(a[1]), a[2], a[3], a[4], version[(sig, action)])
+                 for (sig, action), a in acc.items()],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    # --- reads ---
+
+    def _totals(self, signature: str, only: Optional[str] = None) -> Dict[str, List[float]]:
+        """action -> [succ, total, d_succ, d_total, d_ts, version], pending rows folded in."""
+        sql = "SELECT action, succ, total, d_succ, d_total, d_ts, version FROM totals WHERE signature = ?"
+        params: Tuple[str, ...] = (signature,)
+        if only is not None:
+            sql += " AND action = ?"
+            params += (only,)
+        with self._lock:
+            out = {
+                action: [succ, total, d_succ, d_total, d_ts, version * (self.batch_size + 1)]
+                for action, succ, total, d_succ, d_total, d_ts, version in self._conn.execute(sql, params)
+            }
+            for ts, sig, action, s, _, _ in self._pending:
+                if sig == signature and (only is None or action == only):
+                    acc = out.get(action)
+                    if acc is None:
+                        acc = out[action] = [0, 0, 0.0, 0.0, 0.0, 0]
+                    _fold(acc, ts, s, self.half_life_s)
+                    acc[5] += 1  # < batch_size pending, so never reaches the next committed version
+        return out
+
+    def _since(self, signature: str, action: str, t0: float) -> Tuple[int, int]:
+        with self._lock:
+            succ, total = self._conn.execute(
+                "SELECT COALESCE(SUM(success), 0), COUNT(*) FROM outcomes WHERE signature = ? AND action = ? AND ts >= ?",
+                (signature, action, t0),
+            ).fetchone()
+            for ts, sig, act, s, _, _ in self._pending:
+                if sig == signature and act == action and ts >= t0:
+                    succ += s
+                    total += 1
+        return succ, total
+
+    def _decayed(self, acc: List[float], now: float) -> Tuple[float, float]:
+        k = 0.5 ** (max(0.0, now - acc[4]) / self.half_life_s)
+        return acc[2] * k, acc[3] * k
+
+    def versions(self, signature: str) -> Dict[str, int]:
+        """action -> opaque version for every action tried on this signature; changes with each outcome."""
+        return {action: int(acc[5]) for action, acc in self._totals(signature).items()}
+
+    def outcomes(self, signature: str) -> Tuple[Dict[str, Tuple[float, float, float]], Dict[str, int]]:
+        """success_rates(signature) and versions(signature) from one query."""
+        stats: Dict[str, Tuple[float, float, float]] = {}
+        versions: Dict[str, int] = {}
+        for action, acc in self._totals(signature).items():
+            succ, total = acc[0], acc[1]
+            stats[action] = (succ, total, (succ / total) if total else 0.0)
+            versions[action] = int(acc[5])
+        return stats, versions
+
+    def success_rate(
+        self,
+        signature: str,
+        action: str,
+        window_s: Optional[float] = None,
+        now: Optional[float] = None,
+    ) -> Tuple[int, int, float]:
+        if window_s is None:
+            acc = self._totals(signature, action).get(action)
+            if acc is None:
+                return 0, 0, 0.0
+            succ, total = int(acc[0]), int(acc[1])
+        else:
+            succ, total = self._since(signature, action, (time.time() if now is None else now) - window_s)
+        rate = (succ / total) if total else 0.0
+        return succ, total, rate
+
+    def decayed_success_rate(
+        self,
+        signature: str,
+        action: str,
+        now: Optional[float] = None,
+    ) -> Tuple[float, float, float]:
+        acc = self._totals(signature, action).get(action)
+        if acc is None:
+            return 0.0, 0.0, 0.0
+        succ, total = self._decayed(acc, time.time() if now is None else now)
+        rate = (succ / total) if total else 0.0
+        return succ, total, rate
+
+    def success_rates(
+        self,
+        signature: str,
+        window_s: Optional[float] = None,
+        decayed: bool = False,
+        now: Optional[float] = None,
+    ) -> Dict[str, Tuple[float, float, float]]:
+        now = time.time() if now is None else now
+        out: Dict[str, Tuple[float, float, float]] = {}
+        for action, acc in self._totals(signature).items():
+            if decayed:
+                succ, total = self._decayed(acc, now)
+            elif window_s is not None:
+                succ, total = self._since(signature, action, now - window_s)
+            else:
+                succ, total = acc[0], acc[1]
+            out[action] = (succ, total, (succ / total) if total else 0.0)
+        return out
+
+    bias_from = staticmethod(MemoryStore.bias_from)
+
+    def bias(
+        self,
+        signature: str,
+        action: str,
+        base: float,
+        max_boost: float = 0.25,
+        window_s: Optional[float] = None,
+        decayed: bool = False,
+        now: Optional[float] = None,
+    ) -> float:
+        if decayed:
+            stats = self.decayed_success_rate(signature, action, now=now)
+        else:
+            stats = self.success_rate(signature, action, window_s=window_s, now=now)
+        return self.bias_from(stats, base, max_boost)
+
+    def bias_many(
+        self,
+        signature: str,
+        actions: List[str],
+        base: float,
+        max_boost: float = 0.25,
+        window_s: Optional[float] = None,
+        decayed: bool = False,
+        now: Optional[float] = None,
+    ) -> Dict[str, float]:
+        stats = self.success_rates(signature, window_s=window_s, decayed=decayed, now=now)
+        return {a: self.bias_from(stats.get(a, (0, 0, 0.0)), base, max_boost) for a in actions}
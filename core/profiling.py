@@ -0,0 +1,289 @@
+from __future__ import annotations
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+import cProfile
+import json
+import os
+import pstats
+import signal
+import sys
+import threading
+import time
+
+
+class ProfileContext:
+    """What the main thread is working on; tags samples and profiles."""
+    __slots__ = ("stage", "incident")
+
+    def __init__(self) -> None:
+        self.stage = ""
+        self.incident = ""
+
+
+context = ProfileContext()
+
+
+def _incident_of(args: tuple) -> str:
+    for a in args:
+        iid = getattr(a, "incident_id", None)
+        if iid:
+            return str(iid)
+    return ""
+
+
+class StageProfiler:
+    """
+    Deterministic (cProfile) profile of the next `ticks` ticks, one
+    profile per stage: wrap() the stage functions, call tick() once per
+    tick. When the budget is spent, writes <prefix>-<stage>.pstats plus
+    <prefix>.json listing calls and incident ids per stage.
+    """
+
+    def __init__(self, out_dir: str = "logs/profiles"):
+        self.out_dir = out_dir
+        self._left = 0
+        self._prefix = ""
+        self._profiles: Dict[str, cProfile.Profile] = {}
+        self._calls: Counter = Counter()
+        self._incidents: Dict[str, List[str]] = {}
+        self.written: List[str] = []
+
+    @property
+    def active(self) -> bool:
+        return self._left > 0
+
+    def arm(self, ticks: int) -> None:
+        if self.active or ticks <= 0:
+            return
+        self._left = int(ticks)
+        self._prefix = os.path.join(self.out_dir, time.strftime("profile-%Y%m%d-%H%M%S") + f"-{os.getpid()}")
+        self._profiles, self._calls, self._incidents = {}, Counter(), {}
+        print(f"[PROFILE] cProfile armed for {ticks} ticks")
+
+    def run(self, stage: str, fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> Any:
+        prof = self._profiles.get(stage)
+        if prof is None:
+            prof = self._profiles[stage] = cProfile.Profile()
+        self._calls[stage] += 1
+        incident = context.incident
+        if incident:
+            self._incidents.setdefault(stage, []).append(incident)
+        prof.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            prof.disable()
+
+    def tick(self) -> None:
+        if self._left > 0:
+            self._left -= 1
+            if self._left == 0:
+                self.write()
+
+    def write(self) -> List[str]:
+        self._left = 0
+        if not self._profiles:
+            return []
+        os.makedirs(self.out_dir, exist_ok=True)
+        paths = []
+        for stage, prof in self._profiles.items():
+            path = f"{self._prefix}-{stage}.pstats"
+            pstats.Stats(prof).dump_stats(path)
+            paths.append(path)
+        manifest = {
+            "stages": {
+                stage: {"calls": self._calls[stage], "incidents": sorted(set(self._incidents.get(stage, [])))}
+                for stage in self._profiles
+            },
+            "files": paths,
+        }
+        with open(self._prefix + ".json", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        self._profiles = {}
+        self.written += paths
+        print(f"[PROFILE] wrote {len(paths)} pstats files to {self.out_dir}")
+        return paths
+
+
+def _frame_label(code: Any) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler: every `interval_s` of process CPU time
+    (ITIMER_PROF / SIGPROF) it records the main thread's stack, rooted at
+    "stage=<stage>;incident=<id>" from `context`. With all_threads=True
+    other threads are sampled too (rooted at their name; idle ones show
+    up as wait frames). stop() writes the counts as
+    collapsed stacks (flamegraph.pl / speedscope input). The timer and
+    handler must be installed from the main thread; not available on
+    platforms without SIGPROF.
+
+    stop() disarms the timer, writes a copy of the counts taken in one
+    step (a SIGPROF already in flight may still run the handler) and puts
+    the previous SIGPROF handler back. signal.signal only works on the
+    main thread, so when stop() runs elsewhere (the duration timer) the
+    handler is restored by the next release() or stray SIGPROF on the
+    main thread; Profiling.tick() calls release().
+    """
+
+    def __init__(
+        self,
+        out_dir: str = "logs/profiles",
+        interval_s: float = 0.005,
+        max_depth: int = 64,
+        all_threads: bool = False,
+    ):
+        if not hasattr(signal, "SIGPROF"):
+            raise RuntimeError("sampling profiler needs SIGPROF")
+        self.out_dir = out_dir
+        self.interval_s = float(interval_s)
+        self.max_depth = int(max_depth)
+        self.all_threads = bool(all_threads)
+        self.samples: Counter = Counter()
+        self.running = False
+        self._started = 0.0
+        self._timer: Optional[threading.Timer] = None
+        self._main = threading.main_thread().ident
+        self._prev_handler: Any = None
+        self._installed = False
+
+    def _stack(self, frame: Any) -> List[str]:
+        out = []
+        while frame is not None and len(out) < self.max_depth:
+            out.append(_frame_label(frame.f_code))
+            frame = frame.f_back
+        out.reverse()
+        return out
+
+    def _handler(self, signum: int, frame: Any) -> None:
+        if not self.running:
+            self.release()  # signal handlers run on the main thread
+            return
+        if not self.all_threads:
+            root = f"stage={context.stage or '-'};incident={context.incident or '-'}"
+            self.samples[";".join([root] + self._stack(frame))] += 1
+            return
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, top in sys._current_frames().items():
+            if ident == self._main:
+                top = frame if frame is not None else top
+                root = f"stage={context.stage or '-'};incident={context.incident or '-'}"
+            else:
+                root = f"thread={names.get(ident, ident)}"
+            self.samples[";".join([root] + self._stack(top))] += 1
+
+    def start(self, duration_s: Optional[float] = None) -> None:
+        if self.running:
+            return
+        self.samples = Counter()
+        if not self._installed:
+            self._prev_handler = signal.signal(signal.SIGPROF, self._handler)
+            self._installed = True
+        signal.setitimer(signal.ITIMER_PROF, self.interval_s, self.interval_s)
+        self.running = True
+        self._started = time.time()
+        if duration_s:
+            self._timer = threading.Timer(duration_s, self.stop)
+            self._timer.daemon = True
+            self._timer.start()
+        print(f"[PROFILE] sampling every {self.interval_s * 1000:.1f}ms of CPU time")
+
+    def stop(self) -> Optional[str]:
+        """Stop sampling and write the collapsed stacks; returns the file path."""
+        if not self.running:
+            return None
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        self.running = False
+        if self._timer is not None:
+            if self._timer is not threading.current_thread():
+                self._timer.cancel()
+            self._timer = None
+        # dict.copy is a single C call, so a late handler run can't change the dict mid-copy
+        self.samples = Counter(dict.copy(self.samples))
+        if threading.current_thread() is threading.main_thread():
+            self.release()
+        os.makedirs(self.out_dir, exist_ok=True)
+        path = os.path.join(
+            self.out_dir,
+            time.strftime("sample-%Y%m%d-%H%M%S", time.localtime(self._started)) + f"-{os.getpid()}.collapsed",
+        )
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, n in self.samples.most_common():
+                f.write(f"{stack} {n}\n")
+        print(f"[PROFILE] {sum(self.samples.values())} samples -> {path}")
+        return path
+
+    def release(self) -> None:
+        """Put back the SIGPROF handler start() replaced, if stopped. Main thread only."""
+        if not self._installed or self.running:
+            return
+        prev = self._prev_handler
+        signal.signal(signal.SIGPROF, prev if prev is not None else signal.SIG_DFL)
+        self._prev_handler = None
+        self._installed = False
+
+    def toggle(self) -> None:
+        if self.running:
+            self.stop()
+        else:
+            self.start()
+
+
+class Profiling:
+    """
+    Profiling hooks for a staged loop. wrap(stage, fn) tags the context
+    with the stage (and the incident, if an argument has incident_id) and
+    routes the call through the StageProfiler while one is armed.
+
+    Triggers: arm_ticks(n) / start_sampling(duration) directly, or, with
+    install_signals(), SIGUSR1 toggles the sampler and SIGUSR2 arms a
+    cProfile capture of the next `signal_ticks` ticks of a live process.
+    """
+
+    def __init__(self, out_dir: str = "logs/profiles", interval_s: float = 0.005, signal_ticks: int = 200):
+        self.stage_profiler = StageProfiler(out_dir)
+        self.sampler = SamplingProfiler(out_dir, interval_s) if hasattr(signal, "SIGPROF") else None
+        self.signal_ticks = int(signal_ticks)
+
+    def wrap(self, stage: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        sp = self.stage_profiler
+
+        def staged(*args: Any, **kwargs: Any) -> Any:
+            context.stage = stage
+            context.incident = _incident_of(args)
+            try:
+                if sp.active:
+                    return sp.run(stage, fn, args, kwargs)
+                return fn(*args, **kwargs)
+            finally:
+                context.stage = ""
+                context.incident = ""
+
+        return staged
+
+    def tick(self) -> None:
+        self.stage_profiler.tick()
+        if self.sampler is not None:
+            self.sampler.release()
+
+    def arm_ticks(self, ticks: int) -> None:
+        self.stage_profiler.arm(ticks)
+
+    def start_sampling(self, duration_s: Optional[float] = None) -> None:
+        if self.sampler is None:
+            raise RuntimeError("sampling profiler needs SIGPROF")
+        self.sampler.start(duration_s)
+
+    def install_signals(self) -> None:
+        if hasattr(signal, "SIGUSR1") and self.sampler is not None:
+            signal.signal(signal.SIGUSR1, lambda s, f: self.sampler.toggle())
+        if hasattr(signal, "SIGUSR2"):
+            signal.signal(signal.SIGUSR2, lambda s, f: self.arm_ticks(self.signal_ticks))
+
+    def close(self) -> None:
+        if self.sampler is not None:
+            self.sampler.stop()
+        if self.stage_profiler.active:
+            self.stage_profiler.write()
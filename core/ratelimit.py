@@ -0,0 +1,121 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+import time
+
+
+COOLDOWN = "cooldown_active"
+RATE_LIMITED = "rate_limited"
+GLOBAL_RATE_LIMITED = "global_rate_limited"
+
+
+class _Target:
+    __slots__ = ("last", "tokens", "stamp")
+
+    def __init__(self, tokens: float, now: float):
+        self.last = -float("inf")  # last allowed action
+        self.tokens = tokens       # bucket level as of `stamp`
+        self.stamp = now
+
+
+class ActionLimiter:
+    """
+    Admission control for remediation actions, keyed by target
+    (e.g. (service, action)): a cooldown and a token bucket per target,
+    plus one global token bucket across all targets.
+
+    check() is O(1) amortised. Targets live in an OrderedDict in order of
+    last use; a target that has been idle long enough for its cooldown to
+    pass and its bucket to refill is indistinguishable from a new one, so
+    such entries are dropped from the front lazily on each check. At most
+    max_targets are kept; beyond that the least recently used target is
+    forgotten early (it then gets a fresh bucket, i.e. errs on allowing).
+    """
+
+    def __init__(
+        self,
+        cooldown_s: float,
+        rate_per_minute: float,
+        burst: Optional[float] = None,
+        global_rate_per_minute: Optional[float] = None,
+        global_burst: Optional[float] = None,
+        max_targets: int = 100_000,
+    ):
+        self.cooldown_s = float(cooldown_s)
+        self.rate = float(rate_per_minute) / 60.0
+        self.burst = float(burst if burst is not None else max(1.0, rate_per_minute))
+        self.global_rate = None if global_rate_per_minute is None else float(global_rate_per_minute) / 60.0
+        self.global_burst = float(global_burst if global_burst is not None else max(1.0, global_rate_per_minute or 1.0))
+        self.max_targets = max(1, int(max_targets))
+
+        refill = (self.burst / self.rate) if self.rate > 0 else 0.0  # empty -> full
+        self._idle_s = max(self.cooldown_s, refill)
+        self._targets: "OrderedDict[Hashable, _Target]" = OrderedDict()
+        self._g_tokens = self.global_burst
+        self._g_stamp: Optional[float] = None
+        self.counters = {"allowed": 0, COOLDOWN: 0, RATE_LIMITED: 0, GLOBAL_RATE_LIMITED: 0, "expired": 0}
+
+    def __len__(self) -> int:
+        return len(self._targets)
+
+    def _expire(self, now: float) -> None:
+        targets = self._targets
+        while targets:
+            t = next(iter(targets.values()))
+            if now - t.stamp < self._idle_s and len(targets) <= self.max_targets:
+                break
+            targets.popitem(last=False)
+            self.counters["expired"] += 1
+
+    def _refill(self, tokens: float, stamp: float, now: float, rate: float, burst: float) -> float:
+        if rate <= 0:
+            return tokens
+        return min(burst, tokens + (now - stamp) * rate)
+
+    def check(self, key: Hashable, now: Optional[float] = None) -> Optional[str]:
+        """
+        Admit one action for `key`: None (and charge the budgets) if allowed,
+        else the outcome explaining why it was blocked.
+        """
+        now = time.time() if now is None else now
+        t = self._targets.get(key)
+        if t is None:
+            t = _Target(self.burst, now)
+        else:
+            self._targets.move_to_end(key)
+            t.tokens = self._refill(t.tokens, t.stamp, now, self.rate, self.burst)
+            t.stamp = now
+
+        blocked: Optional[str] = None
+        if now - t.last < self.cooldown_s:
+            blocked = COOLDOWN
+        elif self.rate > 0 and t.tokens < 1.0:
+            blocked = RATE_LIMITED
+        elif self.global_rate is not None:
+            g_stamp = now if self._g_stamp is None else self._g_stamp
+            self._g_tokens = self._refill(self._g_tokens, g_stamp, now, self.global_rate, self.global_burst)
+            self._g_stamp = now
+            if self._g_tokens < 1.0:
+                blocked = GLOBAL_RATE_LIMITED
+            else:
+                self._g_tokens -= 1.0
+
+        if blocked is None:
+            t.last = now
+            if self.rate > 0:
+                t.tokens -= 1.0
+        self._targets[key] = t
+        self._expire(now)
+        self.counters["allowed" if blocked is None else blocked] += 1
+        return blocked
+
+    def state(self, key: Hashable, now: Optional[float] = None) -> Tuple[float, float]:
+        """(seconds of cooldown left, tokens available) for `key`, without charging."""
+        now = time.time() if now is None else now
+        t = self._targets.get(key)
+        if t is None:
+            return 0.0, self.burst
+        return (
+            max(0.0, self.cooldown_s - (now - t.last)),
+            self._refill(t.tokens, t.stamp, now, self.rate, self.burst),
+        )
@@ -1,9 +1,13 @@
 from __future__ import annotations
+from bisect import bisect_left, bisect_right, insort
 from collections import deque
 from dataclasses import dataclass
-from typing import Deque, Dict
+from itertools import accumulate
+from typing import Deque, Dict, List, Optional, Sequence, Tuple, Union
 import math
 
+import numpy as np
+
 
 @dataclass
 class RollingStats:
@@ -12,41 +16,501 @@ class RollingStats:
     std: float
 
 
-class RollingWindow:
-    def __init__(self, window_size: int):
-        if window_size < 5:
-            raise ValueError("window_size must be >= 5")
-        self.window_size = window_size
-        self._buf: Dict[str, Deque[float]] = {}
+class _SlidingWelford:
+    """
+    Sliding Welford update shared by ArrayWindow and FleetWindow. State is
+    per row: _buf[row] is the ring (window on axis 0, any trailing metric
+    axes after it), _head/_n/_since are per-row ints and _mean/_m2 have the
+    trailing shape.
+    """
+
+    window_size: int
+    _buf: np.ndarray
+    _head: np.ndarray
+    _n: np.ndarray
+    _since: np.ndarray
+    _mean: np.ndarray
+    _m2: np.ndarray
+
+    def _slide(self, rows: np.ndarray, x: np.ndarray) -> None:
+        """Push x[i] into row rows[i]; rows must be unique."""
+        w = self.window_size
+        head = self._head[rows]
+        n = self._n[rows]
+        mean = self._mean[rows]
+        m2 = self._m2[rows]
+        old = self._buf[rows, head]
+        trail = (1,) * (x.ndim - 1)  # broadcast per-row counts over metric axes
+        full = (n >= w).reshape(n.shape + trail)
+
+        n_new = np.minimum(n + 1, w)
+        # growing: plain Welford; full: replace `old` by `x`
+        removed = np.where(full, old, mean)
+        mean_new = mean + (x - removed) / n_new.reshape(n.shape + trail)
+        m2 += np.where(full, (x - old) * (x - mean_new + old - mean), (x - mean) * (x - mean_new))
+
+        self._buf[rows, head] = x
+        self._head[rows] = (head + 1) % w
+        self._n[rows] = n_new
+        self._mean[rows] = mean_new
+        self._m2[rows] = m2
+        since = self._since[rows] + 1
+        self._since[rows] = since
+
+        stale = rows[since >= w]
+        if stale.size:
+            block = self._buf[stale]
+            mu = block.mean(axis=1)
+            self._mean[stale] = mu
+            self._m2[stale] = ((block - np.expand_dims(mu, 1)) ** 2).sum(axis=1)
+            self._since[stale] = 0
+
+
+class ArrayWindow(_SlidingWelford):
+    """
+    Rolling window over many metrics at once: a metrics x window float64
+    ring buffer with an interned metric-name -> row map.
+
+    Each row keeps a sliding Welford mean / sum of squared deviations, so
+    push() costs O(metrics) regardless of window size. Rows are recomputed
+    exactly from the buffer once per window_size pushes to bound drift.
+    std uses `ddof` (0 = population, 1 = sample).
+    """
+
+    def __init__(self, window_size: int, ddof: int = 0):
+        self.window_size = int(window_size)
+        self.ddof = int(ddof)
+        self._index: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._order: Tuple[str, ...] = ()       # key order of the last push
+        self._order_rows = np.zeros(0, dtype=np.intp)
+        self._buf = np.zeros((0, self.window_size))
+        self._head = np.zeros(0, dtype=np.intp)
+        self._n = np.zeros(0, dtype=np.int64)
+        self._since = np.zeros(0, dtype=np.int64)
+        self._mean = np.zeros(0)
+        self._m2 = np.zeros(0)
+
+    def _rows(self, keys: Tuple[str, ...]) -> np.ndarray:
+        if keys == self._order:
+            return self._order_rows
+        new = [k for k in keys if k not in self._index]
+        if new:
+            for k in new:
+                self._index[k] = len(self._names)
+                self._names.append(k)
+            m = len(new)
+            self._buf = np.vstack([self._buf, np.zeros((m, self.window_size))])
+            self._head = np.concatenate([self._head, np.zeros(m, dtype=np.intp)])
+            self._n = np.concatenate([self._n, np.zeros(m, dtype=np.int64)])
+            self._since = np.concatenate([self._since, np.zeros(m, dtype=np.int64)])
+            self._mean = np.concatenate([self._mean, np.zeros(m)])
+            self._m2 = np.concatenate([self._m2, np.zeros(m)])
+        self._order = keys
+        self._order_rows = np.fromiter((self._index[k] for k in keys), dtype=np.intp, count=len(keys))
+        return self._order_rows
+
+    def push(self, metrics: Dict[str, float]) -> None:
+        if not metrics:
+            return
+        rows = self._rows(tuple(metrics))
+        x = np.fromiter(metrics.values(), dtype=np.float64, count=len(metrics))
+        self._slide(rows, x)
+
+    def count(self) -> int:
+        return int(self._n.min()) if self._n.size else 0
+
+    def moments(self) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+        """(names, n, mean, std) for every metric, as arrays in row order."""
+        var = np.maximum(self._m2, 0.0) / np.maximum(self._n - self.ddof, 1)
+        return self._names, self._n, self._mean, np.sqrt(var)
+
+    def align(self, current: Dict[str, float]) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+        """(keys, x, mean, std) for the keys of `current` that the window has seen."""
+        keys = [k for k in current if k in self._index]
+        rows = np.fromiter((self._index[k] for k in keys), dtype=np.intp, count=len(keys))
+        x = np.fromiter((current[k] for k in keys), dtype=np.float64, count=len(keys))
+        n = self._n[rows]
+        var = np.maximum(self._m2[rows], 0.0) / np.maximum(n - self.ddof, 1)
+        std = np.where(n > 0, np.sqrt(var), 0.0)
+        mean = np.where(n > 0, self._mean[rows], 0.0)
+        return keys, x, mean, std
+
+    def mean_std(self, key: str) -> Tuple[float, float]:
+        row = self._index.get(key)
+        if row is None or self._n[row] == 0:
+            return 0.0, 0.0
+        var = max(0.0, float(self._m2[row])) / max(1, int(self._n[row]) - self.ddof)
+        return float(self._mean[row]), math.sqrt(var)
+
+
+class _Moments:
+    __slots__ = ("ring", "head", "n", "since", "mean", "m2")
+
+    def __init__(self, size: int) -> None:
+        self.ring = [0.0] * size
+        self.head = 0
+        self.n = 0
+        self.since = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+
+class ScalarWindow:
+    """
+    ArrayWindow's sliding Welford moments kept in plain Python floats, for
+    a single service's handful of metrics: at that width NumPy's per-call
+    overhead costs more than the arithmetic, so push() and align() are a
+    few float operations per metric. Each metric is recomputed exactly
+    from its ring once per window_size pushes to bound drift.
+    align() returns lists, like MedianWindow and EwmaState.
+    """
+
+    def __init__(self, window_size: int, ddof: int = 0):
+        self.window_size = int(window_size)
+        self.ddof = int(ddof)
+        self._state: Dict[str, _Moments] = {}
 
     def push(self, metrics: Dict[str, float]) -> None:
+        w = self.window_size
         for k, v in metrics.items():
-            if k not in self._buf:
-                self._buf[k] = deque(maxlen=self.window_size)
-            self._buf[k].append(float(v))
+            st = self._state.get(k)
+            if st is None:
+                st = self._state[k] = _Moments(w)
+            x = float(v)
+            mean = st.mean
+            if st.n >= w:
+                # full: replace the oldest value by x
+                old = st.ring[st.head]
+                st.mean = mean_new = mean + (x - old) / w
+                st.m2 += (x - old) * (x - mean_new + old - mean)
+            else:
+                st.n += 1
+                st.mean = mean_new = mean + (x - mean) / st.n
+                st.m2 += (x - mean) * (x - mean_new)
+            st.ring[st.head] = x
+            st.head = (st.head + 1) % w
+            st.since += 1
+            if st.since >= w:
+                ring = st.ring
+                mu = sum(ring) / w
+                st.mean = mu
+                st.m2 = sum((y - mu) * (y - mu) for y in ring)
+                st.since = 0
+
+    def count(self) -> int:
+        if not self._state:
+            return 0
+        return min(st.n for st in self._state.values())
+
+    def _std(self, st: _Moments) -> float:
+        return math.sqrt(max(0.0, st.m2) / max(1, st.n - self.ddof))
+
+    def align(self, current: Dict[str, float]) -> Tuple[List[str], List[float], List[float], List[float]]:
+        """(keys, x, mean, std) for the keys of `current` that the window has seen."""
+        state = self._state
+        keys = [k for k in current if k in state]
+        stats = [state[k] for k in keys]
+        return (
+            keys,
+            [float(current[k]) for k in keys],
+            [st.mean for st in stats],
+            [self._std(st) for st in stats],
+        )
+
+    def mean_std(self, key: str) -> Tuple[float, float]:
+        st = self._state.get(key)
+        if st is None or st.n == 0:
+            return 0.0, 0.0
+        return st.mean, self._std(st)
+
+
+class RollingWindow(ArrayWindow):
+    def __init__(self, window_size: int):
+        if window_size < 5:
+            raise ValueError("window_size must be >= 5")
+        super().__init__(window_size, ddof=0)
 
     def ready(self) -> bool:
-        return bool(self._buf) and all(len(d) >= self.window_size for d in self._buf.values())
+        return bool(self._names) and self.count() >= self.window_size
 
     def stats(self) -> Dict[str, RollingStats]:
-        out: Dict[str, RollingStats] = {}
-        for k, d in self._buf.items():
-            vals = list(d)
-            n = len(vals)
-            if n == 0:
-                continue
-            mean = sum(vals) / n
-            var = sum((x - mean) ** 2 for x in vals) / n
-            std = math.sqrt(var)
-            out[k] = RollingStats(n=n, mean=mean, std=std)
-        return out
+        names, n, mean, std = self.moments()
+        return {
+            k: RollingStats(n=int(n[i]), mean=float(mean[i]), std=float(std[i]))
+            for i, k in enumerate(names)
+            if n[i] > 0
+        }
 
     def zscores(self, current: Dict[str, float], epsilon: float = 1e-6) -> Dict[str, float]:
-        st = self.stats()
-        z: Dict[str, float] = {}
-        for k, x in current.items():
-            if k not in st:
+        keys, x, mean, std = self.align(current)
+        z = (x - mean) / np.maximum(std, epsilon)
+        return dict(zip(keys, z.tolist()))
+
+
+class FleetWindow(_SlidingWelford):
+    """
+    Rolling windows for many entities (services) sharing one metric set:
+    an entities x window x metrics float64 ring buffer. push() takes one
+    row of metrics for each of a batch of entities and updates their
+    sliding Welford moments with a few array operations; entities not in
+    the batch are left untouched. Capacity grows by doubling.
+    """
+
+    def __init__(self, window_size: int, metrics: Sequence[str], ddof: int = 1, capacity: int = 64):
+        self.window_size = int(window_size)
+        self.metrics = tuple(metrics)
+        self.ddof = int(ddof)
+        self._index: Dict[str, int] = {}
+        self.entities: List[str] = []
+        cap = max(1, int(capacity))
+        m = len(self.metrics)
+        self._buf = np.zeros((cap, self.window_size, m))
+        self._head = np.zeros(cap, dtype=np.intp)
+        self._n = np.zeros(cap, dtype=np.int64)
+        self._since = np.zeros(cap, dtype=np.int64)
+        self._mean = np.zeros((cap, m))
+        self._m2 = np.zeros((cap, m))
+
+    def _grow(self, needed: int) -> None:
+        cap = self._buf.shape[0]
+        while cap < needed:
+            cap *= 2
+        extra = cap - self._buf.shape[0]
+        if extra <= 0:
+            return
+        m = len(self.metrics)
+        self._buf = np.concatenate([self._buf, np.zeros((extra, self.window_size, m))])
+        self._head = np.concatenate([self._head, np.zeros(extra, dtype=np.intp)])
+        self._n = np.concatenate([self._n, np.zeros(extra, dtype=np.int64)])
+        self._since = np.concatenate([self._since, np.zeros(extra, dtype=np.int64)])
+        self._mean = np.concatenate([self._mean, np.zeros((extra, m))])
+        self._m2 = np.concatenate([self._m2, np.zeros((extra, m))])
+
+    def rows(self, entity_ids: Sequence[str]) -> np.ndarray:
+        index = self._index
+        for e in entity_ids:
+            if e not in index:
+                index[e] = len(self.entities)
+                self.entities.append(e)
+        self._grow(len(self.entities))
+        return np.fromiter((index[e] for e in entity_ids), dtype=np.intp, count=len(entity_ids))
+
+    def push(self, rows: np.ndarray, x: np.ndarray) -> None:
+        """x has shape (len(rows), len(metrics)); rows must be unique."""
+        self._slide(rows, x)
+
+    def moments(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(n, mean, std) for the given entity rows; mean/std have shape (len(rows), len(metrics))."""
+        n = self._n[rows]
+        var = np.maximum(self._m2[rows], 0.0) / np.maximum(n - self.ddof, 1)[:, None]
+        return n, self._mean[rows], np.sqrt(var)
+
+
+def _kth_smallest(a: Sequence[float], p: int, m: float, k: int, hint: int = -1) -> Tuple[float, int]:
+    """
+    k-th smallest (0-based) of |a[i] - m| for sorted `a`, where p = bisect_left(a, m).
+    Distances left of p ascend as we walk down from p-1 and distances right
+    of p ascend as we walk up, so this is a k-th-of-two-sorted-lists search
+    over i, how many of the k+1 smallest lie left of p. Returns (distance, i).
+    A `hint` (the i from the previous window) is galloped out from, so a
+    window that changed by one value settles in a few lookups rather than
+    a full O(log N) search.
+    """
+    n_left, n_right = p, len(a) - p
+    lo, hi = max(0, k + 1 - n_right), min(k + 1, n_left)
+    galloping = lo <= hint <= hi
+    i = hint if galloping else (lo + hi) // 2
+    step, last = 1, 0
+    while True:
+        j = k + 1 - i               # take i from the left, j from the right
+        left_i = m - a[p - 1 - i] if i < n_left else math.inf
+        left_prev = m - a[p - i] if i > 0 else -math.inf
+        right_j = a[p + j] - m if j < n_right else math.inf
+        right_prev = a[p + j - 1] - m if j > 0 else -math.inf
+        if left_prev > right_j:
+            hi, d = i - 1, -1
+        elif right_prev > left_i:
+            lo, d = i + 1, 1
+        else:
+            return max(left_prev, right_prev), i
+        if galloping and d != -last:
+            i += d * step
+            step, last = step * 2, d
+            if lo <= i <= hi:
                 continue
-            denom = max(st[k].std, epsilon)
-            z[k] = (float(x) - st[k].mean) / denom
-        return z
\ No newline at end of file
+        galloping = False
+        i = (lo + hi) // 2
+
+
+class _BlockedSorted:
+    """
+    Sorted multiset of floats kept as a list of sorted blocks of at most
+    2 * load values, with each block's max for bisecting to a block.
+    add/remove cost two O(log N) bisects plus a shift inside one block
+    rather than the whole sequence. Positional access goes through the
+    blocks' start offsets, rebuilt (one C-level accumulate over the block
+    lengths) on the first lookup after a change, then a bisect. Blocks
+    split when they overflow and merge with a neighbour when they shrink
+    below load / 2.
+    """
+
+    def __init__(self, load: int = 1024) -> None:
+        self.load = max(4, int(load))
+        self._blocks: List[List[float]] = []
+        self._maxes: List[float] = []
+        self._starts: Optional[List[int]] = []
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def add(self, v: float) -> None:
+        self._len += 1
+        self._starts = None
+        blocks, maxes = self._blocks, self._maxes
+        if not blocks:
+            blocks.append([v])
+            maxes.append(v)
+            return
+        b = bisect_left(maxes, v)
+        if b == len(blocks):
+            b -= 1
+        blk = blocks[b]
+        insort(blk, v)
+        maxes[b] = blk[-1]
+        if len(blk) > 2 * self.load:
+            blocks[b:b + 1] = [blk[: self.load], blk[self.load:]]
+            maxes[b:b + 1] = [blk[self.load - 1], blk[-1]]
+
+    def remove(self, v: float) -> None:
+        """Remove one copy of v, which must be present."""
+        self._len -= 1
+        self._starts = None
+        blocks, maxes = self._blocks, self._maxes
+        b = bisect_left(maxes, v)
+        blk = blocks[b]
+        del blk[bisect_left(blk, v)]
+        if len(blk) >= self.load // 2 or len(blocks) == 1:
+            if blk:
+                maxes[b] = blk[-1]
+            else:
+                del blocks[b], maxes[b]
+            return
+        # fold the small block into a neighbour, splitting again if that overflows
+        if b == len(blocks) - 1:
+            b -= 1
+        merged = blocks[b] + blocks[b + 1]
+        if len(merged) > 2 * self.load:
+            half = len(merged) // 2
+            blocks[b:b + 2] = [merged[:half], merged[half:]]
+            maxes[b:b + 2] = [merged[half - 1], merged[-1]]
+        else:
+            blocks[b:b + 2] = [merged]
+            maxes[b:b + 2] = [merged[-1]]
+
+    def _offsets(self) -> List[int]:
+        starts = self._starts
+        if starts is None:
+            starts = self._starts = [0]
+            starts.extend(accumulate(map(len, self._blocks)))
+        return starts
+
+    def __getitem__(self, i: int) -> float:
+        if not 0 <= i < self._len:
+            raise IndexError(i)
+        starts = self._starts if self._starts is not None else self._offsets()
+        b = bisect_right(starts, i) - 1
+        return self._blocks[b][i - starts[b]]
+
+    def bisect_left(self, v: float) -> int:
+        b = bisect_left(self._maxes, v)
+        if b == len(self._blocks):
+            return self._len
+        return self._offsets()[b] + bisect_left(self._blocks[b], v)
+
+    def flat(self) -> Sequence[float]:
+        """Something indexable in sorted order: the block itself when there is only one."""
+        return self._blocks[0] if len(self._blocks) == 1 else self
+
+
+class MedianWindow:
+    """
+    Robust rolling stats: median and MAD per metric over the last N values.
+    Each metric keeps its ring of values plus the same values in sorted
+    order. Up to 2 * LOAD values that is a plain list (insort/del shift at
+    most a few thousand pointers, one memmove); larger windows use a
+    _BlockedSorted of LOAD-sized blocks, so an update is O(log N) bisects
+    plus a shift inside one block instead of the whole window. The
+    median is then two lookups and the MAD a k-th-of-two-sorted-lists
+    search warm-started from the previous tick's split, usually a few
+    lookups; memory stays at N values per metric. `scale` turns the MAD
+    into a std estimate (1.4826 for normal data).
+    """
+
+    LOAD = 1024
+
+    def __init__(self, size: int, scale: float = 1.4826):
+        self.size = max(3, int(size))
+        self.scale = float(scale)
+        self._ring: Dict[str, Deque[float]] = {}
+        self._sorted: Dict[str, Union[List[float], _BlockedSorted]] = {}
+        self._load = self.LOAD if self.size > 2 * self.LOAD else 0
+        self._hints: Dict[str, Tuple[int, int]] = {}  # last MAD split per key (see _kth_smallest)
+
+    def add(self, metrics: Dict[str, float]) -> None:
+        for k, v in metrics.items():
+            ring = self._ring.get(k)
+            if ring is None:
+                ring = self._ring[k] = deque()
+                self._sorted[k] = _BlockedSorted(self._load) if self._load else []
+            srt = self._sorted[k]
+            v = float(v)
+            if self._load:
+                if len(ring) >= self.size:
+                    srt.remove(ring.popleft())
+                srt.add(v)
+            else:
+                if len(ring) >= self.size:
+                    del srt[bisect_left(srt, ring.popleft())]
+                insort(srt, v)
+            ring.append(v)
+
+    def count(self) -> int:
+        if not self._ring:
+            return 0
+        return min(len(r) for r in self._ring.values())
+
+    def median_mad(self, key: str) -> Tuple[float, float]:
+        srt = self._sorted.get(key)
+        if not srt:
+            return 0.0, 0.0
+        blocked = isinstance(srt, _BlockedSorted)
+        a = srt.flat() if blocked else srt
+        n = len(a)
+        h = n // 2
+        hint_lo, hint_hi = self._hints.get(key, (-1, -1))
+        if n % 2:
+            med = a[h]
+            p = srt.bisect_left(med) if blocked else bisect_left(a, med)
+            mad, i = _kth_smallest(a, p, med, h, hint_hi)
+            self._hints[key] = (i, i)
+        else:
+            med = (a[h - 1] + a[h]) / 2.0
+            p = srt.bisect_left(med) if blocked else bisect_left(a, med)
+            lower, i_lo = _kth_smallest(a, p, med, h - 1, hint_lo)
+            upper, i_hi = _kth_smallest(a, p, med, h, hint_hi)
+            mad = (lower + upper) / 2.0
+            self._hints[key] = (i_lo, i_hi)
+        return med, mad
+
+    def align(self, current: Dict[str, float]) -> Tuple[List[str], List[float], List[float], List[float]]:
+        """(keys, x, median, scale * MAD) for the keys of `current` that the window has seen."""
+        keys = [k for k in current if k in self._sorted]
+        center: List[float] = []
+        spread: List[float] = []
+        for k in keys:
+            med, mad = self.median_mad(k)
+            center.append(med)
+            spread.append(mad * self.scale)
+        return keys, [float(current[k]) for k in keys], center, spread
@@ -5,19 +5,55 @@ import os
 import time
 from typing import Any, Dict, Optional
 
+from core.columnar import ColumnarMetricsWriter
+from core.log_writer import AsyncLogWriter
+
 
 class TelemetryLogger:
-    def __init__(self, metrics_path: str = "logs/metrics.jsonl", incidents_path: str = "logs/incidents.jsonl"):
+    def __init__(
+        self,
+        metrics_path: str = "logs/metrics.jsonl",
+        incidents_path: str = "logs/incidents.jsonl",
+        writer: Optional[AsyncLogWriter] = None,
+        metrics_format: str = "jsonl",
+        stats_path: str = "logs/stats.jsonl",
+        columnar_flush_interval_s: Optional[float] = 60.0,
+    ):
         self.metrics_path = metrics_path
         self.incidents_path = incidents_path
+        self.stats_path = stats_path
+        self.writer = writer  # None = open/append/close per record
         os.makedirs(os.path.dirname(metrics_path), exist_ok=True)
+        # columnar: metrics_path is a folder of binary segments (see core.columnar)
+        self.columnar: Optional[ColumnarMetricsWriter] = None
+        if metrics_format == "columnar":
+            self.columnar = ColumnarMetricsWriter(folder=metrics_path, flush_interval_s=columnar_flush_interval_s)
+        elif metrics_format != "jsonl":
+            raise ValueError(f"unknown metrics format: {metrics_format}")
 
     def log_metric(self, record: Dict[str, Any]) -> None:
         record = {"ts": time.time(), **record}
-        with open(self.metrics_path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(record) + "\n")
+        if self.columnar is not None:
+            self.columnar.log_metric(record)
+            return
+        self._write(self.metrics_path, json.dumps(record))
 
     def log_incident(self, record: Dict[str, Any]) -> None:
         record = {"ts": time.time(), **record}
-        with open(self.incidents_path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(record) + "\n")
\ No newline at end of file
+        self._write(self.incidents_path, json.dumps(record))
+
+    def log_stats(self, record: Dict[str, Any]) -> None:
+        """Periodic agent self-metrics (pipeline queues, stage lag, ...)."""
+        record = {"ts": time.time(), **record}
+        self._write(self.stats_path, json.dumps(record))
+
+    def close(self) -> None:
+        if self.columnar is not None:
+            self.columnar.close()
+
+    def _write(self, path: str, line: str) -> None:
+        if self.writer is not None:
+            self.writer.write(path, line)
+            return
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
\ No newline at end of file
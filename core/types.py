@@ -1,7 +1,7 @@
 
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 
 
 @dataclass
@@ -41,6 +41,9 @@ class AnalysisReport:
     anomaly: AnomalyReport
     hypotheses: List[Hypothesis]
     summary: str
+    signature: str = ""
+    memory_stats: Dict[str, Tuple[float, float, float]] = field(default_factory=dict)  # action -> (succ, total, rate)
+    memory_versions: Optional[Dict[str, int]] = None  # MemoryStore.versions(signature) the stats were read at
 
 
 @dataclass
@@ -59,8 +62,9 @@ class ActionResult:
     action: str
     success: bool
     outcome: str
-    changed: Dict[str, Any] = field(default_factory=dict)
+    changed: Dict[str, Any] = field(default_factory=dict)  # new absolute values
     latency_ms: float = 0.0
+    delta: Dict[str, float] = field(default_factory=dict)    # increments, e.g. {"replicas": 1}
 
 
 @dataclass
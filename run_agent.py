@@ -1,19 +1,29 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import os
 import time
-import uuid
 from dataclasses import dataclass
-from typing import Dict, Any
+from concurrent.futures import Future
+from typing import Dict, Any, List, Optional, Set, Tuple
 
 from simulation.simulator import Simulator
 
 from core.logger import ActionLogger
-from core.memory import MemoryStore
-from core.config import MonitorConfig, AnalystConfig, PlannerConfig, ExecutorConfig
+from core.memory import MemoryStore, build_memory
+from core.decision_cache import DecisionCache
+from core.histogram import StageTimings
+from core.incidents import CLOSED, NEEDS_DECISION, IncidentTracker, TrackedIncident
+from core.profiling import Profiling
+from core.config import (
+    MonitorConfig, AnalystConfig, PlannerConfig, ExecutorConfig, IncidentConfig, LoggingConfig, MemoryConfig,
+)
+from core.log_writer import AsyncLogWriter
 from core.telemetry import TelemetryLogger
+from core.types import AnalysisReport, PlanDecision, ActionResult
 
-from agents.monitor import MonitorAgent
+from agents.monitor import AnomalyReport, MonitorAgent
 from agents.analyst import AnalystAgent
 from agents.planner import PlannerAgent
 from agents.executor import ExecutorAgent
@@ -37,7 +47,7 @@ class MetricPointAdapter:
         return {"cpu": self.cpu, "mem": self.mem, "lat_ms": self.lat_ms, "err": self.err}
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     p = argparse.ArgumentParser()
     p.add_argument(
         "--scenario",
@@ -48,49 +58,188 @@ def parse_args() -> argparse.Namespace:
     )
     p.add_argument("--interval", type=float, default=1.0, help="Seconds between ticks")
     p.add_argument("--window", type=int, default=None, help="Override monitor rolling window size")
-    return p.parse_args()
-
-
-def main() -> None:
-    args = parse_args()
-
-    # --- Simulator ---
-    sim = Simulator(scenario=args.scenario)
-
-    # --- Core services ---
-    logger = ActionLogger(path="logs/actions.jsonl")
-    memory = MemoryStore(path="memory/aiops_memory.jsonl")
-    telemetry = TelemetryLogger(metrics_path="logs/metrics.jsonl", incidents_path="logs/incidents.jsonl")
+    p.add_argument(
+        "--log-policy",
+        type=str,
+        default="block",
+        choices=["block", "drop_oldest"],
+        help="What log writes do when the background writer's queue is full",
+    )
+    p.add_argument(
+        "--telemetry-format",
+        type=str,
+        default="jsonl",
+        choices=["jsonl", "columnar"],
+        help="jsonl -> logs/metrics.jsonl, columnar -> binary segments in logs/metrics_col/",
+    )
+    p.add_argument(
+        "--executor-backend",
+        type=str,
+        default="local",
+        choices=["local", "simulated"],
+        help="local applies actions immediately; simulated makes them slow and occasionally fail",
+    )
+    p.add_argument(
+        "--memory-backend",
+        type=str,
+        default="jsonl",
+        choices=["jsonl", "sqlite"],
+        help="jsonl -> memory/aiops_memory.jsonl, sqlite -> memory/aiops_memory.db (shareable between agents)",
+    )
+    p.add_argument("--action-timeout", type=float, default=None, help="Cancel actions running longer than this (s)")
+    p.add_argument("--ticks", type=int, default=0, help="Stop after this many ticks (0 = run forever)")
+    p.add_argument("--queue-size", type=int, default=8, help="Capacity of each queue between pipeline stages")
+    p.add_argument("--stats-every", type=int, default=30, help="Ticks between pipeline stats records (0 = off)")
+    p.add_argument("--quiet-ticks", type=int, default=None,
+                   help="Normal ticks before an open incident is resolved (default: IncidentConfig)")
+    p.add_argument("--reanalyze-ticks", type=int, default=None,
+                   help="Re-plan an incident still anomalous this many ticks after its last decision (0 = never)")
+    p.add_argument("--decision-cache", type=int, default=1024,
+                   help="Entries in the analysis/plan cache keyed by signature and memory version (0 = off)")
+    p.add_argument("--no-timings", action="store_true", help="Don't record per-stage latency histograms")
+    p.add_argument("--profile-ticks", type=int, default=0, help="cProfile the first N ticks, one .pstats per stage")
+    p.add_argument("--profile-sample", type=float, default=0.0,
+                   help="Run the sampling profiler for this many seconds from startup (collapsed stacks)")
+    p.add_argument("--profile-interval-ms", type=float, default=5.0, help="Sampling profiler interval (CPU time)")
+    p.add_argument("--profile-signals", action="store_true",
+                   help="SIGUSR1 toggles the sampling profiler, SIGUSR2 cProfiles the next --profile-signal-ticks ticks")
+    p.add_argument("--profile-signal-ticks", type=int, default=200, help="Ticks captured per SIGUSR2")
+    p.add_argument("--profile-dir", type=str, default="logs/profiles", help="Where profiles are written")
+    return p.parse_args(argv)
 
-    # --- Agent configs ---
-    mon_cfg = MonitorConfig()
-    if args.window is not None:
-        mon_cfg.window_size = args.window
 
-    analyst_cfg = AnalystConfig()
-    planner_cfg = PlannerConfig()
-    exec_cfg = ExecutorConfig()
+@dataclass
+class Tick:
+    seq: int
+    point: MetricPointAdapter
+    fault_active: bool
 
-    # --- Agents ---
-    monitor = MonitorAgent(mon_cfg)
-    analyst = AnalystAgent(analyst_cfg, memory)
-    planner = PlannerAgent(planner_cfg, memory)
-    executor = ExecutorAgent(exec_cfg, logger)
 
-    # --- State we allow executor to mutate (simulated "cluster") ---
-    cluster_state: Dict[str, Any] = {
-        "replicas": 2,
-        "version": "v1",
-        "service_health": "ok",
-    }
+@dataclass
+class Incident:
+    """One decision for a tracked incident: the tick that triggered it and what followed."""
+    incident_id: str
+    tick: Tick
+    anomaly: AnomalyReport
+    tracked: Optional[TrackedIncident] = None
+    transition: str = "opened"
+    signature: Optional[str] = None
+    analysis: Optional[AnalysisReport] = None
+    decision: Optional[PlanDecision] = None
+    result: Optional[ActionResult] = None
 
-    print("Starting AIOps loop...")
-    if args.scenario:
-        print(f"Scenario enabled: {args.scenario}")
 
-    while True:
-        # 1) OBSERVE
-        tick = sim.step(cluster_state=cluster_state)
+@dataclass
+class StageStats:
+    processed: int = 0
+    lag_sum: float = 0.0  # seconds from tick to this stage picking the item up
+    lag_max: float = 0.0
+
+    def record(self, lag: float) -> None:
+        self.processed += 1
+        self.lag_sum += lag
+        self.lag_max = max(self.lag_max, lag)
+
+    def export(self) -> Dict[str, Any]:
+        out = {
+            "processed": self.processed,
+            "lag_ms_avg": (self.lag_sum / self.processed * 1000) if self.processed else 0.0,
+            "lag_ms_max": self.lag_max * 1000,
+        }
+        self.processed, self.lag_sum, self.lag_max = 0, 0.0, 0.0
+        return out
+
+
+class AgentPipeline:
+    """
+    observe -> detect -> analyze/plan -> act -> learn as asyncio stages
+    joined by bounded queues. Ingest runs on a fixed cadence (deadlines,
+    not sleep-after-work); detection never waits on remediation: when the
+    analyze queue is full the anomaly is logged and dropped from the
+    remediation path. Actions run in a worker thread.
+    """
+
+    STAGES = ("ingest", "detect", "decide", "act", "learn")
+
+    def __init__(
+        self,
+        args: argparse.Namespace,
+        sim: Simulator,
+        telemetry: TelemetryLogger,
+        memory: MemoryStore,
+        monitor: MonitorAgent,
+        analyst: AnalystAgent,
+        planner: PlannerAgent,
+        executor: ExecutorAgent,
+        cluster_state: Dict[str, Any],
+        incidents: Optional[IncidentTracker] = None,
+        profiling: Optional[Profiling] = None,
+    ):
+        self.args = args
+        self.sim = sim
+        self.telemetry = telemetry
+        self.memory = memory
+        self.monitor = monitor
+        self.analyst = analyst
+        self.planner = planner
+        self.executor = executor
+        self.cluster_state = cluster_state
+        # coalesces anomalous ticks; only opens / new signatures / re-plans reach decide
+        self.incidents = incidents if incidents is not None else IncidentTracker()
+
+        size = max(1, args.queue_size)
+        self.q_detect: asyncio.Queue = asyncio.Queue(maxsize=size)
+        self.q_decide: asyncio.Queue = asyncio.Queue(maxsize=size)
+        self.q_act: asyncio.Queue = asyncio.Queue(maxsize=size)
+        self.q_learn: asyncio.Queue = asyncio.Queue(maxsize=size)
+        self.stats = {name: StageStats() for name in self.STAGES}
+        self.dropped = 0      # anomalies not remediated because decide was backed up
+        self.late_ticks = 0   # ticks started more than one interval late
+        self.in_flight: Set[asyncio.Task] = set()
+        # per-stage durations (sim_step, telemetry, observe, detect, analyze, plan, execute, memory_append)
+        self.timings: Optional[StageTimings] = None if getattr(args, "no_timings", False) else StageTimings()
+
+        # profiling hooks: tag each stage (and incident) and route it through cProfile when armed
+        self.profiling = profiling
+        if profiling is not None:
+            self.observe = profiling.wrap("ingest", self.observe)
+            self.detect_one = profiling.wrap("detect", self.detect_one)
+            self.decide_one = profiling.wrap("decide", self.decide_one)
+            self.record_result = profiling.wrap("act", self.record_result)
+            self.learn_one = profiling.wrap("learn", self.learn_one)
+
+    async def run(self) -> None:
+        await asyncio.gather(self.ingest(), self.detect(), self.decide(), self.act(), self.learn())
+
+    async def ingest(self) -> None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        seq = 0
+        while not self.args.ticks or seq < self.args.ticks:
+            now = loop.time()
+            self.stats["ingest"].record(max(0.0, now - deadline))
+            if now - deadline > self.args.interval:
+                self.late_ticks += 1
+                deadline = now
+
+            # 1) OBSERVE
+            seq += 1
+            await self.q_detect.put(self.observe(seq))
+            if self.profiling is not None:
+                self.profiling.tick()
+
+            if self.args.stats_every and seq % self.args.stats_every == 0:
+                self.report_stats(seq)
+
+            deadline += self.args.interval
+            await asyncio.sleep(max(0.0, deadline - loop.time()))
+        await self.q_detect.put(None)
+
+    def observe(self, seq: int) -> Tick:
+        cluster_state = self.cluster_state
+        t0 = time.perf_counter_ns()
+        tick = self.sim.step(cluster_state=cluster_state)
+        t1 = time.perf_counter_ns()
 
         cpu = float(tick.cpu)
         mem = float(tick.mem)
@@ -110,11 +259,10 @@ def main() -> None:
             replicas=int(cluster_state["replicas"]),
             version=str(cluster_state["version"]),
         )
-
-        latest_metrics = point.metrics
+        fault_active = self.sim.injector.active()
 
         # Structured tick logging (replayable)
-        telemetry.log_metric(
+        self.telemetry.log_metric(
             {
                 "cpu": cpu,
                 "mem": mem,
@@ -122,9 +270,14 @@ def main() -> None:
                 "err": err,
                 "replicas": cluster_state["replicas"],
                 "version": cluster_state["version"],
-                "scenario": args.scenario,
+                "scenario": self.args.scenario,
+                "fault_active": fault_active,
             }
         )
+        if self.timings is not None:
+            t2 = time.perf_counter_ns()
+            self.timings.record("sim_step", t1 - t0)
+            self.timings.record("telemetry", t2 - t1)
 
         # Print baseline metrics
         print(
@@ -132,10 +285,88 @@ def main() -> None:
             f"LAT(ms)={lat_ms:.0f}  ERR={err:.0f}  "
             f"replicas={cluster_state['replicas']}  version={cluster_state['version']}"
         )
+        return Tick(seq=seq, point=point, fault_active=fault_active)
+
+    async def detect(self) -> None:
+        while True:
+            tick = await self.q_detect.get()
+            if tick is None:
+                await self.q_decide.put(None)
+                return
+            self.stats["detect"].record(time.time() - tick.point.ts)
+            incident = self.detect_one(tick)
+            if incident is not None:
+                try:
+                    self.q_decide.put_nowait(incident)
+                except asyncio.QueueFull:
+                    self.dropped += 1
+                    self.incidents.dropped(incident.tracked, incident.signature)
+                    print(f"[PIPELINE] remediation backed up; incident {incident.incident_id} not remediated")
+            print("-" * 70)
+
+    async def decide(self) -> None:
+        while True:
+            incident = await self.q_decide.get()
+            if incident is None:
+                await self.q_act.put(None)
+                return
+            self.stats["decide"].record(time.time() - incident.tick.point.ts)
+            await self.q_act.put(self.decide_one(incident))
+
+    async def act(self) -> None:
+        while True:
+            incident = await self.q_act.get()
+            if incident is None:
+                if self.in_flight:
+                    await asyncio.gather(*self.in_flight)
+                await self.q_learn.put(None)
+                return
+            self.stats["act"].record(time.time() - incident.tick.point.ts)
+
+            # 5) ACT (on the executor's worker pool; completion feeds learn).
+            # Workers get a copy; result.changed / result.delta are applied back on this thread.
+            fut = self.executor.submit(incident.decision, cluster_state=dict(self.cluster_state))
+            task = asyncio.create_task(self.completed(incident, fut))
+            self.in_flight.add(task)
+            task.add_done_callback(self.in_flight.discard)
+
+    async def completed(self, incident: Incident, fut: "Future[ActionResult]") -> None:
+        self.record_result(incident, await asyncio.wrap_future(fut))
+        await self.q_learn.put(incident)
+
+    async def learn(self) -> None:
+        while True:
+            incident = await self.q_learn.get()
+            if incident is None:
+                return
+            self.stats["learn"].record(time.time() - incident.tick.point.ts)
+            self.learn_one(incident)
+
+    # --- per-item stage work (synchronous; also used for headless runs) ---
+
+    def run_tick(self, seq: int) -> Optional[Incident]:
+        """One tick through every stage inline, executing actions synchronously."""
+        incident = self.detect_one(self.observe(seq))
+        if incident is not None:
+            self.decide_one(incident)
+            self.record_result(incident, self.executor.execute(incident.decision, cluster_state=dict(self.cluster_state)))
+            self.learn_one(incident)
+        if self.profiling is not None:
+            self.profiling.tick()
+        return incident
+
+    def detect_one(self, tick: Tick) -> Optional[Incident]:
+        point = tick.point
 
         # 2) DETECT
-        monitor.observe(point)
-        anomaly = monitor.detect(point)
+        t0 = time.perf_counter_ns()
+        self.monitor.observe(point)
+        t1 = time.perf_counter_ns()
+        anomaly = self.monitor.detect(point)
+        if self.timings is not None:
+            t2 = time.perf_counter_ns()
+            self.timings.record("observe", t1 - t0)
+            self.timings.record("detect", t2 - t1)
 
         if getattr(anomaly, "reason", None) == "warming_up":
             print("[MONITOR] warming up...")
@@ -149,94 +380,272 @@ def main() -> None:
                 f"abnormal={abnormal_keys} reason={getattr(anomaly, 'reason', 'n/a')}"
             )
 
-        if anomaly.is_anomaly:
-            incident_id = str(uuid.uuid4())[:8]
-
-            telemetry.log_incident(
-                {
-                    "incident_id": incident_id,
-                    "stage": "detect",
-                    "anomaly_score": anomaly.anomaly_score,
-                    "abnormal_metrics": list(getattr(anomaly, "abnormal_metrics", {}).keys()),
-                    "reason": getattr(anomaly, "reason", None),
-                    "cluster_state_before": dict(cluster_state),
-                }
-            )
+        signature = AnalystAgent.signature(anomaly) if anomaly.is_anomaly else None
+        tracked, transition = self.incidents.update(tick.seq, signature)
+        if transition == CLOSED:
+            print(f"[INCIDENT] {tracked.incident_id} resolved after {tracked.anomalous_ticks} anomalous ticks")
+            self.telemetry.log_incident({"stage": "resolve", **tracked.summary()})
+        if transition not in NEEDS_DECISION:
+            return None  # normal tick, or coalesced into the open incident
+
+        incident = Incident(
+            incident_id=tracked.incident_id,
+            tick=tick,
+            anomaly=anomaly,
+            tracked=tracked,
+            transition=transition,
+            signature=signature,
+        )
+        print(f"[INCIDENT] {incident.incident_id} {transition} signature={signature}")
 
-            # 3) ANALYZE
-            analysis = analyst.analyze(anomaly, latest=latest_metrics)
-            top = analysis.hypotheses[0]
-            print(f"[ANALYST] {analysis.summary}")
-            print(f"[ANALYST] top={top.name} likelihood={top.likelihood:.2f} evidence={top.evidence}")
-
-            telemetry.log_incident(
-                {
-                    "incident_id": incident_id,
-                    "stage": "analyze",
-                    "top_hypothesis": top.name,
-                    "likelihood": top.likelihood,
-                    "evidence": top.evidence,
-                }
-            )
+        self.telemetry.log_incident(
+            {
+                "incident_id": incident.incident_id,
+                "stage": "detect",
+                "transition": transition,
+                "signature": signature,
+                "anomaly_score": anomaly.anomaly_score,
+                "abnormal_metrics": list(getattr(anomaly, "abnormal_metrics", {}).keys()),
+                "reason": getattr(anomaly, "reason", None),
+                "cluster_state_before": dict(self.cluster_state),
+            }
+        )
+        return incident
+
+    def decide_one(self, incident: Incident) -> Incident:
+        incident_id = incident.incident_id
+        if incident.tracked is not None:
+            self.incidents.mark_decided(incident.tracked, incident.tick.seq)
+
+        # 3) ANALYZE
+        t0 = time.perf_counter_ns()
+        analysis = self.analyst.analyze(incident.anomaly, latest=incident.tick.point.metrics)
+        t1 = time.perf_counter_ns()
+        top = analysis.hypotheses[0]
+        print(f"[ANALYST] {analysis.summary}")
+        print(f"[ANALYST] top={top.name} likelihood={top.likelihood:.2f} evidence={top.evidence}")
+
+        self.telemetry.log_incident(
+            {
+                "incident_id": incident_id,
+                "stage": "analyze",
+                "top_hypothesis": top.name,
+                "likelihood": top.likelihood,
+                "evidence": top.evidence,
+            }
+        )
 
-            # 4) DECIDE
-            decision = planner.plan(analysis)
-            print(
-                f"[PLANNER] action={decision.action} confidence={decision.confidence:.2f} "
-                f"risk={decision.risk:.2f} rationale={decision.rationale}"
-            )
+        # 4) DECIDE
+        t2 = time.perf_counter_ns()
+        decision = self.planner.plan(analysis)
+        if self.timings is not None:
+            t3 = time.perf_counter_ns()
+            self.timings.record("analyze", t1 - t0)
+            self.timings.record("plan", t3 - t2)
+        print(
+            f"[PLANNER] action={decision.action} confidence={decision.confidence:.2f} "
+            f"risk={decision.risk:.2f} rationale={decision.rationale}"
+        )
 
-            telemetry.log_incident(
-                {
-                    "incident_id": incident_id,
-                    "stage": "decide",
-                    "action": decision.action,
+        self.telemetry.log_incident(
+            {
+                "incident_id": incident_id,
+                "stage": "decide",
+                "action": decision.action,
+                "confidence": decision.confidence,
+                "risk": decision.risk,
+                "rationale": decision.rationale,
+            }
+        )
+
+        incident.analysis = analysis
+        incident.decision = decision
+        return incident
+
+    def record_result(self, incident: Incident, result: ActionResult) -> None:
+        # only the loop thread writes cluster_state (observe syncs it from the simulator)
+        if result.changed:
+            self.cluster_state.update(result.changed)
+        for key, step in result.delta.items():
+            # increments, not values: two scales that ran on copies both count
+            self.cluster_state[key] = self.cluster_state.get(key, 0) + step
+        if self.timings is not None and result.latency_ms:
+            self.timings.record("execute", int(result.latency_ms * 1e6))
+        print(
+            f"[EXECUTOR] action={result.action} success={result.success} outcome={result.outcome} "
+            f"latency_ms={result.latency_ms:.0f}"
+        )
+
+        self.telemetry.log_incident(
+            {
+                "incident_id": incident.incident_id,
+                "stage": "act",
+                "action": result.action,
+                "success": result.success,
+                "outcome": result.outcome,
+                "latency_ms": result.latency_ms,
+                "cluster_state_after": dict(self.cluster_state),
+            }
+        )
+
+        incident.result = result
+        if incident.tracked is not None and result.success and result.action != "noop":
+            self.incidents.mitigating(incident.tracked, result.action)
+
+    def learn_one(self, incident: Incident) -> None:
+        anomaly, decision, result = incident.anomaly, incident.decision, incident.result
+
+        # 6) LEARN
+        sig = incident.analysis.signature or AnalystAgent.signature(anomaly)
+        t0 = time.perf_counter_ns()
+        self.memory.append(
+            signature=sig,
+            action=result.action,
+            success=result.success,
+            outcome=result.outcome,
+            metadata={
+                "incident_id": incident.incident_id,
+                "scenario": self.args.scenario,
+                "anomaly_score": anomaly.anomaly_score,
+                "abnormal_metrics": getattr(anomaly, "abnormal_metrics", {}),
+                "decision": {
                     "confidence": decision.confidence,
                     "risk": decision.risk,
                     "rationale": decision.rationale,
-                }
+                },
+                "cluster_state_after": dict(self.cluster_state),
+            },
+        )
+        if self.timings is not None:
+            self.timings.record("memory_append", time.perf_counter_ns() - t0)
+        print(f"[MEMORY] stored signature={sig} action={result.action} success={result.success}")
+
+    def report_stats(self, seq: int) -> None:
+        queues = {
+            "detect": self.q_detect.qsize(),
+            "decide": self.q_decide.qsize(),
+            "act": self.q_act.qsize(),
+            "learn": self.q_learn.qsize(),
+        }
+        stages = {name: st.export() for name, st in self.stats.items()}
+        self.telemetry.log_stats(
+            {
+                "kind": "pipeline",
+                "tick": seq,
+                "queue_depth": queues,
+                "stages": stages,
+                "dropped": self.dropped,
+                "late_ticks": self.late_ticks,
+                "actions_in_flight": self.executor.in_flight(),
+                "incidents": dict(self.incidents.counters),
+                "open_incidents": len(self.incidents.active),
+                "decision_cache": self.analyst.cache.stats() if self.analyst.cache is not None else None,
+            }
+        )
+        lags = " ".join(f"{name}={st['lag_ms_max']:.1f}" for name, st in stages.items())
+        print(f"[PIPELINE] queues={queues} max_lag_ms {lags} dropped={self.dropped} late_ticks={self.late_ticks}")
+
+        if self.timings is not None:
+            record = self.timings.export()
+            self.telemetry.log_stats({"tick": seq, **record})
+            summary = " ".join(
+                f"{name}={st['p50_us']:.0f}/{st['p99_us']:.0f}" for name, st in record["stages"].items()
             )
+            print(f"[TIMINGS] p50/p99_us {summary}")
 
-            # 5) ACT
-            result = executor.execute(decision, cluster_state=cluster_state)
-            print(f"[EXECUTOR] action={result.action} success={result.success} outcome={result.outcome}")
-
-            telemetry.log_incident(
-                {
-                    "incident_id": incident_id,
-                    "stage": "act",
-                    "action": result.action,
-                    "success": result.success,
-                    "outcome": result.outcome,
-                    "cluster_state_after": dict(cluster_state),
-                }
-            )
 
-            # 6) LEARN
-            sig = AnalystAgent.signature(anomaly)
-            memory.append(
-                signature=sig,
-                action=result.action,
-                success=result.success,
-                outcome=result.outcome,
-                metadata={
-                    "incident_id": incident_id,
-                    "scenario": args.scenario,
-                    "anomaly_score": anomaly.anomaly_score,
-                    "abnormal_metrics": getattr(anomaly, "abnormal_metrics", {}),
-                    "decision": {
-                        "confidence": decision.confidence,
-                        "risk": decision.risk,
-                        "rationale": decision.rationale,
-                    },
-                    "cluster_state_after": dict(cluster_state),
-                },
-            )
-            print(f"[MEMORY] stored signature={sig} action={result.action} success={result.success}")
+def build_pipeline(args: argparse.Namespace) -> Tuple[AgentPipeline, AsyncLogWriter]:
+    """Wire simulator, services and agents (logs/ and memory/ under the cwd)."""
+    # --- Simulator ---
+    sim = Simulator(scenario=args.scenario)
+
+    # --- Core services ---
+    writer = AsyncLogWriter(LoggingConfig(policy=args.log_policy))
+    logger = ActionLogger(path="logs/actions.jsonl", writer=writer)
+    memory = build_memory(MemoryConfig(backend=args.memory_backend))
+    telemetry = TelemetryLogger(
+        metrics_path="logs/metrics_col" if args.telemetry_format == "columnar" else "logs/metrics.jsonl",
+        incidents_path="logs/incidents.jsonl",
+        writer=writer,
+        metrics_format=args.telemetry_format,
+    )
+
+    # --- Agent configs ---
+    mon_cfg = MonitorConfig()
+    if args.window is not None:
+        mon_cfg.window_size = args.window
+
+    analyst_cfg = AnalystConfig()
+    planner_cfg = PlannerConfig()
+    exec_cfg = ExecutorConfig(backend=args.executor_backend)
+    incident_cfg = IncidentConfig()
+    if args.quiet_ticks is not None:
+        incident_cfg.quiet_ticks = args.quiet_ticks
+    if args.reanalyze_ticks is not None:
+        incident_cfg.reanalyze_ticks = args.reanalyze_ticks
+    if args.action_timeout is not None:
+        exec_cfg.action_timeout_s = args.action_timeout
+
+    # --- Agents ---
+    monitor = MonitorAgent(mon_cfg)
+    cache = DecisionCache(args.decision_cache) if args.decision_cache > 0 else None
+    analyst = AnalystAgent(analyst_cfg, memory, cache)
+    planner = PlannerAgent(planner_cfg, memory, cache)
+    executor = ExecutorAgent(exec_cfg, logger)
+    incidents = IncidentTracker(incident_cfg.quiet_ticks, incident_cfg.reanalyze_ticks)
+
+    # --- State we allow executor to mutate (simulated "cluster") ---
+    cluster_state: Dict[str, Any] = {
+        "replicas": 2,
+        "version": "v1",
+        "service_health": "ok",
+    }
+
+    # --- Profiling (only wired in when asked for) ---
+    profiling = None
+    if args.profile_ticks or args.profile_sample or args.profile_signals:
+        profiling = Profiling(
+            out_dir=args.profile_dir,
+            interval_s=args.profile_interval_ms / 1000.0,
+            signal_ticks=args.profile_signal_ticks,
+        )
+
+    pipeline = AgentPipeline(
+        args, sim, telemetry, memory, monitor, analyst, planner, executor, cluster_state, incidents, profiling
+    )
+    return pipeline, writer
+
+
+def main() -> None:
+    args = parse_args()
+    pipeline, writer = build_pipeline(args)
+
+    print("Starting AIOps loop...")
+    if args.scenario:
+        print(f"Scenario enabled: {args.scenario}")
 
-        print("-" * 70)
-        time.sleep(args.interval)
+    profiling = pipeline.profiling
+    if profiling is not None:
+        if args.profile_signals:
+            profiling.install_signals()
+            print(f"[PROFILE] pid={os.getpid()}: SIGUSR1 toggles sampling, SIGUSR2 profiles {args.profile_signal_ticks} ticks")
+        profiling.arm_ticks(args.profile_ticks)
+        if args.profile_sample:
+            profiling.start_sampling(args.profile_sample)
+
+    try:
+        asyncio.run(pipeline.run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if profiling is not None:
+            profiling.close()
+        pipeline.executor.shutdown(wait=True, cancel_running=True)
+        pipeline.memory.close()
+        pipeline.telemetry.close()
+        writer.close()
+        print(f"[LOGS] {writer.stats()}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
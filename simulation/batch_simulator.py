@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+from simulation.failure_injector import SCENARIO_WINDOWS
+
+
+METRICS = ("cpu", "mem", "lat_ms", "err")
+
+
+def _regulate(x0: np.ndarray, steps: np.ndarray, lo: float, hi: Optional[float]) -> np.ndarray:
+    """
+    Random walk x0 + cumsum(steps) along axis 0, kept inside [lo, hi] by
+    the Skorokhod (regulator) map: push the path up by the running max of
+    its undershoot, then down by the running max of its overshoot. With a
+    single barrier this equals clamping after every step exactly; with two
+    it is a close approximation (a clamp on one side is not undone by a
+    later clamp on the other).
+    """
+    s = x0 + np.cumsum(steps, axis=0)
+    s += np.maximum(np.maximum.accumulate(lo - s, axis=0), 0.0)
+    if hi is not None:
+        s -= np.maximum(np.maximum.accumulate(s - hi, axis=0), 0.0)
+        np.clip(s, lo, hi, out=s)
+    return s
+
+
+@dataclass
+class SimBatch:
+    """T ticks x N services of metrics; every metric array has shape (T, N)."""
+    ts: np.ndarray               # (T,)
+    t: np.ndarray                # (T,) simulator tick numbers
+    services: List[str]
+    cpu: np.ndarray
+    mem: np.ndarray
+    lat_ms: np.ndarray
+    err: np.ndarray
+    fault_active: np.ndarray     # (T, N) bool
+    replicas: np.ndarray         # (N,)
+    versions: np.ndarray         # (N,) object
+    scenarios: np.ndarray        # (N,) object, None = healthy
+
+    @property
+    def shape(self):
+        return self.cpu.shape
+
+    def stack(self) -> np.ndarray:
+        """(T, N, 4) array in METRICS order."""
+        return np.stack([self.cpu, self.mem, self.lat_ms, self.err], axis=-1)
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """metrics.jsonl-style records, tick-major, with a service field."""
+        cols = [a.tolist() for a in (self.cpu, self.mem, self.lat_ms, self.err, self.fault_active)]
+        replicas = self.replicas.tolist()
+        for i, ts in enumerate(self.ts.tolist()):
+            cpu, mem, lat, err, fault = (c[i] for c in cols)
+            for j, svc in enumerate(self.services):
+                yield {
+                    "ts": ts,
+                    "service": svc,
+                    "cpu": cpu[j],
+                    "mem": mem[j],
+                    "lat_ms": lat[j],
+                    "err": err[j],
+                    "replicas": replicas[j],
+                    "version": self.versions[j],
+                    "scenario": self.scenarios[j],
+                    "fault_active": fault[j],
+                }
+
+    def write_jsonl(self, path: str) -> int:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        n = 0
+        with open(path, "w", encoding="utf-8") as f:
+            for rec in self.iter_records():
+                f.write(json.dumps(rec) + "\n")
+                n += 1
+        return n
+
+
+class BatchSimulator:
+    """
+    Simulator for many services at once: generate(T) returns T ticks for
+    all N services as arrays, drawn from a seeded numpy Generator.
+
+    Same baseline walk and scenarios as Simulator / FailureInjector, with
+    two deliberate differences that make it vectorizable:
+    - bounds are applied with the Skorokhod map (see _regulate), not a
+      clamp per step;
+    - fault effects are added on top of the baseline walk instead of
+      being fed back into it, so metrics return to baseline as soon as a
+      fault window (SCENARIO_WINDOWS) ends.
+    Each service's scenario window starts `offset` ticks later than in
+    Simulator. Replicas, version and restarts are per-service state that
+    callers change between generate() calls.
+    """
+
+    def __init__(
+        self,
+        n_services: int,
+        scenarios: Union[None, str, Sequence[Optional[str]]] = None,
+        offsets: Union[None, int, Sequence[int]] = None,
+        max_offset: int = 0,
+        replicas: int = 2,
+        version: str = "v3",
+        seed: Optional[int] = None,
+        interval_s: float = 1.0,
+        start_ts: Optional[float] = None,
+    ):
+        n = int(n_services)
+        self.rng = np.random.default_rng(seed)
+        self.services = [f"svc-{i:05d}" for i in range(n)]
+        self.interval_s = float(interval_s)
+        self.start_ts = time.time() if start_ts is None else float(start_ts)
+
+        if scenarios is None or isinstance(scenarios, str):
+            scenarios = [scenarios] * n
+        if len(scenarios) != n:
+            raise ValueError("need one scenario per service")
+        for s in scenarios:
+            if s is not None and s not in SCENARIO_WINDOWS:
+                raise ValueError(f"unknown scenario: {s}")
+        self.scenarios = np.array(list(scenarios), dtype=object)
+
+        if offsets is None:
+            self.offsets = self.rng.integers(0, int(max_offset) + 1, size=n)
+        else:
+            self.offsets = np.broadcast_to(np.asarray(offsets, dtype=np.int64), (n,)).copy()
+
+        self.replicas = np.full(n, int(replicas), dtype=np.int64)
+        self.versions = np.full(n, version, dtype=object)
+        self._restart_until = np.zeros(n, dtype=np.int64)  # restart effect through this tick
+
+        self.t = 0  # ticks generated so far
+        self._cpu = np.full(n, 35.0)
+        self._mem = np.full(n, 40.0)
+        self._lat = np.full(n, 120.0)
+        self._err = np.full(n, 1.0)
+
+    @property
+    def n_services(self) -> int:
+        return len(self.services)
+
+    def restart(self, services: Union[int, Sequence[int], np.ndarray]) -> None:
+        """Brief instability (lat +40, err +1) up to the next tick divisible by 3, as in Simulator."""
+        nxt = self.t + 1
+        self._restart_until[services] = nxt + (-nxt) % 3
+
+    def generate(self, ticks: int) -> SimBatch:
+        T, n = int(ticks), self.n_services
+        rng = self.rng
+        t = np.arange(self.t + 1, self.t + T + 1)
+
+        # baseline random walks
+        cpu = _regulate(self._cpu, rng.uniform(-2.0, 2.0, (T, n)), 0.0, 100.0)
+        mem = _regulate(self._mem, rng.uniform(-1.5, 1.5, (T, n)), 0.0, 100.0)
+        lat = _regulate(self._lat, rng.uniform(-5.0, 5.0, (T, n)), 1.0, None)
+        err = _regulate(self._err, rng.uniform(-0.4, 0.4, (T, n)), 0.0, None)
+        self._cpu, self._mem, self._lat, self._err = cpu[-1].copy(), mem[-1].copy(), lat[-1].copy(), err[-1].copy()
+
+        # failure windows per service, shifted by its offset
+        fault = np.zeros((T, n), dtype=bool)
+        for name, (first, last) in SCENARIO_WINDOWS.items():
+            cols = np.flatnonzero(self.scenarios == name)
+            if not cols.size:
+                continue
+            local = t[:, None] - self.offsets[cols][None, :]
+            active = local >= first
+            if last is not None:
+                active &= local <= last
+            fault[:, cols] = active
+
+            if name == "cpu_spike":
+                cpu[:, cols] += np.where(active, 45.0 + rng.uniform(-5.0, 5.0, active.shape), 0.0)
+            elif name == "memory_leak":
+                mem[:, cols] += np.where(active, np.minimum(60.0, (local - first) * 2.0), 0.0)
+            elif name == "error_burst":
+                err[:, cols] += np.where(active, 20.0 + rng.uniform(-3.0, 3.0, active.shape), 0.0)
+            elif name == "network_latency":
+                lat[:, cols] += np.where(active, 250.0 + rng.uniform(-20.0, 20.0, active.shape), 0.0)
+
+        # replicas: more of them slightly lower cpu/err
+        extra = np.maximum(self.replicas - 1, 0)
+        if extra.any():
+            np.maximum(cpu - extra * 1.5, 0.0, out=cpu)
+            np.maximum(err - extra * 0.2, 0.0, out=err)
+
+        # restarts in progress
+        restarting = t[:, None] <= self._restart_until[None, :]
+        if restarting.any():
+            lat += restarting * 40.0
+            err += restarting * 1.0
+
+        self.t += T
+        return SimBatch(
+            ts=self.start_ts + (t - 1) * self.interval_s,
+            t=t,
+            services=self.services,
+            cpu=cpu,
+            mem=mem,
+            lat_ms=lat,
+            err=err,
+            fault_active=fault,
+            replicas=self.replicas.copy(),
+            versions=self.versions.copy(),
+            scenarios=self.scenarios,
+        )
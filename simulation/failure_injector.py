@@ -1,9 +1,18 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Optional
+from typing import Dict, Optional, Tuple
 import random
 
 
+# scenario -> (first, last) tick the fault affects metrics; last=None means until the end
+SCENARIO_WINDOWS: Dict[str, Tuple[int, Optional[int]]] = {
+    "cpu_spike": (20, 40),
+    "memory_leak": (15, None),
+    "error_burst": (25, 35),
+    "network_latency": (18, 45),
+}
+
+
 @dataclass
 class FailureState:
     scenario: Optional[str] = None
@@ -17,27 +26,32 @@ class FailureInjector:
     def step(self) -> None:
         self.state.t += 1
 
+    def active(self) -> bool:
+        """Whether the scenario is affecting metrics at the current tick (ground truth for replay)."""
+        window = SCENARIO_WINDOWS.get(self.state.scenario)
+        if window is None:
+            return False
+        first, last = window
+        t = self.state.t
+        return t >= first and (last is None or t <= last)
+
     def apply(self, cpu: float, mem: float, lat_ms: float, err: float):
         s = self.state.scenario
         t = self.state.t
 
-        if s is None:
+        if not self.active():
             return cpu, mem, lat_ms, err
 
         if s == "cpu_spike":
-            if 20 <= t <= 40:
-                cpu += 45 + random.uniform(-5, 5)
+            cpu += 45 + random.uniform(-5, 5)
 
         elif s == "memory_leak":
-            if t >= 15:
-                mem += min(60.0, (t - 15) * 2.0)
+            mem += min(60.0, (t - 15) * 2.0)
 
         elif s == "error_burst":
-            if 25 <= t <= 35:
-                err += 20 + random.uniform(-3, 3)
+            err += 20 + random.uniform(-3, 3)
 
         elif s == "network_latency":
-            if 18 <= t <= 45:
-                lat_ms += 250 + random.uniform(-20, 20)
+            lat_ms += 250 + random.uniform(-20, 20)
 
         return cpu, mem, lat_ms, err
\ No newline at end of file
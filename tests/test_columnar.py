@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import resource
+
+import numpy as np
+import pytest
+
+from core.columnar import ColumnarMetricsWriter, load_columnar, segment_paths
+
+
+def _write_segments(folder: str, segments: int, rows: int) -> None:
+    writer = ColumnarMetricsWriter(folder=folder, segment_rows=rows, flush_interval_s=None)
+    for i in range(segments * rows):
+        writer.log_metric({
+            "ts": float(i), "cpu": float(i), "mem": 1.0, "lat_ms": 2.0, "err": 0.0,
+            "version": f"v{i // rows % 3}", "scenario": None,
+        })
+    writer.close()
+
+
+def test_load_columnar_many_segments_under_fd_limit(tmp_path):
+    segments, rows = 1100, 4
+    _write_segments(str(tmp_path), segments, rows)
+    assert len(segment_paths(str(tmp_path))) == segments
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard != resource.RLIM_INFINITY and hard < 1024:
+        pytest.skip("hard descriptor limit below 1024")
+    resource.setrlimit(resource.RLIMIT_NOFILE, (1024, hard))
+    try:
+        cols, strings = load_columnar(str(tmp_path))
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+    assert len(cols["cpu"]) == segments * rows
+    np.testing.assert_array_equal(cols["cpu"], np.arange(segments * rows, dtype=np.float64))
+    versions = [strings[i] for i in cols["version"][::rows].tolist()]
+    assert versions == [f"v{k % 3}" for k in range(segments)]
@@ -0,0 +1,333 @@
+from __future__ import annotations
+
+import itertools
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from core.columnar import FAULT_UNKNOWN, is_columnar, load_columnar
+
+
+METRICS = ("cpu", "mem", "lat_ms", "err")
+
+
+@dataclass
+class BatchResult:
+    z: np.ndarray            # (T, M) z-scores, 0 while warming up
+    score: np.ndarray        # (T,) max |z|
+    abnormal: np.ndarray     # (T, M) |z| >= z_threshold
+    is_anomaly: np.ndarray   # (T,)
+    warming: np.ndarray      # (T,)
+
+
+def load_series(path: str) -> Dict[str, np.ndarray]:
+    """
+    A whole metrics file as arrays: ts, cpu, mem, lat_ms, err, replicas,
+    scenario (object array, None where unset) and, when the file records
+    them, fault_active (bool) and service (object array). Accepts
+    metrics.jsonl or columnar segments.
+    """
+    if is_columnar(path):
+        cols, strings = load_columnar(path)
+        out = {k: np.asarray(cols[k], dtype=np.float64) for k in ("ts",) + METRICS}
+        out["replicas"] = np.asarray(cols["replicas"])
+        out["scenario"] = np.array(strings, dtype=object)[cols["scenario"]]
+        fault = np.asarray(cols["fault_active"])
+        if fault.size and not (fault == FAULT_UNKNOWN).all():
+            out["fault_active"] = fault == 1
+        return out
+
+    rows = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                rows.append(json.loads(line))
+    out = {k: np.fromiter((r.get(k, 0.0) for r in rows), dtype=np.float64, count=len(rows))
+           for k in ("ts",) + METRICS}
+    out["replicas"] = np.fromiter((r.get("replicas", 0) for r in rows), dtype=np.int64, count=len(rows))
+    out["scenario"] = np.array([r.get("scenario") for r in rows], dtype=object)
+    if any("service" in r for r in rows):
+        out["service"] = np.array([r.get("service") for r in rows], dtype=object)
+    if any("fault_active" in r for r in rows):
+        out["fault_active"] = np.fromiter((bool(r.get("fault_active")) for r in rows), dtype=bool, count=len(rows))
+    return out
+
+
+def split_services(series: Dict[str, np.ndarray]) -> Dict[Any, Dict[str, np.ndarray]]:
+    """One series per service (in order of first appearance); the whole file if there is no service field."""
+    if "service" not in series:
+        return {None: series}
+    services = series["service"]
+    out: Dict[Any, Dict[str, np.ndarray]] = {}
+    for svc in dict.fromkeys(services.tolist()):
+        mask = services == svc
+        out[svc] = {k: v[mask] for k, v in series.items()}
+    return out
+
+
+def metric_matrix(series: Dict[str, np.ndarray]) -> np.ndarray:
+    """(T, M) float64 matrix in METRICS order."""
+    return np.column_stack([series[k] for k in METRICS]) if len(series["ts"]) else np.zeros((0, len(METRICS)))
+
+
+def rolling_moments(x: np.ndarray, window: int, ddof: int = 1, chunk: int = 1024) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mean and std of the trailing `window` rows (current row included) for
+    every row of x (T, M), from sliding-window cumulative sums. Rows before
+    the first full window are NaN. The series is processed in chunks, each
+    centred on its own mean, so the cumulative sums stay small on drifting
+    series. Windows whose variance is tiny next to their squared offset
+    from the chunk mean (e.g. a metric pinned at a bound) would lose most
+    digits to cancellation; those few are recomputed directly.
+    """
+    t_len = x.shape[0]
+    mean = np.full(x.shape, np.nan)
+    std = np.full(x.shape, np.nan)
+    step = max(chunk, 2 * window)
+    for start in range(window - 1, t_len, step):
+        stop = min(t_len, start + step)
+        seg = x[start - window + 1: stop]
+        c = seg.mean(axis=0)
+        d = seg - c
+        s1 = np.concatenate([np.zeros((1, x.shape[1])), np.cumsum(d, axis=0)])
+        s2 = np.concatenate([np.zeros((1, x.shape[1])), np.cumsum(d * d, axis=0)])
+        w1 = s1[window:] - s1[:-window]
+        w2 = s2[window:] - s2[:-window]
+        ss = np.maximum(w2 - w1 * w1 / window, 0.0)
+        bad = w2 > 1e6 * ss
+        if bad.any():
+            windows = np.lib.stride_tricks.sliding_window_view(seg, window, axis=0)  # (rows, M, window)
+            r, m = np.nonzero(bad)
+            vals = windows[r, m]
+            ss[r, m] = ((vals - vals.mean(axis=1, keepdims=True)) ** 2).sum(axis=1)
+        mean[start:stop] = c + w1 / window
+        std[start:stop] = np.sqrt(ss / max(1, window - ddof))
+    return mean, std
+
+
+def zscores(x: np.ndarray, window_size: int) -> np.ndarray:
+    """MonitorAgent z-scores for every row; 0 where the std is ~0 or the window is not full."""
+    if window_size < 3:
+        raise ValueError("batch replay needs window_size >= 3")
+    mean, sd = rolling_moments(x, window_size, ddof=1)
+    ok = sd >= 1e-9  # NaN (warmup) compares False
+    return np.where(ok, (x - mean) / np.where(ok, sd, 1.0), 0.0)
+
+
+def decide(
+    z: np.ndarray,
+    window_size: int,
+    z_threshold: float,
+    score_threshold: float,
+    min_abnormal_metrics: int,
+) -> BatchResult:
+    """Apply MonitorAgent's thresholds to precomputed z-scores."""
+    warming = np.arange(z.shape[0]) + 1 < window_size
+    abs_z = np.abs(z)
+    score = abs_z.max(axis=1) if z.shape[1] else np.zeros(z.shape[0])
+    abnormal = (abs_z >= z_threshold) & ~warming[:, None]
+    is_anomaly = ~warming & (abnormal.sum(axis=1) >= min_abnormal_metrics) & (score >= score_threshold)
+    return BatchResult(z=z, score=score, abnormal=abnormal, is_anomaly=is_anomaly, warming=warming)
+
+
+def detect(x: np.ndarray, cfg: Any) -> BatchResult:
+    """MonitorAgent (detector="zscore") decisions for a whole series at once."""
+    return decide(
+        zscores(x, int(cfg.window_size)),
+        int(cfg.window_size),
+        float(cfg.z_threshold),
+        float(cfg.score_threshold),
+        int(cfg.min_abnormal_metrics),
+    )
+
+
+def parity(x: np.ndarray, cfg: Any, result: BatchResult) -> Tuple[int, float]:
+    """
+    Re-run the streaming MonitorAgent over x and compare with `result`.
+    Returns (rows whose is_anomaly or abnormal metrics differ, max |z| difference).
+    """
+    from agents.monitor import MonitorAgent
+
+    monitor = MonitorAgent(cfg)
+    mismatches = 0
+    max_dz = 0.0
+    for t, row in enumerate(x.tolist()):
+        point = dict(zip(METRICS, row))
+        monitor.window.add(point)
+        report = monitor.detect(_Point(point))
+        abnormal = {METRICS[j] for j in np.flatnonzero(result.abnormal[t])}
+        if report.is_anomaly != bool(result.is_anomaly[t]) or set(report.abnormal_metrics) != abnormal:
+            mismatches += 1
+        if report.reason != "warming_up":
+            # streaming only returns z for abnormal metrics; compare the score instead
+            max_dz = max(max_dz, abs(report.anomaly_score - float(result.score[t])))
+    return mismatches, max_dz
+
+
+def stream_detect(x: np.ndarray, cfg: Any) -> np.ndarray:
+    """is_anomaly per row from the streaming MonitorAgent (any detector)."""
+    from agents.monitor import MonitorAgent
+
+    monitor = MonitorAgent(cfg)
+    out = np.zeros(len(x), dtype=bool)
+    for t, row in enumerate(x.tolist()):
+        point = _Point(dict(zip(METRICS, row)))
+        monitor.observe(point)
+        out[t] = monitor.detect(point).is_anomaly
+    return out
+
+
+class _Point:
+    __slots__ = ("metrics",)
+
+    def __init__(self, metrics: Dict[str, float]):
+        self.metrics = metrics
+
+
+@dataclass
+class ShardResult:
+    path: str
+    service: Any
+    points: int
+    anomalies: int
+    seconds: float
+
+
+def peek_services(path: str, rows: int = 1000) -> List[Any]:
+    """
+    Services named in the first `rows` records of a metrics.jsonl (in order
+    of first appearance; [] when there is no service field or the path is
+    columnar). Multi-service files are written tick-major, so the first
+    tick already names every service.
+    """
+    if is_columnar(path) or not os.path.isfile(path):
+        return []
+    seen: Dict[Any, None] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in itertools.islice(f, rows):
+            line = line.strip()
+            if line:
+                rec = json.loads(line)
+                if "service" in rec:
+                    seen.setdefault(rec["service"])
+    return list(seen)
+
+
+def detect_shard(path: str, service: Any, x: np.ndarray, cfg: Any, seconds: float = 0.0) -> ShardResult:
+    """Detect over one service's (T, M) metrics; `seconds` is time already spent on it (loading)."""
+    t0 = time.perf_counter()
+    if getattr(cfg, "detector", "zscore") == "zscore":
+        is_anomaly = detect(x, cfg).is_anomaly
+    else:
+        is_anomaly = stream_detect(x, cfg)
+    return ShardResult(path, service, len(x), int(is_anomaly.sum()), seconds + time.perf_counter() - t0)
+
+
+def load_shards(path: str, cfg: Any) -> Tuple[List[ShardResult], List[Tuple[Any, np.ndarray]], float]:
+    """
+    Load one file in a worker process. A single-service file is detected
+    right here and comes back as a finished ShardResult; a multi-service
+    file comes back as (service, metric matrix) parts for the caller to
+    spread across the pool. Returns (finished, parts, load seconds).
+    """
+    t0 = time.perf_counter()
+    parts = [(svc, metric_matrix(part)) for svc, part in split_services(load_series(path)).items()]
+    load_s = time.perf_counter() - t0
+    if len(parts) == 1:
+        svc, x = parts[0]
+        return [detect_shard(path, svc, x, cfg, seconds=load_s)], [], load_s
+    return [], parts, load_s
+
+
+def ground_truth(series: Dict[str, np.ndarray]) -> np.ndarray:
+    """Per-tick labels: fault_active when logged, otherwise "a scenario was set"."""
+    if "fault_active" in series:
+        return np.asarray(series["fault_active"], dtype=bool)
+    return np.fromiter((s is not None for s in series["scenario"]), dtype=bool, count=len(series["scenario"]))
+
+
+@dataclass
+class Score:
+    precision: float    # anomalous ticks that were labelled faulty
+    recall: float       # fault episodes with at least one detection
+    f1: float
+    mean_delay: float   # ticks from episode start to first detection (NaN if none detected)
+    detections: int
+    episodes: int
+
+
+def score(is_anomaly: np.ndarray, labels: np.ndarray) -> Score:
+    detections = int(is_anomaly.sum())
+    tp = int((is_anomaly & labels).sum())
+    precision = tp / detections if detections else 0.0
+
+    edges = np.diff(labels.astype(np.int8), prepend=0, append=0)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    seen = np.concatenate([[0], np.cumsum(is_anomaly)])
+    hit = seen[ends] > seen[starts]
+    recall = float(hit.mean()) if len(starts) else 0.0
+
+    positions = np.flatnonzero(is_anomaly)
+    if hit.any():
+        first = positions[np.searchsorted(positions, starts[hit])]
+        mean_delay = float((first - starts[hit]).mean())
+    else:
+        mean_delay = float("nan")
+
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return Score(precision, recall, f1, mean_delay, detections, len(starts))
+
+
+# per-process copy of the series for sweep workers (set once by the pool initializer)
+_SWEEP: Dict[str, np.ndarray] = {}
+
+
+def _sweep_init(x: np.ndarray, labels: np.ndarray) -> None:
+    _SWEEP["x"] = x
+    _SWEEP["labels"] = labels
+
+
+def _sweep_window(window_size: int, thresholds: List[Tuple[float, float, int]]) -> List[Tuple[Tuple, Score]]:
+    """Score every threshold combination for one window size, sharing its z-scores."""
+    z = zscores(_SWEEP["x"], window_size)
+    out = []
+    for z_thr, score_thr, min_abnormal in thresholds:
+        result = decide(z, window_size, z_thr, score_thr, min_abnormal)
+        out.append(((window_size, z_thr, score_thr, min_abnormal), score(result.is_anomaly, _SWEEP["labels"])))
+    return out
+
+
+def sweep(
+    x: np.ndarray,
+    labels: np.ndarray,
+    windows: Sequence[int],
+    z_thresholds: Sequence[float],
+    score_thresholds: Sequence[float],
+    min_abnormals: Sequence[int],
+    workers: int = 0,
+) -> List[Tuple[Tuple, Score]]:
+    """
+    Evaluate the full grid. One task per window size (rolling stats are
+    computed once and shared by all its threshold combinations), spread
+    over a process pool. Results are ranked by F1, then detection delay.
+    """
+    thresholds = list(itertools.product(z_thresholds, score_thresholds, min_abnormals))
+    results: List[Tuple[Tuple, Score]] = []
+    if workers == 1 or len(windows) == 1:
+        _sweep_init(x, labels)
+        for w in windows:
+            results.extend(_sweep_window(w, thresholds))
+    else:
+        with ProcessPoolExecutor(max_workers=workers or None, initializer=_sweep_init, initargs=(x, labels)) as pool:
+            for chunk in pool.map(_sweep_window, windows, itertools.repeat(thresholds)):
+                results.extend(chunk)
+    results.sort(key=lambda r: (-r[1].f1, math.inf if math.isnan(r[1].mean_delay) else r[1].mean_delay))
+    return results
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import os
+from typing import IO, List, Optional
+
+
+class FileTailer:
+    """
+    Incrementally reads complete lines appended to a growing file, like
+    `tail -F`: bytes already consumed are never re-read, a partial last
+    line is held until its newline arrives, a rotated file (new inode) is
+    drained before switching to its replacement, and a truncated file is
+    re-read from the start.
+    """
+
+    def __init__(self, path: str, from_start: bool = False):
+        self.path = path
+        self.rotations = 0
+        self.truncations = 0
+        self._f: Optional[IO[bytes]] = None
+        self._ino: Optional[int] = None
+        self._partial = b""
+        self._open(seek_end=not from_start)
+
+    def _open(self, seek_end: bool) -> None:
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            self._f = None
+            return
+        self._f = f
+        self._ino = os.fstat(f.fileno()).st_ino
+        if seek_end:
+            f.seek(0, os.SEEK_END)
+
+    def _drain(self) -> List[bytes]:
+        data = self._f.read()
+        if not data:
+            return []
+        parts = (self._partial + data).split(b"\n")
+        self._partial = parts.pop()
+        return [p for p in parts if p.strip()]
+
+    def read_lines(self) -> List[bytes]:
+        """Complete lines appended since the last call (possibly none)."""
+        if self._f is None:
+            self._open(seek_end=False)
+            if self._f is None:
+                return []
+        lines = self._drain()
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return lines  # rotated away, replacement not created yet
+        if st.st_ino != self._ino:
+            # the writer may have appended to the old file after the drain above
+            lines.extend(self._drain())
+            self._f.close()
+            self._partial = b""
+            self.rotations += 1
+            self._open(seek_end=False)
+            if self._f is not None:
+                lines.extend(self._drain())
+        elif st.st_size < self._f.tell():
+            self._f.seek(0)
+            self._partial = b""
+            self.truncations += 1
+            lines.extend(self._drain())
+        return lines
+
+    def close(self) -> None:
+        if self._f is not None:
+            self._f.close()
+            self._f = None
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import time
+from typing import Any, Dict, Iterator, List
+
+from core.memory_sqlite import SQLiteMemoryStore
+
+
+def memory_files(path: str) -> List[str]:
+    """A JSONL memory's sealed segments (oldest first) followed by its active file."""
+    base, ext = os.path.splitext(path)
+    segments = sorted(glob.glob(glob.escape(base) + ".[0-9][0-9][0-9][0-9][0-9][0-9]" + ext))
+    return segments + ([path] if os.path.exists(path) else [])
+
+
+def iter_rows(paths: List[str]) -> Iterator[Dict[str, Any]]:
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(row, dict):
+                    yield row
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Import a JSONL MemoryStore into an SQLite memory database")
+    p.add_argument("--src", type=str, default="memory/aiops_memory.jsonl", help="Active JSONL memory file")
+    p.add_argument("--dst", type=str, default="memory/aiops_memory.db", help="SQLite database to create or fill")
+    p.add_argument("--batch", type=int, default=10_000, help="Rows per transaction")
+    p.add_argument("--append", action="store_true", help="Import even if the database already has outcomes")
+    return p.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    paths = memory_files(args.src)
+    if not paths:
+        raise SystemExit(f"no memory files at {args.src}")
+
+    store = SQLiteMemoryStore(path=args.dst)
+    existing = len(store)
+    if existing and not args.append:
+        store.close()
+        raise SystemExit(f"{args.dst} already holds {existing} outcomes; pass --append to add to it")
+
+    t0 = time.perf_counter()
+    n = store.import_rows(iter_rows(paths), batch=args.batch)
+    store.compact()
+    store.close()
+    print(f"Imported {n} rows from {len(paths)} files into {args.dst} in {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
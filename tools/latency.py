@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import argparse
+import json
+from typing import Any, Dict, Iterator, List
+
+from core.histogram import StageTimings
+
+
+def iter_stage_records(path: str) -> Iterator[Dict[str, Any]]:
+    """stage_latency records from a stats.jsonl file or a replay --timings-out JSON file."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    try:
+        docs: List[Any] = [json.loads(text)]
+    except json.JSONDecodeError:
+        docs = [json.loads(line) for line in text.splitlines() if line.strip()]
+    for doc in docs:
+        if isinstance(doc, dict) and doc.get("kind") == "stage_latency":
+            yield doc
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Merge per-stage latency histograms from agent and replay runs")
+    p.add_argument("paths", nargs="+", help="logs/stats.jsonl files and/or replay --timings-out files")
+    p.add_argument("--out", type=str, default=None, help="Write the merged histograms here")
+    return p.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    merged = StageTimings()
+    records = 0
+    for path in args.paths:
+        for rec in iter_stage_records(path):
+            merged.merge(StageTimings.from_record(rec))
+            records += 1
+
+    print(f"Merged {records} records from {len(args.paths)} files")
+    print(f"{'stage':<16} {'count':>9} {'p50_us':>10} {'p90_us':>10} {'p99_us':>10} {'max_us':>10} {'mean_us':>10}")
+    for stage, st in merged.summary().items():
+        print(
+            f"{stage:<16} {st['count']:>9} {st['p50_us']:>10.1f} {st['p90_us']:>10.1f} "
+            f"{st['p99_us']:>10.1f} {st['max_us']:>10.1f} {st['mean_us']:>10.1f}"
+        )
+    if args.out:
+        merged.save(args.out)
+
+
+if __name__ == "__main__":
+    main()
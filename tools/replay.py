@@ -1,13 +1,26 @@
 from __future__ import annotations
 
 import argparse
+import glob
 import json
+import os
 import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from dataclasses import dataclass
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, Iterator, List, Optional
 
+import numpy as np
+
+from core.columnar import is_columnar, iter_segments
 from core.config import MonitorConfig
+from core.histogram import Histogram, StageTimings
+from core.profiling import Profiling
 from agents.monitor import MonitorAgent
+from tools import batch
+from tools.follow import FileTailer
+
+
+DETECTORS = ["zscore", "mad", "ewma"]
 
 
 @dataclass
@@ -25,69 +38,454 @@ class MetricPointAdapter:
         return {"cpu": self.cpu, "mem": self.mem, "lat_ms": self.lat_ms, "err": self.err}
 
 
+def point_from_record(rec: Dict[str, Any]) -> MetricPointAdapter:
+    return MetricPointAdapter(
+        ts=float(rec.get("ts", time.time())),
+        cpu=float(rec["cpu"]),
+        mem=float(rec["mem"]),
+        lat_ms=float(rec["lat_ms"]),
+        err=float(rec["err"]),
+        replicas=int(rec.get("replicas", 0)),
+        version=str(rec.get("version", "")),
+    )
+
+
+def iter_jsonl(path: str) -> Iterator[MetricPointAdapter]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            yield point_from_record(json.loads(line))
+
+
+def iter_columnar(path: str) -> Iterator[MetricPointAdapter]:
+    for cols, strings in iter_segments(path):
+        versions = [strings[i] or "" for i in cols["version"].tolist()]
+        yield from map(
+            MetricPointAdapter,
+            cols["ts"].tolist(),
+            cols["cpu"].tolist(),
+            cols["mem"].tolist(),
+            cols["lat_ms"].tolist(),
+            cols["err"].tolist(),
+            cols["replicas"].tolist(),
+            versions,
+        )
+
+
+def iter_points(path: str) -> Iterator[MetricPointAdapter]:
+    """Points from a metrics.jsonl file or a columnar segment / folder of segments."""
+    return iter_columnar(path) if is_columnar(path) else iter_jsonl(path)
+
+
 def parse_args() -> argparse.Namespace:
     p = argparse.ArgumentParser(description="Replay logs/metrics.jsonl through the MonitorAgent")
-    p.add_argument("--path", type=str, default="logs/metrics.jsonl", help="Path to metrics.jsonl")
+    p.add_argument(
+        "--path",
+        type=str,
+        nargs="+",
+        default=["logs/metrics.jsonl"],
+        help="metrics.jsonl files, .col segments, folders or globs; several are replayed in parallel",
+    )
     p.add_argument("--window", type=int, default=30, help="Monitor window size for replay")
     p.add_argument("--z", type=float, default=3.0, help="z_threshold for replay")
     p.add_argument("--score", type=float, default=3.5, help="score_threshold for replay")
     p.add_argument("--min-abnormal", type=int, default=1, help="min_abnormal_metrics for replay")
+    p.add_argument("--detector", type=str, default="zscore", choices=DETECTORS, help="Detector for replay")
+    p.add_argument("--half-life", type=float, default=30.0, help="ewma_half_life (ticks) for the ewma detector")
+    p.add_argument("--trend", action="store_true", help="ewma detector also tracks a trend")
+    p.add_argument(
+        "--compare",
+        type=str,
+        nargs="*",
+        default=[],
+        choices=DETECTORS,
+        help="Also run these detectors on the same points and report agreement with --detector",
+    )
     p.add_argument("--sleep", type=float, default=0.0, help="Sleep seconds between lines (0 = fast)")
+    p.add_argument(
+        "--batch",
+        action="store_true",
+        help="Load the whole series into arrays and detect with rolling sums (zscore detector only)",
+    )
+    p.add_argument("--parity", action="store_true", help="With --batch, also run the streaming path and compare")
+    p.add_argument("--quiet", action="store_true", help="Only print the summary")
+    p.add_argument(
+        "--sweep",
+        action="store_true",
+        help="Score a grid of MonitorConfigs against the logged fault_active/scenario labels",
+    )
+    p.add_argument("--windows", type=str, default="20,30,60", help="Sweep: comma-separated window sizes")
+    p.add_argument("--zs", type=str, default="2.5,3.0,3.5", help="Sweep: comma-separated z thresholds")
+    p.add_argument("--scores", type=str, default="3.0,3.5,4.0", help="Sweep: comma-separated score thresholds")
+    p.add_argument("--min-abnormals", type=str, default="1,2", help="Sweep: comma-separated min_abnormal_metrics")
+    p.add_argument("--workers", type=int, default=0, help="Sweep/multi-file: worker processes (0 = one per core)")
+    p.add_argument("--top", type=int, default=20, help="Sweep: rows of the ranked table to print")
+    p.add_argument(
+        "--follow",
+        action="store_true",
+        help="Tail a growing metrics.jsonl and detect on new points as they are written",
+    )
+    p.add_argument("--from-start", action="store_true", help="Follow: replay existing lines first")
+    p.add_argument("--poll", type=float, default=0.1, help="Follow: seconds between checks when idle")
+    p.add_argument("--report-every", type=float, default=10.0, help="Follow: seconds between lag summaries")
+    p.add_argument(
+        "--timings-out",
+        type=str,
+        default=None,
+        help="Write per-stage latency histograms (observe/detect) as JSON; merge files with tools.latency",
+    )
+    p.add_argument("--profile-points", type=int, default=0,
+                   help="cProfile observe/detect for the first N points, one .pstats per stage")
+    p.add_argument("--profile-sample", type=float, default=0.0,
+                   help="Run the sampling profiler for this many seconds from startup (collapsed stacks)")
+    p.add_argument("--profile-interval-ms", type=float, default=5.0, help="Sampling profiler interval (CPU time)")
+    p.add_argument("--profile-signals", action="store_true",
+                   help="SIGUSR1 toggles the sampling profiler, SIGUSR2 cProfiles the next --profile-signal-points points")
+    p.add_argument("--profile-signal-points", type=int, default=1000, help="Points captured per SIGUSR2")
+    p.add_argument("--profile-dir", type=str, default="logs/profiles", help="Where profiles are written")
     return p.parse_args()
 
 
-def main() -> None:
-    args = parse_args()
+def build_profiling(args: argparse.Namespace) -> Optional[Profiling]:
+    if not (args.profile_points or args.profile_sample or args.profile_signals):
+        return None
+    profiling = Profiling(
+        out_dir=args.profile_dir,
+        interval_s=args.profile_interval_ms / 1000.0,
+        signal_ticks=args.profile_signal_points,
+    )
+    if args.profile_signals:
+        profiling.install_signals()
+        print(f"[PROFILE] pid={os.getpid()}: SIGUSR1 toggles sampling, SIGUSR2 profiles {args.profile_signal_points} points")
+    profiling.arm_ticks(args.profile_points)
+    if args.profile_sample:
+        profiling.start_sampling(args.profile_sample)
+    return profiling
+
+
+def profiled(profiling: Optional[Profiling], monitor: MonitorAgent) -> MonitorAgent:
+    """Route the monitor's observe/detect through the profiling hooks."""
+    if profiling is not None:
+        monitor.observe = profiling.wrap("observe", monitor.observe)
+        monitor.detect = profiling.wrap("detect", monitor.detect)
+    return monitor
 
-    cfg = MonitorConfig(
-        window_size=args.window,
-        z_threshold=args.z,
-        score_threshold=args.score,
-        min_abnormal_metrics=args.min_abnormal,
+
+def replay_batch(args: argparse.Namespace, cfg: MonitorConfig) -> None:
+    if args.detector != "zscore" or args.compare:
+        raise SystemExit("--batch supports only --detector zscore without --compare")
+
+    t0 = time.perf_counter()
+    series = batch.load_series(args.path)
+    x = batch.metric_matrix(series)
+    t1 = time.perf_counter()
+    result = batch.detect(x, cfg)
+    t2 = time.perf_counter()
+
+    if not args.quiet:
+        for t in np.flatnonzero(result.is_anomaly):
+            abnormal = [batch.METRICS[j] for j in np.flatnonzero(result.abnormal[t])]
+            cpu, mem, lat, err = x[t]
+            print(
+                f"[REPLAY] anomaly=True score={result.score[t]:.2f} abnormal={abnormal} "
+                f"cpu={cpu:.1f} mem={mem:.1f} lat={lat:.1f} err={err:.1f}"
+            )
+
+    print(
+        f"Replay done. total_points={len(x)} anomalies={int(result.is_anomaly.sum())} detector=zscore "
+        f"load_s={t1 - t0:.3f} detect_s={t2 - t1:.3f}"
     )
 
-    monitor = MonitorAgent(cfg)
+    if args.parity:
+        mismatches, max_dz = batch.parity(x, cfg, result)
+        status = "ok" if mismatches == 0 else "MISMATCH"
+        print(f"[PARITY] {status} mismatched_points={mismatches} max_score_diff={max_dz:.3g}")
+        if mismatches:
+            raise SystemExit(1)
+
+
+def expand_paths(patterns: List[str], keep_missing: bool = False) -> List[str]:
+    """
+    Globs and folders -> replayable paths. A folder of .col segments is one
+    series. A pattern matching nothing is an error unless keep_missing (a
+    --follow target may not exist yet).
+    """
+    out: List[str] = []
+    unmatched: List[str] = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+        if not matches and (keep_missing or os.path.exists(pattern)):
+            matches = [pattern]
+        if not matches:
+            unmatched.append(pattern)
+        for path in matches:
+            if os.path.isdir(path) and not glob.glob(os.path.join(path, "metrics-*.col")):
+                out.extend(sorted(glob.glob(os.path.join(path, "*.jsonl"))))
+                out.extend(sorted(glob.glob(os.path.join(path, "*.col"))))
+            else:
+                out.append(path)
+    if unmatched:
+        raise SystemExit(f"no metrics files match {' '.join(unmatched)}")
+    return list(dict.fromkeys(out))
+
+
+def replay_sharded(args: argparse.Namespace, paths: List[str], cfg: MonitorConfig) -> None:
+    """
+    One shard per (file, service). Files are loaded in the pool; a file
+    with several services sends each back to the pool as its own task, so
+    the services of one big file run in parallel rather than one after
+    another in the worker that loaded it.
+    """
+    t0 = time.perf_counter()
+    shards: List[batch.ShardResult] = []
+
+    def report(r: batch.ShardResult) -> None:
+        shards.append(r)
+        if not args.quiet:
+            svc = "" if r.service is None else f" service={r.service}"
+            print(f"[SHARD] path={r.path}{svc} points={r.points} anomalies={r.anomalies} seconds={r.seconds:.3f}")
+
+    with ProcessPoolExecutor(max_workers=args.workers or None) as pool:
+        loading = {pool.submit(batch.load_shards, path, cfg): path for path in paths}
+        pending = set(loading)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut not in loading:
+                    report(fut.result())
+                    continue
+                finished, parts, load_s = fut.result()
+                for r in finished:
+                    report(r)
+                for i, (svc, x) in enumerate(parts):
+                    # parsing is charged to the file's first shard
+                    pending.add(pool.submit(batch.detect_shard, loading[fut], svc, x, cfg, load_s if i == 0 else 0.0))
+    wall = time.perf_counter() - t0
+
+    points = sum(r.points for r in shards)
+    anomalies = sum(r.anomalies for r in shards)
+    busy = sum(r.seconds for r in shards)
+    print(
+        f"Replay done. files={len(paths)} shards={len(shards)} total_points={points} anomalies={anomalies} "
+        f"detector={cfg.detector} wall_s={wall:.3f} shard_s={busy:.3f}"
+    )
+
+
+def replay_follow(
+    args: argparse.Namespace,
+    monitors: Dict[str, MonitorAgent],
+    profiling: Optional[Profiling] = None,
+) -> None:
+    """
+    Shadow a live agent: feed each newly written point to every monitor
+    and report end-to-end lag (record ts -> detection) per interval.
+    """
+    if is_columnar(args.path):
+        raise SystemExit("--follow needs a metrics.jsonl path")
+
+    tailer = FileTailer(args.path, from_start=args.from_start)
+    points = 0
+    anomalies = {name: 0 for name in monitors}
+    lags = Histogram()  # us, reset every report
+    next_report = time.monotonic() + args.report_every
+    print(f"Following {args.path} with detectors={list(monitors)}")
+    try:
+        while True:
+            lines = tailer.read_lines()
+            for raw in lines:
+                try:
+                    point = point_from_record(json.loads(raw))
+                except (ValueError, KeyError):
+                    continue
+                for name, monitor in monitors.items():
+                    monitor.observe(point)
+                    report = monitor.detect(point)
+                    if report.is_anomaly:
+                        anomalies[name] += 1
+                        if not args.quiet:
+                            print(
+                                f"[FOLLOW] detector={name} score={report.anomaly_score:.2f} "
+                                f"abnormal={list(report.abnormal_metrics)} lag_ms={(time.time() - point.ts) * 1000:.1f}"
+                            )
+                lags.record(int((time.time() - point.ts) * 1e6))
+                points += 1
+                if profiling is not None:
+                    profiling.tick()
+
+            now = time.monotonic()
+            if now >= next_report:
+                new = lags.count
+                if new:
+                    p50, p99 = lags.percentiles((50, 99))
+                    lag = f"lag_ms p50={p50 / 1000:.1f} p99={p99 / 1000:.1f} max={lags.max / 1000:.1f}"
+                else:
+                    lag = "lag_ms n/a"
+                print(
+                    f"[FOLLOW] points={points} new={new} anomalies={anomalies} {lag} "
+                    f"rotations={tailer.rotations} truncations={tailer.truncations}"
+                )
+                lags.reset()
+                next_report = now + args.report_every
+
+            if not lines:
+                time.sleep(args.poll)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        tailer.close()
+    print(f"Follow stopped. total_points={points} anomalies={anomalies}")
+
+
+def replay_sweep(args: argparse.Namespace) -> None:
+    def floats(v: str):
+        return [float(p) for p in v.split(",") if p]
+
+    def ints(v: str):
+        return [int(p) for p in v.split(",") if p]
+
+    t0 = time.perf_counter()
+    series = batch.load_series(args.path)
+    x = batch.metric_matrix(series)
+    labels = batch.ground_truth(series)
+    source = "fault_active" if "fault_active" in series else "scenario"
+    t1 = time.perf_counter()
+
+    results = batch.sweep(
+        x, labels,
+        windows=ints(args.windows),
+        z_thresholds=floats(args.zs),
+        score_thresholds=floats(args.scores),
+        min_abnormals=ints(args.min_abnormals),
+        workers=args.workers,
+    )
+    t2 = time.perf_counter()
+
+    print(
+        f"Sweep done. total_points={len(x)} labelled={int(labels.sum())} labels={source} "
+        f"configs={len(results)} load_s={t1 - t0:.3f} sweep_s={t2 - t1:.3f}"
+    )
+    print(f"{'rank':>4} {'window':>6} {'z':>5} {'score':>5} {'min_ab':>6} "
+          f"{'prec':>6} {'recall':>6} {'f1':>6} {'delay':>6} {'alerts':>7}")
+    for rank, ((window, z_thr, score_thr, min_ab), sc) in enumerate(results[: args.top], start=1):
+        print(
+            f"{rank:>4} {window:>6} {z_thr:>5.2f} {score_thr:>5.2f} {min_ab:>6} "
+            f"{sc.precision:>6.3f} {sc.recall:>6.3f} {sc.f1:>6.3f} {sc.mean_delay:>6.1f} {sc.detections:>7}"
+        )
+
+
+def replay_stream(
+    args: argparse.Namespace,
+    monitor: MonitorAgent,
+    make_cfg: Callable[[str], MonitorConfig],
+    profiling: Optional[Profiling] = None,
+) -> None:
+    others = {d: MonitorAgent(make_cfg(d)) for d in args.compare if d != args.detector}
 
     total = 0
     anomalies = 0
+    timings = StageTimings()
+    clock = time.perf_counter_ns
+    # detector -> [fired, both fired, only this one fired, only --detector fired]
+    agreement = {d: [0, 0, 0, 0] for d in others}
 
-    with open(args.path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            rec: Dict[str, Any] = json.loads(line)
-
-            point = MetricPointAdapter(
-                ts=float(rec.get("ts", time.time())),
-                cpu=float(rec["cpu"]),
-                mem=float(rec["mem"]),
-                lat_ms=float(rec["lat_ms"]),
-                err=float(rec["err"]),
-                replicas=int(rec.get("replicas", 0)),
-                version=str(rec.get("version", "")),
-            )
+    for point in iter_points(args.path):
+        t0 = clock()
+        monitor.observe(point)
+        t1 = clock()
+        report = monitor.detect(point)
+        t2 = clock()
+        timings.record("observe", t1 - t0)
+        timings.record("detect", t2 - t1)
+        if profiling is not None:
+            profiling.tick()
 
-            monitor.observe(point)
-            report = monitor.detect(point)
+        total += 1
 
-            total += 1
+        for d, other in others.items():
+            other.observe(point)
+            fired = other.detect(point).is_anomaly
+            counts = agreement[d]
+            counts[0] += fired
+            counts[1] += fired and report.is_anomaly
+            counts[2] += fired and not report.is_anomaly
+            counts[3] += report.is_anomaly and not fired
 
-            if report.reason == "warming_up":
-                # keep it quiet or print if you want
-                pass
-            elif report.is_anomaly:
-                anomalies += 1
-                abnormal = list(report.abnormal_metrics.keys())
+        if report.reason == "warming_up":
+            # keep it quiet or print if you want
+            pass
+        elif report.is_anomaly:
+            anomalies += 1
+            abnormal = list(report.abnormal_metrics.keys())
+            if not args.quiet:
                 print(
                     f"[REPLAY] anomaly=True score={report.anomaly_score:.2f} abnormal={abnormal} "
                     f"cpu={point.cpu:.1f} mem={point.mem:.1f} lat={point.lat_ms:.1f} err={point.err:.1f}"
                 )
 
-            if args.sleep > 0:
-                time.sleep(args.sleep)
+        if args.sleep > 0:
+            time.sleep(args.sleep)
+
+    print(f"Replay done. total_points={total} anomalies={anomalies} detector={args.detector}")
+    for stage, st in timings.summary().items():
+        print(
+            f"[TIMINGS] stage={stage} count={st['count']} p50_us={st['p50_us']:.1f} "
+            f"p90_us={st['p90_us']:.1f} p99_us={st['p99_us']:.1f} max_us={st['max_us']:.1f}"
+        )
+    if args.timings_out:
+        timings.save(args.timings_out)
+    for d, (fired, both, only_other, only_primary) in agreement.items():
+        print(
+            f"[COMPARE] detector={d} anomalies={fired} both={both} "
+            f"only_{d}={only_other} only_{args.detector}={only_primary}"
+        )
+
+
+def main() -> None:
+    args = parse_args()
+
+    def make_cfg(detector: str) -> MonitorConfig:
+        return MonitorConfig(
+            window_size=args.window,
+            z_threshold=args.z,
+            score_threshold=args.score,
+            min_abnormal_metrics=args.min_abnormal,
+            detector=detector,
+            ewma_half_life=args.half_life,
+            ewma_trend=args.trend,
+        )
+
+    paths = expand_paths(args.path, keep_missing=args.follow)
+    if not paths:
+        raise SystemExit(f"no metrics files match {' '.join(args.path)}")
+    # a file holding several services replays each as its own series, like several files
+    if len(paths) > 1 or (not args.follow and len(batch.peek_services(paths[0])) > 1):
+        if args.sweep or args.compare or args.parity:
+            raise SystemExit("--sweep, --compare and --parity take a single --path with a single service")
+        replay_sharded(args, paths, make_cfg(args.detector))
+        return
+    args.path = paths[0]
+
+    if args.sweep:
+        replay_sweep(args)
+        return
+
+    if args.batch:
+        replay_batch(args, make_cfg(args.detector))
+        return
 
-    print(f"Replay done. total_points={total} anomalies={anomalies}")
+    profiling = build_profiling(args)
+    try:
+        if args.follow:
+            monitors = {args.detector: profiled(profiling, MonitorAgent(make_cfg(args.detector)))}
+            monitors.update({d: MonitorAgent(make_cfg(d)) for d in args.compare if d != args.detector})
+            replay_follow(args, monitors, profiling)
+        else:
+            replay_stream(args, profiled(profiling, MonitorAgent(make_cfg(args.detector))), make_cfg, profiling)
+    finally:
+        if profiling is not None:
+            profiling.close()
 
 
 if __name__ == "__main__":